@@ -0,0 +1,87 @@
+"""
+swap解码器微基准测试 - 测量单核每秒可解码的交易数量
+"""
+
+import random
+import time
+
+from swap_decoder import DEX_PROGRAMS, WSOL_MINT, decode_swap
+
+# 测试交易数量
+TX_COUNT = 20000
+
+ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def random_address() -> str:
+    return "".join(random.choices(ALPHABET, k=44))
+
+def token_balance(index: int, mint: str, owner: str, amount: int, decimals: int = 6):
+    return {
+        "accountIndex": index,
+        "mint": mint,
+        "owner": owner,
+        "uiTokenAmount": {"amount": str(amount), "decimals": decimals, "uiAmount": amount / 10 ** decimals}
+    }
+
+def make_transaction(wallet: str, program_id: str, is_buy: bool):
+    """构造一笔典型的swap交易(约20个账户，带wSOL和目标代币余额)"""
+    keys = [wallet] + [random_address() for _ in range(18)] + [program_id]
+    mint = random_address()
+    pool = keys[5]
+    token_before, token_after = (0, 5_000_000_000) if is_buy else (5_000_000_000, 0)
+    sol_before, sol_after = (10_000_000_000, 8_995_000_000) if is_buy else (8_995_000_000, 11_500_000_000)
+    return {
+        "blockTime": int(time.time()),
+        "slot": 1,
+        "transaction": {
+            "signatures": [random_address() + random_address()],
+            "message": {"accountKeys": keys, "instructions": [{"programIdIndex": len(keys) - 1}]}
+        },
+        "meta": {
+            "err": None,
+            "fee": 5000,
+            "preBalances": [sol_before] + [2_039_280] * (len(keys) - 1),
+            "postBalances": [sol_after] + [2_039_280] * (len(keys) - 1),
+            "preTokenBalances": [
+                token_balance(3, mint, wallet, token_before),
+                token_balance(4, mint, pool, 900_000_000_000),
+                token_balance(6, WSOL_MINT, pool, 50_000_000_000, 9),
+            ],
+            "postTokenBalances": [
+                token_balance(3, mint, wallet, token_after),
+                token_balance(4, mint, pool, 895_000_000_000),
+                token_balance(6, WSOL_MINT, pool, 51_000_000_000, 9),
+            ],
+            "loadedAddresses": {"writable": [], "readonly": []}
+        }
+    }
+
+def make_transfer(wallet: str):
+    """构造一笔非swap的转账交易"""
+    keys = [wallet, random_address(), "11111111111111111111111111111111"]
+    return {
+        "blockTime": int(time.time()),
+        "transaction": {"signatures": [random_address()], "message": {"accountKeys": keys}},
+        "meta": {"err": None, "fee": 5000, "preBalances": [1, 0, 1], "postBalances": [0, 1, 1],
+                 "preTokenBalances": [], "postTokenBalances": []}
+    }
+
+def run(name: str, transactions, wallet: str):
+    start = time.perf_counter()
+    decoded = sum(1 for tx in transactions if decode_swap(tx, wallet) is not None)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} {len(transactions)} 笔, 解码 {decoded} 笔, "
+          f"{elapsed * 1000:.1f}ms, {len(transactions) / elapsed:,.0f} 笔/秒")
+
+if __name__ == "__main__":
+    random.seed(42)
+    wallet = random_address()
+    programs = list(DEX_PROGRAMS)
+    swaps = [make_transaction(wallet, random.choice(programs), i % 2 == 0) for i in range(TX_COUNT)]
+    transfers = [make_transfer(wallet) for _ in range(TX_COUNT)]
+
+    print("=" * 80)
+    print(" swap解码器微基准测试")
+    print("=" * 80)
+    run("swap交易", swaps, wallet)
+    run("非swap交易", transfers, wallet)
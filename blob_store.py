@@ -0,0 +1,231 @@
+"""
+原始交易数据存储 - 按签名保存压缩后的交易JSON，与主数据库分离
+
+优先使用zstd(可选共享字典)，未安装zstandard时使用zlib。写入先进入缓冲区，
+批量提交；读取时才解压，供详情展示和重新解析使用
+
+迁移已有数据库中的transactions.raw_data:
+    python blob_store.py migrate [主数据库路径]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+
+try:
+    import zstandard
+except ImportError:  # 未安装zstandard时只使用zlib
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+
+# 默认存储文件
+DEFAULT_BLOB_DB = os.path.join("app/data", "raw_blobs.db")
+
+# 主数据库默认路径(对应DATABASE_URL=sqlite:///./smart_wallets.db)
+DEFAULT_MAIN_DB = "smart_wallets.db"
+
+# 压缩编码
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+CODEC_ZSTD_DICT = 2
+
+def _dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class BlobStore:
+    """按交易签名存取压缩后的原始交易数据"""
+
+    def __init__(self, path: str = DEFAULT_BLOB_DB, batch_size: int = 200, level: int = 3):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.level = level
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "signature TEXT PRIMARY KEY, codec INTEGER NOT NULL, dict_id INTEGER, data BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dictionaries (id INTEGER PRIMARY KEY, data BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._pending: Dict[str, Tuple[int, Optional[int], bytes]] = {}
+        self._dictionaries: Dict[int, Any] = {}
+        self._dict_id: Optional[int] = None
+        self._load_latest_dictionary()
+
+    def _load_latest_dictionary(self):
+        """加载最新的共享压缩字典"""
+        if zstandard is None:
+            return
+        row = self._conn.execute("SELECT id, data FROM dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+        if row:
+            self._dict_id = row[0]
+            self._dictionaries[row[0]] = zstandard.ZstdCompressionDict(row[1])
+
+    def _get_dictionary(self, dict_id: int):
+        dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            row = self._conn.execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"压缩字典 {dict_id} 不存在")
+            dictionary = self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(row[0])
+        return dictionary
+
+    def _compress(self, raw: bytes) -> Tuple[int, Optional[int], bytes]:
+        if zstandard is None:
+            return CODEC_ZLIB, None, zlib.compress(raw, 6)
+        if self._dict_id is not None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._dictionaries[self._dict_id])
+            return CODEC_ZSTD_DICT, self._dict_id, compressor.compress(raw)
+        return CODEC_ZSTD, None, zstandard.ZstdCompressor(level=self.level).compress(raw)
+
+    def _decompress(self, codec: int, dict_id: Optional[int], data: bytes) -> bytes:
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError("读取zstd压缩数据需要安装zstandard")
+        if codec == CODEC_ZSTD_DICT:
+            return zstandard.ZstdDecompressor(dict_data=self._get_dictionary(dict_id)).decompress(data)
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def put(self, signature: str, payload: Any):
+        """写入一条原始交易数据(先进入缓冲区)"""
+        if isinstance(payload, str):
+            raw = payload.encode("utf-8")
+        else:
+            raw = _dumps(payload)
+        self._pending[signature] = self._compress(raw)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]):
+        """批量写入原始交易数据"""
+        for signature, payload in items:
+            self.put(signature, payload)
+
+    def flush(self):
+        """提交缓冲区中的数据"""
+        if not self._pending:
+            return
+        with metrics.DB_COMMIT_LATENCY.labels("blob_store").time():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blobs (signature, codec, dict_id, data) VALUES (?, ?, ?, ?)",
+                [(signature, codec, dict_id, data) for signature, (codec, dict_id, data) in self._pending.items()]
+            )
+            self._conn.commit()
+        self._pending.clear()
+
+    def get_raw(self, signature: str) -> Optional[bytes]:
+        """读取解压后的原始JSON字节"""
+        entry = self._pending.get(signature)
+        if entry is None:
+            row = self._conn.execute(
+                "SELECT codec, dict_id, data FROM blobs WHERE signature = ?", (signature,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = row
+        return self._decompress(*entry)
+
+    def get(self, signature: str) -> Optional[Any]:
+        """读取并解析原始交易数据"""
+        raw = self.get_raw(signature)
+        return _loads(raw) if raw is not None else None
+
+    def __contains__(self, signature: str) -> bool:
+        if signature in self._pending:
+            return True
+        return self._conn.execute("SELECT 1 FROM blobs WHERE signature = ?", (signature,)).fetchone() is not None
+
+    def train_dictionary(self, sample_count: int = 2000, dict_size: int = 64 * 1024) -> Optional[int]:
+        """用已有数据训练共享压缩字典，之后的写入使用新字典
+
+        Returns:
+            新字典ID，未安装zstandard或样本不足时返回None
+        """
+        if zstandard is None:
+            return None
+        self.flush()
+        rows = self._conn.execute(
+            "SELECT codec, dict_id, data FROM blobs ORDER BY RANDOM() LIMIT ?", (sample_count,)
+        ).fetchall()
+        samples = [self._decompress(*row) for row in rows]
+        if len(samples) < 100:
+            return None
+
+        dictionary = zstandard.train_dictionary(dict_size, samples)
+        cursor = self._conn.execute("INSERT INTO dictionaries (data) VALUES (?)", (dictionary.as_bytes(),))
+        self._conn.commit()
+        self._dict_id = cursor.lastrowid
+        self._dictionaries[self._dict_id] = dictionary
+        return self._dict_id
+
+    def close(self):
+        """提交剩余数据并关闭"""
+        self.flush()
+        self._conn.close()
+
+def migrate_raw_data(main_db: str = DEFAULT_MAIN_DB, store: Optional[BlobStore] = None,
+                     batch_size: int = 1000) -> int:
+    """将主数据库transactions.raw_data中的数据迁移到BlobStore，并清空原列
+
+    Returns:
+        迁移的记录数
+    """
+    store = store or BlobStore()
+    conn = sqlite3.connect(main_db)
+    migrated = 0
+    try:
+        while True:
+            rows: List[Tuple[int, str, str]] = conn.execute(
+                "SELECT id, signature, raw_data FROM transactions WHERE raw_data IS NOT NULL LIMIT ?",
+                (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+
+            store.put_many((signature, raw_data) for _, signature, raw_data in rows)
+            store.flush()
+            conn.executemany("UPDATE transactions SET raw_data = NULL WHERE id = ?", [(row[0],) for row in rows])
+            conn.commit()
+            migrated += len(rows)
+
+        # 回收主数据库中释放的空间
+        if migrated:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return migrated
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("用法: python blob_store.py migrate [主数据库路径]")
+        sys.exit(1)
+
+    db_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MAIN_DB
+    blob_store = BlobStore()
+    count = migrate_raw_data(db_path, blob_store)
+    if count and blob_store.train_dictionary():
+        print("已训练共享压缩字典")
+    blob_store.close()
+    print(f"已迁移 {count} 条原始交易数据到 {blob_store.path}")
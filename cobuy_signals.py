@@ -0,0 +1,206 @@
+"""
+聪明钱包共同买入信号 - 对聪明钱包的买入流按代币维护滑动时间窗口
+
+同一代币在COBUY_WINDOW_MINUTES分钟内被至少COBUY_MIN_WALLETS个不同的聪明钱包买入时发出信号；
+窗口内的买入按该代币最近一笔买入的交易时间淘汰(钱包分析有先后，不同钱包的买入不按时间到达)，
+长时间没有更新的代币整体移除，内存占用有上限。信号保存在SQLite中供API查询
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+
+# 默认存储文件
+DEFAULT_SIGNAL_DB = os.path.join("app/data", "signals.db")
+
+# 时间窗口(分钟)和触发信号所需的不同钱包数
+COBUY_WINDOW_MINUTES = float(os.getenv("COBUY_WINDOW_MINUTES", "10"))
+COBUY_MIN_WALLETS = int(os.getenv("COBUY_MIN_WALLETS", "3"))
+# 同一代币两次信号的最小间隔(分钟)，默认等于窗口长度
+COBUY_COOLDOWN_MINUTES = float(os.getenv("COBUY_COOLDOWN_MINUTES", str(COBUY_WINDOW_MINUTES)))
+# 代币窗口多久(分钟)没有新买入后移除，需要覆盖钱包重新扫描的间隔，迟到的买入才能与之前的买入匹配
+COBUY_RETENTION_MINUTES = float(os.getenv("COBUY_RETENTION_MINUTES", "60"))
+# 最多同时跟踪的代币数
+COBUY_MAX_TOKENS = int(os.getenv("COBUY_MAX_TOKENS", "50000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cobuy_signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mint TEXT NOT NULL,
+    wallet_count INTEGER NOT NULL,
+    wallets TEXT NOT NULL,
+    window_seconds INTEGER NOT NULL,
+    first_buy INTEGER NOT NULL,
+    last_buy INTEGER NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cobuy_signals_created ON cobuy_signals (created_at);
+CREATE INDEX IF NOT EXISTS idx_cobuy_signals_mint ON cobuy_signals (mint, created_at);
+"""
+
+class _TokenWindow:
+    """单个代币的滑动窗口：按时间排序的买入记录和窗口内各钱包的买入次数"""
+
+    __slots__ = ("times", "wallets", "counts", "last_signal", "touched")
+
+    def __init__(self):
+        self.times: List[int] = []
+        self.wallets: List[str] = []
+        self.counts: Dict[str, int] = {}
+        self.last_signal: Optional[int] = None
+        self.touched = 0.0  # 最近一次收到买入的时间(本机时间)
+
+    def add(self, wallet: str, timestamp: int):
+        # 大多数买入按时间到达，直接追加；乱序时插入到对应位置
+        if not self.times or timestamp >= self.times[-1]:
+            self.times.append(timestamp)
+            self.wallets.append(wallet)
+        else:
+            i = bisect.bisect_right(self.times, timestamp)
+            self.times.insert(i, timestamp)
+            self.wallets.insert(i, wallet)
+        self.counts[wallet] = self.counts.get(wallet, 0) + 1
+
+    def expire(self, cutoff: int):
+        """移除早于cutoff的买入"""
+        i = bisect.bisect_left(self.times, cutoff)
+        if not i:
+            return
+        for wallet in self.wallets[:i]:
+            count = self.counts[wallet] - 1
+            if count:
+                self.counts[wallet] = count
+            else:
+                del self.counts[wallet]
+        del self.times[:i]
+        del self.wallets[:i]
+
+class CoBuyDetector:
+    """流式共同买入检测器"""
+
+    def __init__(self, window_seconds: int = int(COBUY_WINDOW_MINUTES * 60), min_wallets: int = COBUY_MIN_WALLETS,
+                 cooldown_seconds: int = int(COBUY_COOLDOWN_MINUTES * 60), max_tokens: int = COBUY_MAX_TOKENS,
+                 retention_seconds: int = int(COBUY_RETENTION_MINUTES * 60)):
+        self.window_seconds = window_seconds
+        self.min_wallets = min_wallets
+        self.cooldown_seconds = cooldown_seconds
+        self.max_tokens = max_tokens
+        self.retention_seconds = retention_seconds
+        # mint -> 窗口，按最近收到买入的时间排序(最久未更新的在前)，便于整体淘汰
+        self._windows: "OrderedDict[str, _TokenWindow]" = OrderedDict()
+
+    @property
+    def tracked_tokens(self) -> int:
+        return len(self._windows)
+
+    def observe(self, wallet: str, mint: str, timestamp: int, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """处理一笔聪明钱包买入，满足条件时返回信号"""
+        if not mint or not timestamp:
+            return None
+        now = time.time() if now is None else now
+
+        window = self._windows.get(mint)
+        if window is not None and timestamp < window.times[-1] - self.window_seconds:
+            return None  # 早于该代币的窗口
+        if window is None:
+            window = self._windows[mint] = _TokenWindow()
+        self._windows.move_to_end(mint)
+        window.touched = now
+        window.add(wallet, timestamp)
+        window.expire(window.times[-1] - self.window_seconds)
+        self._evict(now)
+
+        if len(window.counts) < self.min_wallets:
+            return None
+        if window.last_signal is not None and window.times[-1] - window.last_signal < self.cooldown_seconds:
+            return None
+
+        window.last_signal = window.times[-1]
+        return {
+            "mint": mint,
+            "wallet_count": len(window.counts),
+            "wallets": sorted(window.counts),
+            "window_seconds": self.window_seconds,
+            "first_buy": window.times[0],
+            "last_buy": window.times[-1]
+        }
+
+    def observe_swaps(self, wallet: str, swaps: List[Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """处理聪明钱包的swap列表(swap_decoder.DecodedSwap)，只统计买入"""
+        signals = []
+        for swap in swaps:
+            if swap.side != "buy":
+                continue
+            signal = self.observe(wallet, swap.token_mint, swap.block_time, now)
+            if signal is not None:
+                signals.append(signal)
+        return signals
+
+    def _evict(self, now: float):
+        """移除长时间没有收到买入的代币，并限制跟踪的代币总数"""
+        cutoff = now - self.retention_seconds
+        while self._windows:
+            mint, window = next(iter(self._windows.items()))
+            if window.touched >= cutoff and len(self._windows) <= self.max_tokens:
+                break
+            del self._windows[mint]
+
+class SignalStore:
+    """共同买入信号存储"""
+
+    def __init__(self, path: str = DEFAULT_SIGNAL_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def save(self, signals: List[Dict[str, Any]], created_at: Optional[int] = None) -> List[Dict[str, Any]]:
+        """保存信号，返回带id和created_at的信号"""
+        if not signals:
+            return []
+        created_at = int(time.time()) if created_at is None else created_at
+        saved = []
+        with metrics.DB_COMMIT_LATENCY.labels("signals").time():
+            for signal in signals:
+                cursor = self._conn.execute(
+                    "INSERT INTO cobuy_signals (mint, wallet_count, wallets, window_seconds, first_buy, last_buy, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (signal["mint"], signal["wallet_count"], json.dumps(signal["wallets"]), signal["window_seconds"],
+                     signal["first_buy"], signal["last_buy"], created_at)
+                )
+                saved.append({"id": cursor.lastrowid, **signal, "created_at": created_at})
+            self._conn.commit()
+        return saved
+
+    def recent(self, limit: int = 100, since: Optional[int] = None, mint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按时间倒序查询信号"""
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if mint:
+            conditions.append("mint = ?")
+            params.append(mint)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows: List[Tuple] = self._conn.execute(
+            "SELECT id, mint, wallet_count, wallets, window_seconds, first_buy, last_buy, created_at "
+            f"FROM cobuy_signals {where}ORDER BY id DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+        return [{
+            "id": row[0], "mint": row[1], "wallet_count": row[2], "wallets": json.loads(row[3]),
+            "window_seconds": row[4], "first_buy": row[5], "last_buy": row[6], "created_at": row[7]
+        } for row in rows]
+
+    def close(self):
+        self._conn.close()
@@ -1,7 +1,9 @@
-import requests
+import asyncio
 import json
 import time
 
+from http_transport import HttpTransport
+
 # 测试不同的RPC节点
 rpc_endpoints = [
     {
@@ -21,7 +23,7 @@ rpc_endpoints = [
     }
 ]
 
-def test_rpc_connection(endpoint):
+async def test_rpc_connection(session, endpoint):
     """测试RPC连接是否正常"""
     headers = {"Content-Type": "application/json"}
     if endpoint["api_key"]:
@@ -37,24 +39,24 @@ def test_rpc_connection(endpoint):
     
     try:
         start_time = time.time()
-        response = requests.post(endpoint["url"], headers=headers, json=payload, timeout=10)
-        elapsed = time.time() - start_time
-        
-        print(f"状态码: {response.status_code}")
-        print(f"响应时间: {elapsed:.2f}秒")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
-            return True
-        else:
-            print(f"响应内容: {response.text}")
-            return False
+        async with session.post(endpoint["url"], headers=headers, json=payload, timeout=10) as response:
+            elapsed = time.time() - start_time
+            
+            print(f"状态码: {response.status}")
+            print(f"响应时间: {elapsed:.2f}秒")
+            
+            if response.status == 200:
+                result = await response.json(content_type=None)
+                print(f"响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
+                return True
+            else:
+                print(f"响应内容: {await response.text()}")
+                return False
     except Exception as e:
         print(f"错误: {str(e)}")
         return False
 
-def test_get_account(endpoint, address="vines1vzrYbzLMRdu58ou5XTby4qAqVRLmqo36NKPTg"):
+async def test_get_account(session, endpoint, address="vines1vzrYbzLMRdu58ou5XTby4qAqVRLmqo36NKPTg"):
     """测试获取帐户信息"""
     headers = {"Content-Type": "application/json"}
     if endpoint["api_key"]:
@@ -73,55 +75,66 @@ def test_get_account(endpoint, address="vines1vzrYbzLMRdu58ou5XTby4qAqVRLmqo36NK
     print(f"\n测试获取帐户信息: {address}")
     
     try:
-        response = requests.post(endpoint["url"], headers=headers, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if "result" in result and result["result"] is not None:
-                print("✅ 成功获取帐户信息")
-                return True
+        async with session.post(endpoint["url"], headers=headers, json=payload, timeout=10) as response:
+            if response.status == 200:
+                result = await response.json(content_type=None)
+                if "result" in result and result["result"] is not None:
+                    print("✅ 成功获取帐户信息")
+                    return True
+                else:
+                    print(f"❌ 未能获取帐户信息: {json.dumps(result, ensure_ascii=False)}")
+                    return False
             else:
-                print(f"❌ 未能获取帐户信息: {json.dumps(result, ensure_ascii=False)}")
+                print(f"❌ 请求失败: {await response.text()}")
                 return False
-        else:
-            print(f"❌ 请求失败: {response.text}")
-            return False
     except Exception as e:
         print(f"❌ 错误: {str(e)}")
         return False
 
-# 开始测试
-print("====== Solana RPC节点连接测试 ======")
+async def run_tests(session):
+    """测试所有节点并给出建议"""
+    print("====== Solana RPC节点连接测试 ======")
 
-working_endpoints = []
+    working_endpoints = []
 
-for endpoint in rpc_endpoints:
-    if test_rpc_connection(endpoint):
-        print("✅ 连接测试成功")
-        working_endpoints.append(endpoint)
-    else:
-        print("❌ 连接测试失败")
+    for endpoint in rpc_endpoints:
+        if await test_rpc_connection(session, endpoint):
+            print("✅ 连接测试成功")
+            working_endpoints.append(endpoint)
+        else:
+            print("❌ 连接测试失败")
 
-# 测试获取帐户信息
-if working_endpoints:
-    print("\n\n====== 对连接成功的节点进行进一步测试 ======")
-    best_endpoint = None
+    # 测试获取帐户信息
+    if working_endpoints:
+        print("\n\n====== 对连接成功的节点进行进一步测试 ======")
+        best_endpoint = None
     
-    for endpoint in working_endpoints:
-        if test_get_account(endpoint):
-            best_endpoint = endpoint
-            break
+        for endpoint in working_endpoints:
+            if await test_get_account(session, endpoint):
+                best_endpoint = endpoint
+                break
     
-    if best_endpoint:
-        print(f"\n\n推荐使用的节点: {best_endpoint['name']} ({best_endpoint['url']})")
-        print("请将此URL复制到app/core/config.py文件中的SOLANA_RPC_URL配置项")
+        if best_endpoint:
+            print(f"\n\n推荐使用的节点: {best_endpoint['name']} ({best_endpoint['url']})")
+            print("请将此URL复制到app/core/config.py文件中的SOLANA_RPC_URL配置项")
+        else:
+            print("\n\n❌ 所有节点都无法获取帐户信息，建议:")
+            print("1. 检查网络连接")
+            print("2. 尝试使用代理")
+            print("3. 申请付费RPC节点服务")
     else:
-        print("\n\n❌ 所有节点都无法获取帐户信息，建议:")
+        print("\n\n❌ 所有节点连接失败，建议:")
         print("1. 检查网络连接")
         print("2. 尝试使用代理")
         print("3. 申请付费RPC节点服务")
-else:
-    print("\n\n❌ 所有节点连接失败，建议:")
-    print("1. 检查网络连接")
-    print("2. 尝试使用代理")
-    print("3. 申请付费RPC节点服务") 
\ No newline at end of file
+
+async def main():
+    """依次测试各节点，所有请求共用一个连接池"""
+    session = HttpTransport()
+    try:
+        await run_tests(session)
+    finally:
+        await session.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""
+进程内事件总线 - 发布新合格的聪明钱包、跟踪钱包的新交易、共同买入信号和指标更新，并以SSE推送给客户端
+
+每个订阅者有独立的有界缓冲区(满时丢弃最旧的事件，不阻塞发布方)，可按主题和钱包地址过滤；
+总线保留最近的事件，客户端断线重连时可按Last-Event-ID补发
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Set
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+
+# 事件主题
+TOPIC_WALLET_QUALIFIED = "wallet_qualified"
+TOPIC_TRADE = "trade"
+TOPIC_METRICS = "metrics"
+TOPIC_SIGNAL = "cobuy_signal"
+
+# 每个订阅者的缓冲事件数
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+# 总线保留的最近事件数(用于断线重连补发)
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1024"))
+# SSE心跳间隔(秒)，保持连接不被代理断开
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+def _dumps(data: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+class Event:
+    """一条事件"""
+
+    __slots__ = ("id", "topic", "wallet", "data")
+
+    def __init__(self, event_id: int, topic: str, data: Any, wallet: Optional[str] = None):
+        self.id = event_id
+        self.topic = topic
+        self.wallet = wallet
+        self.data = data
+
+    def to_sse(self) -> bytes:
+        """编码为SSE消息"""
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {_dumps(self.data)}\n\n".encode("utf-8")
+
+class Subscription:
+    """一个订阅者：有界缓冲区和过滤条件"""
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, wallets: Optional[Iterable[str]] = None,
+                 max_buffer: int = EVENT_BUFFER_SIZE):
+        self.topics: Optional[Set[str]] = set(topics) if topics else None
+        self.wallets: Optional[Set[str]] = set(wallets) if wallets else None
+        self.buffer: Deque[Event] = deque(maxlen=max_buffer)
+        # 缓冲区满时丢弃的事件数
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def matches(self, event: Event) -> bool:
+        if self.topics is not None and event.topic not in self.topics:
+            return False
+        # 钱包过滤只作用于带钱包地址的事件，指标等全局事件照常推送
+        if self.wallets is not None and event.wallet is not None and event.wallet not in self.wallets:
+            return False
+        return True
+
+    def push(self, event: Event):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+            metrics.EVENTS_DROPPED.inc()
+        self.buffer.append(event)
+        self._ready.set()
+
+    async def get_batch(self, timeout: Optional[float] = None) -> List[Event]:
+        """等待并取出缓冲区中的全部事件，超时返回空列表"""
+        if not self.buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self.buffer)
+        self.buffer.clear()
+        return events
+
+class EventBus:
+    """发布/订阅事件总线(在事件循环线程内使用)"""
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE):
+        self._subscribers: List[Subscription] = []
+        self._history: Deque[Event] = deque(maxlen=history_size)
+        self._next_id = 1
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, topic: str, data: Any, wallet: Optional[str] = None) -> Event:
+        """发布事件(不阻塞，没有订阅者时只记入历史)"""
+        event = Event(self._next_id, topic, data, wallet)
+        self._next_id += 1
+        self._history.append(event)
+        metrics.EVENTS_PUBLISHED.labels(topic).inc()
+        for subscription in self._subscribers:
+            if subscription.matches(event):
+                subscription.push(event)
+        return event
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None, wallets: Optional[Iterable[str]] = None,
+                  last_event_id: Optional[int] = None, max_buffer: int = EVENT_BUFFER_SIZE) -> Subscription:
+        """新增订阅者，提供last_event_id时补发该ID之后仍在历史中的事件"""
+        subscription = Subscription(topics, wallets, max_buffer)
+        if last_event_id is not None:
+            for event in self._history:
+                if event.id > last_event_id and subscription.matches(event):
+                    subscription.push(event)
+        self._subscribers.append(subscription)
+        metrics.EVENT_SUBSCRIBERS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+        metrics.EVENT_SUBSCRIBERS.set(len(self._subscribers))
+
+    async def sse_stream(self, subscription: Subscription,
+                         heartbeat: float = SSE_HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+        """生成SSE数据块，客户端断开(生成器关闭)时自动取消订阅"""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                events = await subscription.get_batch(timeout=heartbeat)
+                if not events:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"".join(event.to_sse() for event in events)
+        finally:
+            self.unsubscribe(subscription)
+
+def subscribe_from_request(bus: "EventBus", query: Dict[str, str], headers: Dict[str, str]) -> Subscription:
+    """按请求参数订阅: topics/wallets为逗号分隔的过滤条件，Last-Event-ID请求头(或last_event_id参数)用于补发"""
+    return bus.subscribe(
+        topics=parse_filter(query.get("topics")),
+        wallets=parse_filter(query.get("wallets")),
+        last_event_id=parse_last_event_id(headers.get("last-event-id") or query.get("last_event_id"))
+    )
+
+def sse_route(query: Dict[str, str], headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """metrics.register_stream_route使用的SSE路由"""
+    bus = get_event_bus()
+    return bus.sse_stream(subscribe_from_request(bus, query, headers))
+
+def parse_filter(value: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的过滤参数"""
+    if not value:
+        return None
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return items or None
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+# 全局事件总线
+_event_bus: Optional[EventBus] = None
+
+def get_event_bus() -> EventBus:
+    """获取事件总线单例"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
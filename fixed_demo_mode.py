@@ -6,15 +6,54 @@ import os
 import random
 import datetime
 import json
-from typing import List, Dict, Any, Optional
+import hashlib
+from collections import OrderedDict
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from urllib.parse import urlencode
+import time
+import numpy as np
 import uvicorn
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+import metrics
+from screening import get_profiles, profile_from_settings, screen_columns
+from event_bus import TOPIC_METRICS, TOPIC_WALLET_QUALIFIED, get_event_bus, subscribe_from_request
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+
+def dumps_json(content: Any) -> bytes:
+    """快速JSON编码，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """使用快速JSON编码器的响应类"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
 # 创建FastAPI应用
-app = FastAPI(title="Solana聪明钱包筛选器 (演示模式)")
+app = FastAPI(title="Solana聪明钱包筛选器 (演示模式)", default_response_class=FastJSONResponse)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """记录HTTP请求次数和耗时"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    # 使用路由模板作为标签，避免地址等路径参数导致标签爆炸
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    metrics.HTTP_LATENCY.labels(request.method, route_path).observe(time.perf_counter() - start)
+    metrics.HTTP_REQUESTS.labels(request.method, route_path, response.status_code).inc()
+    return response
 
 # 挂载静态文件
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -32,164 +71,522 @@ class Settings:
     
     # 数据存储配置
     DATA_DIR: str = "app/data"        # 数据存储目录
+    
+    # 模拟数据规模配置
+    MOCK_WALLET_COUNT: int = int(os.getenv("MOCK_WALLET_COUNT", "50"))  # 模拟钱包数量
+    MOCK_SEED: int = int(os.getenv("MOCK_SEED", "42"))                  # 随机种子
 
 settings = Settings()
 
+# 支持排序的钱包字段(降序)
+SORTABLE_WALLET_FIELDS = ("win_rate", "profit_loss_ratio", "daily_trades", "total_profit", "balance")
+
+# 模拟数据列定义(列式存储，每列一个.npy文件)
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+TX_TYPES = ["buy", "sell", "swap", "transfer"]
+TOKEN_SYMBOLS = ["SOL", "USDC", "BONK", "JTO", "RAY", "SRM", "FIDA", "MNGO"]
+WALLET_COLUMNS = (
+    "address", "address_order", "balance", "total_trades", "winning_trades", "win_rate",
+    "total_profit", "total_loss", "profit_loss_ratio", "avg_profit_per_trade", "daily_trades",
+    "avg_holding_time", "first_seen", "last_active", "last_updated", "is_smart_wallet", "tx_offsets"
+)
+TX_COLUMNS = (
+    "wallet_idx", "signature", "tx_type", "token", "amount", "value_in_sol",
+    "profit_loss", "is_profitable", "timestamp"
+)
+MOCK_DATA_VERSION = 1
+# Solana地址(base58编码的32字节公钥)的最短长度
+MIN_ADDRESS_LENGTH = 32
+# 可通过update_wallet写入的钱包列(地址、排序和交易偏移由数据生成时确定)
+WRITABLE_WALLET_COLUMNS = tuple(name for name in WALLET_COLUMNS if name not in ("address", "address_order", "tx_offsets"))
+
+def _random_strings(rng: np.random.Generator, count: int, length: int, alphabet: str,
+                    chunk_size: int = 1 << 20) -> np.ndarray:
+    """分块批量生成定长随机字符串(字节串数组)，控制峰值内存"""
+    chars = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+    result = np.empty(count, dtype=f"S{length}")
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count)
+        picked = chars[rng.integers(0, len(chars), size=(end - start, length), dtype=np.uint8)]
+        result[start:end] = picked.view(f"S{length}").ravel()
+    return result
+
+def generate_mock_columns(wallet_count: int, seed: int) -> Dict[str, Dict[str, np.ndarray]]:
+    """向量化生成模拟钱包和交易数据，相同种子生成相同数据"""
+    rng = np.random.default_rng(seed)
+    now = int(datetime.datetime.now().timestamp())
+    day = 86400
+    
+    # 钱包统计数据: 胜率偏向中等，盈亏比/日均交易呈长尾分布
+    win_rate = 30 + 65 * rng.beta(5, 3, wallet_count)
+    profit_loss_ratio = np.clip(rng.lognormal(0.9, 0.6, wallet_count), 0.5, 8.0)
+    daily_trades = np.clip(rng.lognormal(3.0, 0.5, wallet_count), 5, 50)
+    avg_holding_time = np.clip(rng.gamma(2.0, 8.0, wallet_count), 2, 48)
+    total_trades = rng.integers(50, 501, wallet_count)
+    
+    # 根据筛选条件设置是否为聪明钱包
+    is_smart_wallet = screen_columns({
+        "win_rate": win_rate,
+        "profit_loss_ratio": profit_loss_ratio,
+        "daily_trades": daily_trades,
+        "avg_holding_time": avg_holding_time
+    }, profile_from_settings(settings))
+    
+    address = _random_strings(rng, wallet_count, 44, BASE58_ALPHABET)
+    
+    # 每个钱包10-50笔交易，交易按钱包连续存放，tx_offsets[i]:tx_offsets[i+1]即钱包i的交易区间
+    tx_counts = rng.integers(10, 51, wallet_count)
+    tx_offsets = np.zeros(wallet_count + 1, dtype=np.int64)
+    np.cumsum(tx_counts, out=tx_offsets[1:])
+    tx_count = int(tx_offsets[-1])
+    
+    is_profitable = rng.random(tx_count) > 0.3  # 70%概率盈利
+    profit_loss = np.where(
+        is_profitable,
+        rng.uniform(0.01, 2, tx_count),
+        rng.uniform(-1, -0.01, tx_count)
+    )
+    
+    wallets = {
+        "address": address,
+        "address_order": np.argsort(address, kind="stable"),
+        "balance": np.round(rng.uniform(0.1, 100, wallet_count), 4),
+        "total_trades": total_trades,
+        "winning_trades": (win_rate / 100 * total_trades).astype(np.int64),
+        "win_rate": win_rate,
+        "total_profit": np.round(rng.uniform(1, 50, wallet_count), 4),
+        "total_loss": np.round(rng.uniform(0.1, 10, wallet_count), 4),
+        "profit_loss_ratio": profit_loss_ratio,
+        "avg_profit_per_trade": np.round(rng.uniform(0.01, 0.5, wallet_count), 4),
+        "daily_trades": daily_trades,
+        "avg_holding_time": avg_holding_time,
+        "first_seen": now - rng.integers(30, 181, wallet_count) * day,
+        "last_active": now - rng.integers(0, 11, wallet_count) * day,
+        "last_updated": np.full(wallet_count, now, dtype=np.int64),
+        "is_smart_wallet": is_smart_wallet,
+        "tx_offsets": tx_offsets
+    }
+    transactions = {
+        "wallet_idx": np.repeat(np.arange(wallet_count, dtype=np.int32), tx_counts),
+        # 签名以32字节原始值保存，输出时再转为十六进制
+        "signature": rng.integers(0, 256, size=(tx_count, 32), dtype=np.uint8),
+        "tx_type": rng.integers(0, len(TX_TYPES), tx_count).astype(np.int8),
+        "token": rng.integers(0, len(TOKEN_SYMBOLS), tx_count).astype(np.int8),
+        "amount": np.round(rng.uniform(1, 1000, tx_count), 2),
+        "value_in_sol": np.round(rng.uniform(0.1, 10, tx_count), 4),
+        "profit_loss": np.round(profit_loss, 4),
+        "is_profitable": is_profitable,
+        "timestamp": now - rng.integers(1, 31, tx_count) * day
+    }
+    return {"wallets": wallets, "transactions": transactions}
+
 class MockDataService:
-    """模拟数据服务 - 生成假数据用于测试和演示"""
+    """模拟数据服务 - 生成假数据用于测试和演示
     
-    def __init__(self):
-        self.wallets = []
-        self.transactions = []
+    数据以列式.npy文件保存在DATA_DIR/mock下，启动时以内存映射方式惰性加载，
+    只有被请求的行才会转换为字典
+    """
+    
+    def __init__(self, wallet_count: Optional[int] = None, seed: Optional[int] = None):
+        self.wallet_count = wallet_count or settings.MOCK_WALLET_COUNT
+        self.seed = settings.MOCK_SEED if seed is None else seed
+        self.data_dir = os.path.join(settings.DATA_DIR, "mock")
+        self.wallets: Dict[str, np.ndarray] = {}
+        self.transactions: Dict[str, np.ndarray] = {}
+        # 数据变更时间，用于HTTP Last-Modified
+        self.last_modified = datetime.datetime.now(datetime.timezone.utc)
+        self._wallet_modified: Dict[str, datetime.datetime] = {}
+        # 数据变更监听器，参数为发生变更的钱包地址(None表示全部)
+        self._change_listeners: List[Callable[[Optional[str]], None]] = []
+        # 索引: 聪明钱包行号子集及排序视图(行号数组)
+        self._smart_rows: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._sorted_views: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._stats: Dict[str, Any] = {}
         self._load_or_generate_data()
+        self._build_indexes()
     
     def _load_or_generate_data(self):
         """加载或生成模拟数据"""
-        mock_data_file = os.path.join(settings.DATA_DIR, "mock_data.json")
+        meta_file = os.path.join(self.data_dir, "meta.json")
         
-        if os.path.exists(mock_data_file):
+        if os.path.exists(meta_file):
             try:
-                with open(mock_data_file, "r") as f:
-                    data = json.load(f)
-                    self.wallets = data.get("wallets", [])
-                    self.transactions = data.get("transactions", [])
-                return
+                with open(meta_file, "r") as f:
+                    meta = json.load(f)
+                if (meta.get("version") == MOCK_DATA_VERSION and
+                        meta.get("wallet_count") == self.wallet_count and
+                        meta.get("seed") == self.seed):
+                    self.wallets = self._load_columns("wallets", WALLET_COLUMNS)
+                    self.transactions = self._load_columns("transactions", TX_COLUMNS)
+                    return
             except Exception:
                 pass
         
-        # 生成模拟钱包数据
-        self._generate_mock_wallets(50)
-        self._generate_mock_transactions()
+        # 生成模拟数据
+        data = generate_mock_columns(self.wallet_count, self.seed)
+        self.wallets = data["wallets"]
+        self.transactions = data["transactions"]
         
         # 保存模拟数据到文件
-        os.makedirs(os.path.dirname(mock_data_file), exist_ok=True)
         try:
-            with open(mock_data_file, "w") as f:
+            for group, columns in data.items():
+                group_dir = os.path.join(self.data_dir, group)
+                os.makedirs(group_dir, exist_ok=True)
+                for name, column in columns.items():
+                    np.save(os.path.join(group_dir, f"{name}.npy"), column)
+            with open(meta_file, "w") as f:
                 json.dump({
-                    "wallets": self.wallets,
-                    "transactions": self.transactions
-                }, f, indent=2)
+                    "version": MOCK_DATA_VERSION,
+                    "wallet_count": self.wallet_count,
+                    "seed": self.seed,
+                    "transaction_count": len(self.transactions["wallet_idx"])
+                }, f)
         except Exception:
             pass
     
-    def _generate_mock_wallets(self, count: int):
-        """生成模拟钱包数据"""
-        for i in range(count):
-            # 生成Solana风格的随机地址
-            address = ''.join(random.choices('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz', k=44))
-            
-            # 模拟钱包统计数据
-            win_rate = random.uniform(30, 95)
-            profit_loss_ratio = random.uniform(0.5, 8.0)
-            daily_trades = random.uniform(5, 50)
-            avg_holding_time = random.uniform(2, 48)
-            
-            # 根据筛选条件设置是否为聪明钱包
-            is_smart_wallet = (
-                win_rate >= settings.WIN_RATE_THRESHOLD and
-                profit_loss_ratio >= settings.PROFIT_LOSS_RATIO and
-                daily_trades >= settings.MIN_DAILY_TRADES and
-                avg_holding_time <= settings.MAX_HOLDING_HOURS
-            )
-            
-            wallet = {
-                "address": address,
-                "balance": round(random.uniform(0.1, 100), 4),
-                "total_trades": random.randint(50, 500),
-                "winning_trades": int(win_rate / 100 * random.randint(50, 500)),
-                "win_rate": win_rate,
-                "total_profit": round(random.uniform(1, 50), 4),
-                "total_loss": round(random.uniform(0.1, 10), 4),
-                "profit_loss_ratio": profit_loss_ratio,
-                "avg_profit_per_trade": round(random.uniform(0.01, 0.5), 4),
-                "daily_trades": daily_trades,
-                "avg_holding_time": avg_holding_time,
-                "first_seen": (datetime.datetime.now() - datetime.timedelta(days=random.randint(30, 180))).isoformat(),
-                "last_active": (datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 10))).isoformat(),
-                "last_updated": datetime.datetime.now().isoformat(),
-                "is_smart_wallet": is_smart_wallet
+    def _load_columns(self, group: str, names: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+        """以内存映射方式加载一组列"""
+        group_dir = os.path.join(self.data_dir, group)
+        return {name: np.load(os.path.join(group_dir, f"{name}.npy"), mmap_mode="r") for name in names}
+    
+    def _build_indexes(self):
+        """构建索引，数据加载或整体变更(如重新筛选)后调用"""
+        is_smart = np.asarray(self.wallets["is_smart_wallet"])
+        self._smart_rows = np.flatnonzero(is_smart)
+        
+        # 排序视图按需生成后缓存
+        self._sorted_views = {}
+        self._compute_stats()
+    
+    def _compute_stats(self):
+        """根据聪明钱包行号子集计算统计信息"""
+        smart_count = len(self._smart_rows)
+        
+        def smart_mean(field: str) -> float:
+            return float(np.asarray(self.wallets[field])[self._smart_rows].mean()) if smart_count else 0
+        
+        self._stats = {
+            "total_wallets": len(self.wallets["is_smart_wallet"]),
+            "smart_wallet_count": smart_count,
+            "avg_win_rate": smart_mean("win_rate"),
+            "avg_profit_loss_ratio": smart_mean("profit_loss_ratio"),
+            "avg_daily_trades": smart_mean("daily_trades")
+        }
+    
+    def _get_sorted_view(self, sort_by: str, smart_only: bool) -> np.ndarray:
+        """获取按指定字段降序排列的钱包行号视图"""
+        key = (sort_by, smart_only)
+        view = self._sorted_views.get(key)
+        if view is None:
+            column = np.asarray(self.wallets[sort_by])
+            if smart_only:
+                view = self._smart_rows[np.argsort(-column[self._smart_rows], kind="stable")]
+            else:
+                view = np.argsort(-column, kind="stable")
+            self._sorted_views[key] = view
+        return view
+    
+    def _update_indexes(self, row: int, fields: List[str]):
+        """单个钱包更新后原地调整受影响的索引项，不重新排序"""
+        smart_changed = "is_smart_wallet" in fields
+        if smart_changed:
+            rows = self._smart_rows
+            pos = int(np.searchsorted(rows, row))
+            in_smart = pos < len(rows) and rows[pos] == row
+            if bool(self.wallets["is_smart_wallet"][row]) != in_smart:
+                self._smart_rows = np.delete(rows, pos) if in_smart else np.insert(rows, pos, row)
+        
+        for (sort_by, smart_only), view in list(self._sorted_views.items()):
+            if sort_by in fields or (smart_only and smart_changed):
+                self._sorted_views[(sort_by, smart_only)] = self._reposition(view, row, sort_by, smart_only)
+        self._compute_stats()
+    
+    def _reposition(self, view: np.ndarray, row: int, sort_by: str, smart_only: bool) -> np.ndarray:
+        """将行号从排序视图中移除，并按新值插入到与稳定降序排序相同的位置"""
+        view = view[view != row]
+        if smart_only and not self.wallets["is_smart_wallet"][row]:
+            return view
+        column = np.asarray(self.wallets[sort_by])
+        keys = -column[view]
+        key = -column[row]
+        # 值相同的行按行号升序排列(与argsort(kind="stable")一致)
+        lo = int(np.searchsorted(keys, key, side="left"))
+        hi = int(np.searchsorted(keys, key, side="right"))
+        pos = lo + int(np.searchsorted(view[lo:hi], row))
+        return np.insert(view, pos, row)
+    
+    def _find_wallet_row(self, address: str) -> Optional[int]:
+        """通过排序后的地址数组二分查找钱包行号"""
+        addresses = self.wallets["address"]
+        order = self.wallets["address_order"]
+        # 定长字节列会截断超长输入，长度不符的地址直接视为不存在
+        if not MIN_ADDRESS_LENGTH <= len(address) <= addresses.dtype.itemsize:
+            return None
+        try:
+            key = np.array(address.encode("ascii"), dtype=addresses.dtype)
+        except (UnicodeEncodeError, ValueError):
+            return None
+        
+        pos = int(np.searchsorted(addresses, key, sorter=order))
+        if pos < len(order) and addresses[order[pos]] == key:
+            return int(order[pos])
+        return None
+    
+    def _wallet_row(self, row: int) -> Dict[str, Any]:
+        """将钱包行转换为字典"""
+        w = self.wallets
+        return {
+            "address": w["address"][row].decode("ascii"),
+            "balance": float(w["balance"][row]),
+            "total_trades": int(w["total_trades"][row]),
+            "winning_trades": int(w["winning_trades"][row]),
+            "win_rate": float(w["win_rate"][row]),
+            "total_profit": float(w["total_profit"][row]),
+            "total_loss": float(w["total_loss"][row]),
+            "profit_loss_ratio": float(w["profit_loss_ratio"][row]),
+            "avg_profit_per_trade": float(w["avg_profit_per_trade"][row]),
+            "daily_trades": float(w["daily_trades"][row]),
+            "avg_holding_time": float(w["avg_holding_time"][row]),
+            "first_seen": datetime.datetime.fromtimestamp(int(w["first_seen"][row])).isoformat(),
+            "last_active": datetime.datetime.fromtimestamp(int(w["last_active"][row])).isoformat(),
+            "last_updated": datetime.datetime.fromtimestamp(int(w["last_updated"][row])).isoformat(),
+            "is_smart_wallet": bool(w["is_smart_wallet"][row])
+        }
+    
+    def _transaction_rows(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """将[start, end)区间的交易行转换为字典列表"""
+        t = self.transactions
+        addresses = self.wallets["address"]
+        return [
+            {
+                "wallet_address": addresses[t["wallet_idx"][i]].decode("ascii"),
+                "signature": t["signature"][i].tobytes().hex(),
+                "tx_type": TX_TYPES[t["tx_type"][i]],
+                "token_symbol": TOKEN_SYMBOLS[t["token"][i]],
+                "amount": float(t["amount"][i]),
+                "value_in_sol": float(t["value_in_sol"][i]),
+                "profit_loss": float(t["profit_loss"][i]),
+                "is_profitable": bool(t["is_profitable"][i]),
+                "timestamp": datetime.datetime.fromtimestamp(int(t["timestamp"][i])).isoformat()
             }
-            
-            self.wallets.append(wallet)
-    
-    def _generate_mock_transactions(self):
-        """为每个钱包生成模拟交易数据"""
-        for wallet in self.wallets:
-            # 为每个钱包生成10-50笔交易
-            tx_count = random.randint(10, 50)
-            for i in range(tx_count):
-                # 模拟交易类型
-                tx_type = random.choice(["buy", "sell", "swap", "transfer"])
-                
-                # 模拟代币符号
-                token_symbol = random.choice(["SOL", "USDC", "BONK", "JTO", "RAY", "SRM", "FIDA", "MNGO"])
-                
-                # 模拟交易数量
-                amount = round(random.uniform(1, 1000), 2)
-                
-                # 模拟交易价值
-                value_in_sol = round(random.uniform(0.1, 10), 4)
-                
-                # 模拟盈亏
-                is_profitable = random.random() > 0.3  # 70%概率盈利
-                profit_loss = round(random.uniform(0.01, 2), 4) if is_profitable else round(random.uniform(-1, -0.01), 4)
-                
-                # 模拟交易哈希
-                signature = ''.join(random.choices('0123456789abcdef', k=64))
-                
-                # 模拟交易时间
-                timestamp = (datetime.datetime.now() - datetime.timedelta(days=random.randint(1, 30))).isoformat()
-                
-                transaction = {
-                    "wallet_address": wallet["address"],
-                    "signature": signature,
-                    "tx_type": tx_type,
-                    "token_symbol": token_symbol,
-                    "amount": amount,
-                    "value_in_sol": value_in_sol,
-                    "profit_loss": profit_loss,
-                    "is_profitable": is_profitable,
-                    "timestamp": timestamp
-                }
-                
-                self.transactions.append(transaction)
-    
-    def get_wallets(self, smart_only: bool = False, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """获取钱包列表"""
-        filtered_wallets = [w for w in self.wallets if not smart_only or w["is_smart_wallet"]]
-        return filtered_wallets[offset:offset+limit]
+            for i in range(start, end)
+        ]
+    
+    def get_wallets(self, smart_only: bool = False, limit: int = 100, offset: int = 0,
+                    sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取钱包列表，可按数值字段降序排列"""
+        offset = max(offset, 0)
+        if sort_by in SORTABLE_WALLET_FIELDS:
+            rows = self._get_sorted_view(sort_by, smart_only)[offset:offset+limit]
+        elif smart_only:
+            rows = self._smart_rows[offset:offset+limit]
+        else:
+            rows = range(offset, min(offset + limit, self._stats["total_wallets"]))
+        return [self._wallet_row(int(row)) for row in rows]
     
     def get_wallet_by_address(self, address: str) -> Optional[Dict[str, Any]]:
         """根据地址获取钱包信息"""
-        for wallet in self.wallets:
-            if wallet["address"] == address:
-                return wallet
-        return None
+        row = self._find_wallet_row(address)
+        return self._wallet_row(row) if row is not None else None
     
     def get_transactions(self, wallet_address: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """获取交易列表"""
+        offset = max(offset, 0)
         if wallet_address:
-            filtered_txs = [tx for tx in self.transactions if tx["wallet_address"] == wallet_address]
+            row = self._find_wallet_row(wallet_address)
+            if row is None:
+                return []
+            start, end = (int(x) for x in self.wallets["tx_offsets"][row:row + 2])
         else:
-            filtered_txs = self.transactions
+            start, end = 0, len(self.transactions["wallet_idx"])
         
-        return filtered_txs[offset:offset+limit]
+        return self._transaction_rows(start + offset, min(start + offset + limit, end))
+    
+    def add_change_listener(self, listener: Callable[[Optional[str]], None]):
+        """注册数据变更监听器"""
+        self._change_listeners.append(listener)
+    
+    def get_last_modified(self, address: Optional[str] = None) -> datetime.datetime:
+        """获取数据(或指定钱包)的最后修改时间"""
+        if address:
+            return self._wallet_modified.get(address, self.last_modified)
+        return self.last_modified
+    
+    def update_wallet(self, address: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """更新钱包数据(扫描器写入入口)，并通知监听器
+        
+        不可写的字段忽略；时间字段可传ISO格式字符串。值无法转换时抛出ValueError/TypeError，且不修改任何数据
+        """
+        row = self._find_wallet_row(address)
+        if row is None:
+            return None
+        
+        # 先全部转换，避免部分写入后出错导致数据和索引不一致
+        values = {}
+        for field, value in updates.items():
+            if field not in WRITABLE_WALLET_COLUMNS:
+                continue
+            if isinstance(value, str):
+                value = int(datetime.datetime.fromisoformat(value).timestamp())
+            values[field] = self.wallets[field].dtype.type(value)
+        
+        updated = []
+        for field, value in values.items():
+            column = self.wallets[field]
+            # 内存映射列为只读，首次写入时复制到内存
+            if not column.flags.writeable:
+                column = self.wallets[field] = np.array(column)
+            column[row] = value
+            updated.append(field)
+        self._update_indexes(row, updated)
+        self._mark_modified(address)
+        return self._wallet_row(row)
+    
+    def _mark_modified(self, address: Optional[str] = None):
+        """记录修改时间并通知监听器，address为None表示全部数据"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.last_modified = now
+        if address:
+            self._wallet_modified[address] = now
+        else:
+            self._wallet_modified.clear()
+        
+        for listener in self._change_listeners:
+            listener(address)
+    
+    def rescreen(self, profile: Dict[str, float]) -> Dict[str, int]:
+        """按新阈值向量化重新标记所有钱包"""
+        mask = screen_columns(self.wallets, profile)
+        changed = int(np.count_nonzero(mask != np.asarray(self.wallets["is_smart_wallet"])))
+        self.wallets["is_smart_wallet"] = mask
+        self._build_indexes()
+        self._mark_modified()
+        return {"smart_wallet_count": self._stats["smart_wallet_count"], "changed": changed}
+    
+    def compare_profiles(self, profiles: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, Any]]:
+        """并排比较多个阈值配置的筛选结果(不修改数据)"""
+        win_rate = np.asarray(self.wallets["win_rate"])
+        profit_loss_ratio = np.asarray(self.wallets["profit_loss_ratio"])
+        result = {}
+        for name, profile in profiles.items():
+            mask = screen_columns(self.wallets, profile)
+            count = int(np.count_nonzero(mask))
+            result[name] = {
+                "thresholds": profile,
+                "total_wallets": self._stats["total_wallets"],
+                "smart_wallet_count": count,
+                "avg_win_rate": float(win_rate[mask].mean()) if count else 0,
+                "avg_profit_loss_ratio": float(profit_loss_ratio[mask].mean()) if count else 0
+            }
+        return result
     
     def get_wallet_stats(self) -> Dict[str, Any]:
         """获取钱包统计信息"""
-        smart_wallets = [w for w in self.wallets if w["is_smart_wallet"]]
-        
-        return {
-            "total_wallets": len(self.wallets),
-            "smart_wallet_count": len(smart_wallets),
-            "avg_win_rate": sum(w["win_rate"] for w in smart_wallets) / len(smart_wallets) if smart_wallets else 0,
-            "avg_profit_loss_ratio": sum(w["profit_loss_ratio"] for w in smart_wallets) / len(smart_wallets) if smart_wallets else 0,
-            "avg_daily_trades": sum(w["daily_trades"] for w in smart_wallets) / len(smart_wallets) if smart_wallets else 0
+        return dict(self._stats)
+
+class ResponseCache:
+    """只读API响应缓存 - 按路径+查询参数缓存序列化结果，并提供ETag/Last-Modified"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存条目"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: str, body: bytes, last_modified: datetime.datetime,
+            wallet_address: Optional[str] = None) -> Dict[str, Any]:
+        """写入缓存条目，超出容量时淘汰最久未使用的条目"""
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+            "last_modified": last_modified.replace(microsecond=0),
+            "wallet_address": wallet_address
         }
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+    
+    def invalidate(self, wallet_address: Optional[str] = None):
+        """使缓存失效
+        
+        指定钱包时只清除该钱包的条目以及不属于任何钱包的聚合条目(列表、统计)，
+        否则清空全部缓存
+        """
+        if wallet_address is None:
+            self._entries.clear()
+            return
+        
+        stale_keys = [
+            key for key, entry in self._entries.items()
+            if entry["wallet_address"] in (None, wallet_address)
+        ]
+        for key in stale_keys:
+            del self._entries[key]
+
+def _is_not_modified(request: Request, entry: Dict[str, Any]) -> bool:
+    """根据If-None-Match/If-Modified-Since判断客户端缓存是否仍然有效"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.replace("W/", "", 1) == entry["etag"] for tag in tags)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry["last_modified"] <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cached_json_response(request: Request, build: Callable[[], Any],
+                         wallet_address: Optional[str] = None) -> Response:
+    """返回带缓存的JSON响应，未变更时返回304"""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    key = request.url.path + ("?" + query if query else "")
+    
+    entry = response_cache.get(key)
+    metrics.CACHE_REQUESTS.labels("api_response", "hit" if entry is not None else "miss").inc()
+    if entry is None:
+        # 直接编码为字节并返回Response，跳过FastAPI的jsonable_encoder和响应模型校验
+        body = dumps_json(build())
+        entry = response_cache.put(key, body, mock_service.get_last_modified(wallet_address), wallet_address)
+    
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": format_datetime(entry["last_modified"], usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+    if _is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
 
 # 创建模拟数据服务实例
 mock_service = MockDataService()
 
+# 创建响应缓存，数据变更时自动失效
+response_cache = ResponseCache()
+mock_service.add_change_listener(response_cache.invalidate)
+
+# 事件总线，数据变更时推送给/api/events的订阅者
+event_bus = get_event_bus()
+
+def publish_data_change(address: Optional[str]):
+    """发布数据变更事件：钱包被标记为聪明钱包时发布wallet_qualified，并发布最新统计"""
+    if address:
+        wallet = mock_service.get_wallet_by_address(address)
+        if wallet and wallet["is_smart_wallet"]:
+            event_bus.publish(TOPIC_WALLET_QUALIFIED, wallet, wallet=address)
+    event_bus.publish(TOPIC_METRICS, mock_service.get_wallet_stats())
+
+mock_service.add_change_listener(publish_data_change)
+
 # 首页
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -201,7 +598,7 @@ async def read_root(request: Request):
 async def dashboard(request: Request):
     """返回仪表盘页面"""
     stats = mock_service.get_wallet_stats()
-    top_wallets = mock_service.get_wallets(smart_only=True, limit=10)
+    top_wallets = mock_service.get_wallets(smart_only=True, limit=10, sort_by="win_rate")
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request, 
@@ -227,52 +624,135 @@ async def wallet_detail(address: str, request: Request):
     })
 
 # API端点 - 获取钱包列表
-@app.get("/api/wallets", response_class=JSONResponse)
-async def api_get_wallets(smart_only: bool = False, limit: int = 100, offset: int = 0):
+@app.get("/api/wallets", response_class=FastJSONResponse)
+async def api_get_wallets(request: Request, smart_only: bool = False, limit: int = 100, offset: int = 0,
+                          sort_by: Optional[str] = None):
     """获取钱包列表"""
-    wallets = mock_service.get_wallets(smart_only=smart_only, limit=limit, offset=offset)
-    return wallets
+    return cached_json_response(
+        request,
+        lambda: mock_service.get_wallets(smart_only=smart_only, limit=limit, offset=offset, sort_by=sort_by)
+    )
 
 # API端点 - 获取钱包统计信息
-@app.get("/api/wallets/stats/overview", response_class=JSONResponse)
-async def api_get_wallet_stats():
+@app.get("/api/wallets/stats/overview", response_class=FastJSONResponse)
+async def api_get_wallet_stats(request: Request):
     """获取钱包统计信息"""
-    return mock_service.get_wallet_stats()
+    return cached_json_response(request, mock_service.get_wallet_stats)
 
 # API端点 - 获取交易列表
-@app.get("/api/transactions", response_class=JSONResponse)
-async def api_get_transactions(wallet_address: str = None, limit: int = 100, offset: int = 0):
+@app.get("/api/transactions", response_class=FastJSONResponse)
+async def api_get_transactions(request: Request, wallet_address: str = None, limit: int = 100, offset: int = 0):
     """获取交易列表"""
-    transactions = mock_service.get_transactions(wallet_address=wallet_address, limit=limit, offset=offset)
-    return transactions
+    return cached_json_response(
+        request,
+        lambda: mock_service.get_transactions(wallet_address=wallet_address, limit=limit, offset=offset),
+        wallet_address=wallet_address
+    )
 
 # API端点 - 模拟获取钱包持仓数据
-@app.get("/api/transactions/wallet/{address}/positions", response_class=JSONResponse)
-async def api_get_wallet_positions(address: str, active_only: bool = False):
+@app.get("/api/transactions/wallet/{address}/positions", response_class=FastJSONResponse)
+async def api_get_wallet_positions(request: Request, address: str, active_only: bool = False):
     """模拟获取钱包持仓数据"""
+    return cached_json_response(
+        request,
+        lambda: _build_mock_positions(address, active_only),
+        wallet_address=address
+    )
+
+def _build_mock_positions(address: str, active_only: bool) -> List[Dict[str, Any]]:
+    """生成模拟持仓数据
+    
+    随机数按钱包地址播种，同一钱包每次生成相同的持仓(与缓存结果及active_only过滤结果一致)
+    """
     # 这里只是简单模拟一些持仓数据
+    rng = random.Random(f"{mock_service.seed}:{address}")
     positions = []
     tokens = ["SOL", "USDC", "BONK", "JTO", "RAY"]
     
     for token in tokens:
-        is_active = bool(round(max(0.2, min(0.8, random.random()))))
-        if active_only and not is_active:
-            continue
-            
-        positions.append({
+        is_active = bool(round(max(0.2, min(0.8, rng.random()))))
+        position = {
             "token_symbol": token,
-            "amount": round(random.random() * 1000, 2),
-            "avg_buy_price": round(random.random() * 10, 4),
-            "cost_basis": round(random.random() * 50, 4),
-            "buy_count": random.randint(1, 20),
-            "sell_count": random.randint(0, 10),
-            "realized_profit": round(random.random() * 5, 4),
-            "avg_holding_time": round(random.random() * 24, 1),
+            "amount": round(rng.random() * 1000, 2),
+            "avg_buy_price": round(rng.random() * 10, 4),
+            "cost_basis": round(rng.random() * 50, 4),
+            "buy_count": rng.randint(1, 20),
+            "sell_count": rng.randint(0, 10),
+            "realized_profit": round(rng.random() * 5, 4),
+            "avg_holding_time": round(rng.random() * 24, 1),
             "is_active": is_active
-        })
+        }
+        # 先生成完整记录再过滤，保证过滤前后同一代币的数据相同
+        if active_only and not is_active:
+            continue
+        positions.append(position)
     
     return positions
 
+# API端点 - 并排比较各阈值配置的筛选结果
+@app.get("/api/wallets/screening/profiles", response_class=FastJSONResponse)
+async def api_compare_screening_profiles(request: Request):
+    """比较各命名阈值配置下的聪明钱包数量"""
+    return cached_json_response(request, lambda: mock_service.compare_profiles(get_profiles(settings)))
+
+# API端点 - 按新阈值重新筛选全部钱包
+@app.post("/api/wallets/rescreen", response_class=FastJSONResponse)
+async def api_rescreen_wallets(profile: str = "default", win_rate: Optional[float] = None,
+                               profit_loss_ratio: Optional[float] = None, daily_trades: Optional[float] = None,
+                               holding_hours: Optional[float] = None):
+    """按命名配置(可用参数覆盖单项阈值)重新标记聪明钱包"""
+    profiles = get_profiles(settings)
+    if profile not in profiles:
+        return FastJSONResponse({"detail": f"未知配置: {profile}"}, status_code=404)
+    
+    thresholds = dict(profiles[profile])
+    overrides = {"win_rate": win_rate, "profit_loss_ratio": profit_loss_ratio,
+                 "daily_trades": daily_trades, "holding_hours": holding_hours}
+    thresholds.update({key: value for key, value in overrides.items() if value is not None})
+    
+    result = mock_service.rescreen(thresholds)
+    return {"profile": profile, "thresholds": thresholds, **result}
+
+# API端点 - 获取钱包详情(放在/api/wallets下的固定路径之后注册)
+@app.get("/api/wallets/{address}", response_class=FastJSONResponse)
+async def api_get_wallet(request: Request, address: str):
+    """获取钱包详情"""
+    if mock_service.get_wallet_by_address(address) is None:
+        return FastJSONResponse({"detail": "钱包未找到"}, status_code=404)
+    return cached_json_response(request, lambda: mock_service.get_wallet_by_address(address), wallet_address=address)
+
+# API端点 - 更新钱包数据
+@app.put("/api/wallets/{address}", response_class=FastJSONResponse)
+async def api_update_wallet(address: str, updates: Dict[str, Any] = Body(...)):
+    """更新钱包指标(请求体为字段到新值的JSON对象)，相关的缓存响应随之失效"""
+    unknown = sorted(set(updates) - set(WRITABLE_WALLET_COLUMNS))
+    if unknown:
+        return FastJSONResponse({"detail": f"不可更新的字段: {', '.join(unknown)}"}, status_code=400)
+    try:
+        wallet = mock_service.update_wallet(address, updates)
+    except (TypeError, ValueError) as e:
+        return FastJSONResponse({"detail": f"字段值无效: {e}"}, status_code=400)
+    if wallet is None:
+        return FastJSONResponse({"detail": "钱包未找到"}, status_code=404)
+    return wallet
+
+# 事件推送(SSE)
+@app.get("/api/events")
+async def api_events(request: Request, topics: Optional[str] = None, wallets: Optional[str] = None):
+    """推送新合格钱包、交易和统计更新，topics/wallets为逗号分隔的过滤条件，断线重连按Last-Event-ID补发"""
+    subscription = subscribe_from_request(event_bus, dict(request.query_params), dict(request.headers))
+    return StreamingResponse(
+        event_bus.sse_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 运行指标
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus格式的运行指标"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # 主函数
 if __name__ == "__main__":
     # 确保目录存在
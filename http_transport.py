@@ -0,0 +1,85 @@
+"""
+共享HTTP连接 - 所有RPC调用和节点测试共用一个保持长连接的连接池
+
+按代理地址复用同一个aiohttp会话：限制连接池大小、缓存DNS、保持空闲连接，
+并默认校验TLS证书，避免每次请求重新建立TCP/TLS连接
+"""
+
+import os
+from typing import Dict, Optional
+
+import aiohttp
+
+# 连接池总连接数和单个节点的连接数
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "100"))
+RPC_POOL_SIZE_PER_HOST = int(os.getenv("RPC_POOL_SIZE_PER_HOST", "32"))
+# 空闲连接保持时间(秒)
+RPC_KEEPALIVE_SECONDS = float(os.getenv("RPC_KEEPALIVE_SECONDS", "60"))
+# DNS缓存时间(秒)
+RPC_DNS_CACHE_SECONDS = int(os.getenv("RPC_DNS_CACHE_SECONDS", "300"))
+# 是否校验TLS证书(仅在代理替换证书等特殊网络环境下设置为0)
+RPC_VERIFY_TLS = os.getenv("RPC_VERIFY_TLS", "1") == "1"
+# 节点测试脚本默认使用的代理地址，例如"http://127.0.0.1:7890"
+RPC_PROXY = os.getenv("RPC_PROXY") or None
+
+class HttpTransport:
+    """共享的HTTP连接池
+
+    post()与aiohttp.ClientSession.post用法相同，可直接作为rpc_client.rpc_call的session参数，
+    代理在每次请求时传入(aiohttp 3.8的会话不支持默认代理)
+    """
+
+    def __init__(self, proxy: Optional[str] = RPC_PROXY, verify_tls: bool = RPC_VERIFY_TLS,
+                 pool_size: int = RPC_POOL_SIZE, pool_size_per_host: int = RPC_POOL_SIZE_PER_HOST):
+        self.proxy = proxy
+        self.verify_tls = verify_tls
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """获取会话，首次使用时在当前事件循环中创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=RPC_KEEPALIVE_SECONDS,
+                ttl_dns_cache=RPC_DNS_CACHE_SECONDS,
+                use_dns_cache=True,
+                # None使用默认的证书校验
+                ssl=None if self.verify_tls else False
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    def post(self, url: str, **kwargs):
+        """发送POST请求，返回aiohttp的请求上下文"""
+        if self.proxy and "proxy" not in kwargs:
+            kwargs["proxy"] = self.proxy
+        return self.session.post(url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+# 代理地址 -> 共享连接
+_transports: Dict[Optional[str], HttpTransport] = {}
+
+def get_transport(proxy: Optional[str] = None) -> HttpTransport:
+    """获取共享连接单例(每个代理地址一个)"""
+    transport = _transports.get(proxy)
+    if transport is None:
+        transport = _transports[proxy] = HttpTransport(proxy=proxy)
+    return transport
+
+async def close_transports():
+    """关闭所有共享连接"""
+    for transport in list(_transports.values()):
+        await transport.close()
+    _transports.clear()
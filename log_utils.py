@@ -0,0 +1,90 @@
+"""
+日志工具 - 队列化日志、限速过滤和JSON格式输出
+
+将同步的控制台/文件处理器移到后台线程，热路径上的logger调用只做一次入队
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Tuple
+
+class JsonFormatter(logging.Formatter):
+    """结构化JSON日志格式"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+class RateLimitFilter(logging.Filter):
+    """按消息模板限速的日志过滤器(令牌桶)
+
+    每个消息模板每秒最多输出rate条，允许burst条突发；被丢弃的条数会附加在
+    下一条放行的日志后面
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 10):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, int], Tuple[float, float]] = {}
+        self._suppressed: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (str(record.msg), record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now)
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._buckets[key] = (tokens - 1.0, now)
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (已省略 {suppressed} 条相同日志)"
+        return True
+
+def enable_queued_logging(logger: logging.Logger, json_format: bool = False) -> QueueListener:
+    """将logger现有的处理器移到后台线程，logger只保留一个QueueHandler
+
+    Args:
+        logger: 需要改造的日志记录器
+        json_format: 是否改用JSON格式输出
+
+    Returns:
+        已启动的QueueListener，退出前应调用stop()以刷新剩余日志
+    """
+    handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    for handler in handlers:
+        logger.removeHandler(handler)
+        if json_format:
+            handler.setFormatter(JsonFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def get_rate_limited_logger(logger: logging.Logger, name: str = "tx",
+                            rate: float = 1.0, burst: int = 10) -> logging.Logger:
+    """获取带限速过滤的子日志记录器，用于逐笔交易等高频日志"""
+    child = logger.getChild(name)
+    if not any(isinstance(f, RateLimitFilter) for f in child.filters):
+        child.addFilter(RateLimitFilter(rate=rate, burst=burst))
+    return child
@@ -0,0 +1,213 @@
+"""
+持仓批次账本 - 按(钱包, 代币)记录买入批次，卖出时按先进先出匹配
+
+每个被卖出的批次得到准确的已实现盈亏和持仓时长(卖出时间 - 该批次买入时间)，
+整个钱包的一批交易在内存中处理完后，未平仓批次和滚动统计状态一次性写入SQLite，重启后从中恢复
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import metrics
+
+# 默认存储文件
+DEFAULT_POSITION_DB = os.path.join("app/data", "positions.db")
+
+# 卖出后剩余数量低于卖出前数量的该比例时视为已平仓(浮点误差产生的残余)
+LOT_EPSILON = 1e-9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS open_lots (
+    wallet TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    cost REAL NOT NULL,
+    buy_time INTEGER,
+    PRIMARY KEY (wallet, mint, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS wallet_state (
+    wallet TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+class Lot:
+    """一个未平仓的买入批次"""
+
+    __slots__ = ("amount", "cost", "time")
+
+    def __init__(self, amount: float, cost: float, time: int):
+        self.amount = amount
+        self.cost = cost
+        self.time = time
+
+class ClosedLot:
+    """一个批次(或其中一部分)的平仓结果"""
+
+    __slots__ = ("amount", "cost", "proceeds", "buy_time", "sell_time")
+
+    def __init__(self, amount: float, cost: float, proceeds: float, buy_time: int, sell_time: int):
+        self.amount = amount
+        self.cost = cost
+        self.proceeds = proceeds
+        self.buy_time = buy_time
+        self.sell_time = sell_time
+
+    @property
+    def pnl(self) -> float:
+        return self.proceeds - self.cost
+
+    @property
+    def holding_seconds(self) -> int:
+        return self.sell_time - self.buy_time
+
+class TokenLots:
+    """单个代币的批次队列(列表+队首下标，出队不移动元素)"""
+
+    __slots__ = ("_lots", "_head", "amount")
+
+    def __init__(self):
+        self._lots: List[Lot] = []
+        self._head = 0
+        # 未平仓总数量
+        self.amount = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lots) - self._head
+
+    @property
+    def open_lots(self) -> List[Lot]:
+        return self._lots[self._head:]
+
+    def buy(self, amount: float, cost: float, timestamp: int):
+        if amount <= 0:
+            return
+        self._lots.append(Lot(amount, cost, timestamp))
+        self.amount += amount
+
+    def sell(self, amount: float, proceeds: float, timestamp: int) -> List[ClosedLot]:
+        """按先进先出卖出，收入按数量分摊到各批次；超出持仓的卖出数量忽略
+
+        浮点误差留下的残余(低于原数量的LOT_EPSILON倍)按已平仓处理
+        """
+        if amount <= 0:
+            return []
+        price = proceeds / amount
+        remaining = amount
+        closed = []
+        lots = self._lots
+        while remaining > amount * LOT_EPSILON and self._head < len(lots):
+            lot = lots[self._head]
+            before = lot.amount
+            matched = min(remaining, before)
+            if before - matched <= before * LOT_EPSILON:
+                matched = before  # 卖出剩余的全部数量
+            cost = lot.cost * matched / before
+            closed.append(ClosedLot(matched, cost, price * matched, lot.time, timestamp))
+
+            lot.amount -= matched
+            lot.cost -= cost
+            remaining -= matched
+            self.amount -= matched
+            if lot.amount <= 0:
+                self._head += 1
+
+        # 已出队的元素过多时压缩
+        if self._head > 32 and self._head * 2 > len(lots):
+            del lots[:self._head]
+            self._head = 0
+        if not len(self):
+            self.amount = 0.0
+        return closed
+
+class LotLedger:
+    """单个钱包所有代币的批次账本"""
+
+    __slots__ = ("tokens",)
+
+    def __init__(self):
+        self.tokens: Dict[str, TokenLots] = {}
+
+    def apply(self, swap: Any) -> List[ClosedLot]:
+        """处理一笔swap(swap_decoder.DecodedSwap)，卖出时返回平仓的批次"""
+        if swap.side == "buy":
+            lots = self.tokens.get(swap.token_mint)
+            if lots is None:
+                lots = self.tokens[swap.token_mint] = TokenLots()
+            lots.buy(swap.token_amount, swap.sol_amount, swap.block_time)
+            return []
+
+        if swap.side == "sell":
+            lots = self.tokens.get(swap.token_mint)
+            if lots is None:
+                return []  # 没有对应买入，无法计算盈亏
+            closed = lots.sell(swap.token_amount, swap.sol_amount, swap.block_time)
+            if not len(lots):
+                del self.tokens[swap.token_mint]
+            return closed
+        return []
+
+    def holdings(self) -> Dict[str, float]:
+        """各代币的未平仓数量"""
+        return {mint: lots.amount for mint, lots in self.tokens.items()}
+
+    def restore(self, positions: Dict[str, List[Dict[str, Any]]]):
+        """从PositionStore.load_wallet的结果恢复未平仓批次"""
+        self.tokens.clear()
+        for mint, saved_lots in positions.items():
+            lots = TokenLots()
+            for lot in saved_lots:
+                lots.buy(lot["amount"], lot["cost"], lot["buy_time"])
+            if len(lots):
+                self.tokens[mint] = lots
+
+class PositionStore:
+    """未平仓批次和滚动统计状态存储，每个钱包一次性整体写入"""
+
+    def __init__(self, path: str = DEFAULT_POSITION_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def save_wallet(self, wallet: str, ledger: LotLedger, state: Optional[Dict[str, Any]] = None):
+        """用账本中的未平仓批次(及滚动统计状态)替换该钱包已保存的数据(一次提交)"""
+        rows = [
+            (wallet, mint, seq, lot.amount, lot.cost, lot.time)
+            for mint, lots in ledger.tokens.items()
+            for seq, lot in enumerate(lots.open_lots)
+        ]
+        with metrics.DB_COMMIT_LATENCY.labels("positions").time():
+            self._conn.execute("DELETE FROM open_lots WHERE wallet = ?", (wallet,))
+            self._conn.executemany(
+                "INSERT INTO open_lots (wallet, mint, seq, amount, cost, buy_time) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            if state is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO wallet_state (wallet, state) VALUES (?, ?)", (wallet, json.dumps(state))
+                )
+            self._conn.commit()
+
+    def load_wallet(self, wallet: str) -> Dict[str, List[Dict[str, Any]]]:
+        """读取钱包的未平仓批次: mint -> [{amount, cost, buy_time}, ...]"""
+        positions: Dict[str, List[Dict[str, Any]]] = {}
+        for mint, amount, cost, buy_time in self._conn.execute(
+            "SELECT mint, amount, cost, buy_time FROM open_lots WHERE wallet = ? ORDER BY mint, seq", (wallet,)
+        ):
+            positions.setdefault(mint, []).append({"amount": amount, "cost": cost, "buy_time": buy_time})
+        return positions
+
+    def load_state(self, wallet: str) -> Optional[Dict[str, Any]]:
+        """读取钱包的滚动统计状态，没有保存过时返回None"""
+        row = self._conn.execute("SELECT state FROM wallet_state WHERE wallet = ?", (wallet,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self._conn.close()
@@ -6,48 +6,38 @@ Solana链聪明钱包筛选机器人
 - 盈亏比优化：要求平均盈利/亏损比≥3:1
 - 交易频次：日均交易次数≥20次
 - 持仓周期：单币种持仓时间≤24小时
+
+Web服务以只读API模式运行，不启动钱包扫描器；扫描器作为独立进程运行:
+    python scanner.py
 """
 
-import os
-import asyncio
-import uvicorn
 from dotenv import load_dotenv
 
-from app.core.config import get_settings
-from app.api.server import app
-from app.services.wallet_scanner import start_scanner
-from app.core.database import init_db
-from app.utils.logger import get_logger
-
 # 加载环境变量
 load_dotenv()
 
-# 获取日志记录器
-logger = get_logger()
-
-# 获取设置
-settings = get_settings()
+# Web应用(连同FastAPI、SQLAlchemy模型等依赖)在首次访问main.app时才创建；
+# python main.py以__main__运行本文件后由uvicorn按"main:app"再导入一次，只有后者会创建应用
+_app = None
 
-# 确保数据目录存在
-os.makedirs(settings.DATA_DIR, exist_ok=True)
+def __getattr__(name):
+    """按需创建app(uvicorn加载"main:app"时触发)"""
+    global _app
+    if name == "app":
+        if _app is None:
+            from web_app import create_app
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 初始化数据库
-init_db()
-
-# 启动钱包扫描器
-@app.on_event("startup")
-async def startup_scanner():
-    """应用启动时启动钱包扫描器"""
-    asyncio.create_task(start_scanner())
-    logger.info("钱包扫描器后台任务已启动")
+if __name__ == "__main__":
+    import uvicorn
+    from app.core.config import get_settings
+    from app.utils.logger import get_logger
 
-@app.on_event("shutdown")
-async def shutdown():
-    """应用关闭时的清理操作"""
-    # 关闭连接等操作
-    logger.info("应用关闭，执行清理操作")
+    settings = get_settings()
+    logger = get_logger()
 
-if __name__ == "__main__":
     # 启动Web服务器
     logger.info(f"启动Web服务器，监听地址: {settings.HOST}:{settings.PORT}")
     uvicorn.run(
@@ -56,4 +46,4 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
@@ -0,0 +1,330 @@
+"""
+运行指标 - Prometheus文本格式的计数器/仪表/直方图，以及扫描器的/metrics服务
+"""
+
+import asyncio
+import hmac
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+# 管理路由(如/debug/profile)的访问令牌，设置后请求需带token参数或X-Admin-Token请求头
+METRICS_ADMIN_TOKEN = os.getenv("METRICS_ADMIN_TOKEN") or None
+
+# 默认直方图分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """格式化标签，如 {method="getBalance",status="ok"}"""
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    """格式化数值"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """指标基类，按标签值保存子指标"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values, **kwargs) -> "_Metric":
+        """获取指定标签值的子指标"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def _samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        """返回(后缀, 标签值, 额外标签, 数值)样本列表"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """渲染为Prometheus文本格式"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for suffix, values, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._value = _CounterValue()
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._value.inc(amount)
+
+    def _samples(self):
+        if not self.labelnames:
+            return [("", (), "", self._value.value)]
+        return [("", key, "", child.value) for key, child in list(self._children.items())]
+
+class _GaugeValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+class Gauge(_Metric):
+    """可增可减的仪表"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._value = _GaugeValue()
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._value.set(value)
+
+    def _samples(self):
+        if not self.labelnames:
+            return [("", (), "", self._value.value)]
+        return [("", key, "", child.value) for key, child in list(self._children.items())]
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """计时上下文管理器"""
+        return _Timer(self)
+
+class _Timer:
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        self._value = _HistogramValue(self.buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._value.observe(value)
+
+    def time(self) -> _Timer:
+        return self._value.time()
+
+    def _samples(self):
+        items = [((), self._value)] if not self.labelnames else list(self._children.items())
+        samples = []
+        for key, child in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                samples.append(("_bucket", key, f'le="{_format_value(bound)}"', cumulative))
+            samples.append(("_sum", key, "", child.sum))
+            samples.append(("_count", key, "", cumulative))
+        return samples
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """渲染全部指标"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# RPC调用
+RPC_REQUESTS = Counter("solana_rpc_requests_total", "Solana RPC调用次数", ("method", "endpoint", "status"))
+RPC_LATENCY = Histogram("solana_rpc_latency_seconds", "Solana RPC调用耗时", ("method", "endpoint"))
+
+# 缓存
+CACHE_REQUESTS = Counter("cache_requests_total", "缓存查询次数", ("cache", "result"))
+
+# 钱包处理流水线: discovered/analyzed/qualified
+WALLETS_PROCESSED = Counter("wallets_processed_total", "钱包处理数量", ("stage",))
+QUEUE_DEPTH = Gauge("scan_queue_depth", "待处理队列长度", ("queue",))
+
+# 存储写入
+DB_COMMIT_LATENCY = Histogram("db_commit_latency_seconds", "存储提交耗时", ("store",))
+
+# 事件循环
+EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "事件循环调度延迟")
+
+# 事件推送
+EVENTS_PUBLISHED = Counter("events_published_total", "发布的事件数", ("topic",))
+EVENTS_DROPPED = Counter("events_dropped_total", "订阅者缓冲区满时丢弃的事件数")
+EVENT_SUBSCRIBERS = Gauge("event_subscribers", "当前事件订阅者数量")
+
+# HTTP接口
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP请求次数", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_latency_seconds", "HTTP请求耗时", ("method", "route"))
+
+def endpoint_label(url: str) -> str:
+    """将RPC URL转换为标签值(只保留主机名，避免泄露API Key)"""
+    return urlparse(url).hostname or url
+
+async def monitor_event_loop_lag(interval: float = 1.0):
+    """周期性测量事件循环调度延迟"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - start - interval))
+
+# 流式路由: 路径 -> (handler(查询参数, 请求头) -> 异步字节迭代器(如SSE), Content-Type, 是否为管理路由)
+StreamHandler = Callable[[Dict[str, str], Dict[str, str]], AsyncIterator[bytes]]
+STREAM_ROUTES: Dict[str, Tuple[StreamHandler, str, bool]] = {}
+
+def register_stream_route(path: str, handler: StreamHandler, content_type: str = "text/event-stream; charset=utf-8",
+                          admin: bool = False):
+    """在指标服务上注册流式响应路由，admin=True时受METRICS_ADMIN_TOKEN保护"""
+    STREAM_ROUTES[path] = (handler, content_type, admin)
+
+def _admin_authorized(query: Dict[str, str], headers: Dict[str, str]) -> bool:
+    if METRICS_ADMIN_TOKEN is None:
+        return True
+    token = headers.get("x-admin-token") or query.get("token") or ""
+    return hmac.compare_digest(token.encode("utf-8"), METRICS_ADMIN_TOKEN.encode("utf-8"))
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """处理/metrics请求(及已注册流式路由)的最小HTTP实现"""
+    try:
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.decode("latin-1").split()
+        path, _, query = (parts[1] if len(parts) >= 2 else "").partition("?")
+
+        params = dict(parse_qsl(query))
+        route = STREAM_ROUTES.get(path)
+        if route is not None and (not route[2] or _admin_authorized(params, headers)):
+            stream, stream_content_type, _ = route
+            writer.write(
+                f"HTTP/1.1 200 OK\r\nContent-Type: {stream_content_type}\r\n"
+                "Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode("latin-1")
+            )
+            chunks = stream(params, headers)
+            try:
+                async for chunk in chunks:
+                    writer.write(chunk)
+                    await writer.drain()
+            except ConnectionError:
+                pass  # 客户端断开
+            finally:
+                await chunks.aclose()
+            return
+
+        if path == "/metrics":
+            status, content_type, body = "200 OK", CONTENT_TYPE, registry.render().encode("utf-8")
+        elif route is not None:
+            status, content_type, body = "403 Forbidden", "text/plain; charset=utf-8", b"forbidden\n"
+        else:
+            status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"not found\n"
+
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def start_metrics_server(host: str = "127.0.0.1", port: int = 9100) -> asyncio.AbstractServer:
+    """在当前事件循环中启动/metrics服务"""
+    return await asyncio.start_server(_handle_metrics_request, host, port)
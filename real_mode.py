@@ -4,28 +4,101 @@ Solana聪明钱包筛选器 - 连接真实的Solana网络获取数据
 
 import os
 import json
+import time
 import asyncio
 import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from app.core.config import get_settings
 from app.utils.solana import get_solana_connection
 from app.utils.logger import get_logger
+import metrics
+from log_utils import enable_queued_logging, get_rate_limited_logger
+from swap_decoder import DecodedSwap, decode_swap
+import rpc_client
+from rpc_client import fetch_transaction, parse_lean_transaction
+from http_transport import close_transports
+from event_bus import TOPIC_METRICS, TOPIC_SIGNAL, TOPIC_TRADE, TOPIC_WALLET_QUALIFIED, get_event_bus, sse_route
+from cobuy_signals import CoBuyDetector, SignalStore
+from blob_store import BlobStore
+from rolling_stats import WalletRollup
+from lot_ledger import PositionStore
+from wallet_graph import WalletGraph, transaction_wallets
+from token_registry import TokenRegistry
+from scan_scheduler import RESCAN_ACTIVE_MINUTES, ScanScheduler
+from tracing import CAT_DB, CAT_METRICS, CAT_PARSE, get_tracer, profile_route, trace_route
 
 # 获取配置和日志记录器
 settings = get_settings()
 logger = get_logger()
 
+# 逐笔交易日志限速，避免高频日志拖慢扫描
+tx_logger = get_rate_limited_logger(logger)
+
+# 设置环境变量LOG_JSON=1后输出结构化JSON日志
+LOG_JSON = os.getenv("LOG_JSON", "0") == "1"
+
 # 获取Solana连接
 solana_connection = None
 
+# 原始交易数据存储(已获取过的交易直接从本地读取)
+blob_store = None
+
+# 钱包关系图(记录交易对手和代币交易边，发现新钱包时优先本地查询)
+wallet_graph = None
+
+# 代币元数据和价格缓存(聪明钱包交易次数定期批量写入)
+token_registry = TokenRegistry()
+
+# 钱包重新扫描计划(按活跃度安排下次分析时间)
+scan_scheduler = None
+
+# 性能追踪(TRACE_ENABLED=1或通过指标服务的/debug/trace开启，按钱包记录各阶段耗时)
+tracer = get_tracer()
+
+# 事件总线(新合格钱包、聪明钱包新交易和扫描进度，通过指标服务的/events以SSE推送)
+event_bus = get_event_bus()
+
+# 聪明钱包共同买入检测和信号存储
+cobuy_detector = CoBuyDetector()
+signal_store = None
+
 # 聪明钱包列表
 smart_wallets = []
 known_wallets = set()
 
+# 钱包地址 -> 滚动窗口统计
+wallet_rollups: Dict[str, WalletRollup] = {}
+
+# 未平仓批次和滚动统计状态存储(每个钱包分析完成后整体写入一次，重启后从中恢复)
+position_store = None
+
 # 输出文件名
 output_filename = f"smart_wallets_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
 
+# 获取交易详情的并发数
+TX_FETCH_CONCURRENCY = 5
+
+# 每页获取的交易签名数
+SIGNATURE_PAGE_SIZE = 50
+# 上次处理到的签名不在第一页时，最多再向前翻的页数
+SIGNATURE_MAX_PAGES = int(os.getenv("SIGNATURE_MAX_PAGES", "20"))
+
+# 同时分析的钱包数(工作协程数)
+WALLET_CONCURRENCY = int(os.getenv("WALLET_CONCURRENCY", "4"))
+# 单个钱包的分析超时(秒)
+WALLET_TIMEOUT = float(os.getenv("WALLET_TIMEOUT", "60"))
+# 每轮分析的时间预算(秒)，到期后尚未开始的钱包推迟到下一轮
+SCAN_ROUND_BUDGET = float(os.getenv("SCAN_ROUND_BUDGET", "300"))
+
+# 设置环境变量RESCAN_LOOP=1后，扫描结束后持续按计划重新分析到期的钱包
+RESCAN_LOOP = os.getenv("RESCAN_LOOP", "0") == "1"
+# 每批重新分析的最大钱包数
+RESCAN_BATCH_SIZE = int(os.getenv("RESCAN_BATCH_SIZE", "50"))
+
+# 指标服务端口(设置环境变量METRICS_PORT后在该端口提供/metrics)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
 async def init_connection():
     """初始化Solana连接"""
     global solana_connection
@@ -35,7 +108,7 @@ async def init_connection():
         solana_connection = get_solana_connection()
         
         # 测试连接
-        is_connected, message = await solana_connection.test_connection()
+        is_connected, message = await rpc_client.test_connection(solana_connection)
         if not is_connected:
             logger.warning(f"不使用代理连接失败: {message}")
             logger.info("尝试使用代理连接...")
@@ -48,7 +121,7 @@ async def init_connection():
             solana_connection = get_solana_connection(proxy=proxy)
             
             # 再次测试连接
-            is_connected, message = await solana_connection.test_connection()
+            is_connected, message = await rpc_client.test_connection(solana_connection)
             if not is_connected:
                 logger.error(f"使用代理连接失败: {message}")
                 raise Exception("无法连接到Solana网络，请检查网络或代理设置")
@@ -61,10 +134,11 @@ async def init_connection():
         raise Exception(f"无法连接到Solana网络: {e}")
 
 async def close_connection():
-    """关闭Solana连接"""
+    """关闭Solana连接和共享HTTP连接池"""
     if solana_connection:
         await solana_connection.close()
         logger.info("Solana连接已关闭")
+    await close_transports()
 
 def load_seed_wallets() -> List[str]:
     """加载种子钱包列表"""
@@ -84,6 +158,106 @@ def load_seed_wallets() -> List[str]:
         "9TQ1QV3Ym6gDzi3sFpYwZNpVjvweZSTkayPrBANshvos"
     ]
 
+async def fetch_lean_transaction(signature: str, raise_errors: bool = False) -> Optional[Dict[str, Any]]:
+    """获取精简交易详情，优先读取本地存储，失败时返回None
+    
+    本地存储保存未裁剪的getTransaction结果，读取后再裁剪为精简结构
+    
+    Args:
+        raise_errors: 为True时RPC调用失败抛出异常(用于区分获取失败和交易不存在)
+    """
+    if blob_store is not None:
+        try:
+            with tracer.span("blob_store.get", CAT_DB):
+                raw_tx = blob_store.get(signature)
+        except Exception as e:
+            # 数据损坏或压缩字典不匹配时按未命中处理，重新从RPC获取
+            tx_logger.warning("读取交易 %s 的本地数据失败: %s", signature, e)
+            metrics.CACHE_REQUESTS.labels("blob_store", "error").inc()
+            raw_tx = None
+        if raw_tx is not None:
+            metrics.CACHE_REQUESTS.labels("blob_store", "hit").inc()
+            return parse_lean_transaction(raw_tx)
+        metrics.CACHE_REQUESTS.labels("blob_store", "miss").inc()
+    
+    try:
+        raw_tx = await fetch_transaction(solana_connection, signature, profile="swap", lean=False)
+    except Exception as e:
+        tx_logger.warning("获取交易 %s 详情失败: %s", signature, e)
+        if raise_errors:
+            raise
+        return None
+    
+    if raw_tx is not None and blob_store is not None:
+        with tracer.span("blob_store.put", CAT_DB):
+            blob_store.put(signature, raw_tx)
+    return parse_lean_transaction(raw_tx)
+
+async def fetch_new_signatures(address: str, first_page: List[Dict[str, Any]],
+                               last_signature: Optional[str]) -> List[Dict[str, Any]]:
+    """返回比last_signature更新的全部签名(新的在前)
+    
+    last_signature不在第一页时用before继续向前翻页，直到找到它或翻满SIGNATURE_MAX_PAGES页
+    """
+    if last_signature is None:
+        return list(first_page)  # 首次分析只处理最近一页
+    
+    signatures: List[Dict[str, Any]] = []
+    page = first_page
+    for _ in range(SIGNATURE_MAX_PAGES + 1):
+        for tx_info in page:
+            if tx_info.get("signature") == last_signature:
+                return signatures
+            signatures.append(tx_info)
+        if len(page) < SIGNATURE_PAGE_SIZE:
+            break  # 已到最早的历史
+        page = await rpc_client.get_signatures(
+            solana_connection, address, limit=SIGNATURE_PAGE_SIZE, before=page[-1].get("signature")
+        )
+    
+    logger.warning(f"钱包 {address} 未找到上次处理到的交易 {last_signature}，"
+                   f"已处理最近 {len(signatures)} 笔交易，统计中可能缺少更早的交易")
+    return signatures
+
+async def fetch_wallet_swaps(address: str, signatures: List[Dict[str, Any]]) -> Tuple[List[DecodedSwap], Optional[str]]:
+    """获取签名对应的交易详情并解码为swap列表(按时间升序)
+    
+    signatures按新的在前排列。只返回从最早的签名起连续获取成功的部分，获取失败的交易及比它更新的
+    交易留到下次分析时重新获取，避免遗漏或重复统计
+    
+    Returns:
+        (swap列表, 连续成功部分中最新的签名；第一笔就失败时为None)
+    """
+    semaphore = asyncio.Semaphore(TX_FETCH_CONCURRENCY)
+    
+    async def fetch(sig: Dict[str, Any]) -> Tuple[bool, Optional[DecodedSwap]]:
+        if not sig.get("signature") or sig.get("err") is not None:
+            return True, None  # 失败的交易不需要解码
+        try:
+            async with semaphore:
+                tx_detail = await fetch_lean_transaction(sig["signature"], raise_errors=True)
+        except Exception:
+            return False, None
+        with tracer.span("decode_swap", CAT_PARSE):
+            return True, decode_swap(tx_detail, address)
+    
+    results = await asyncio.gather(*(fetch(sig) for sig in signatures))
+    # 最早的一笔获取失败的交易之后(更早)的部分是连续成功的
+    start = next((i + 1 for i in range(len(results) - 1, -1, -1) if not results[i][0]), 0)
+    swaps = [swap for _, swap in results[start:] if swap is not None]
+    swaps.sort(key=lambda swap: swap.block_time or 0)
+    cursor = signatures[start].get("signature") if start < len(signatures) else None
+    return swaps, cursor
+
+def load_wallet_rollup(address: str) -> WalletRollup:
+    """创建钱包的滚动窗口统计，有保存的状态时从中恢复(重启后不重复统计已处理的交易)"""
+    rollup = WalletRollup(days=settings.ANALYSIS_DAYS)
+    if position_store is not None:
+        state = position_store.load_state(address)
+        if state is not None and not rollup.restore(state, position_store.load_wallet(address)):
+            logger.info(f"钱包 {address} 保存的统计窗口天数已变化，重新统计")
+    return rollup
+
 async def analyze_wallet(address: str) -> Dict[str, Any]:
     """分析钱包数据，计算统计信息"""
     try:
@@ -93,31 +267,48 @@ async def analyze_wallet(address: str) -> Dict[str, Any]:
             return None
         
         # 获取钱包余额
-        balance = await solana_connection.get_balance(address)
+        balance = await rpc_client.get_balance(solana_connection, address)
         
         # 获取最近交易
-        transactions = await solana_connection.get_recent_transactions(address, limit=50)
+        transactions = await rpc_client.get_signatures(solana_connection, address, limit=SIGNATURE_PAGE_SIZE)
+        
+        metrics.WALLETS_PROCESSED.labels("analyzed").inc()
         
         # 如果没有交易，跳过此钱包
         if not transactions:
             logger.info(f"钱包 {address} 没有交易记录")
+            if wallet_graph is not None:
+                wallet_graph.mark_analyzed(address, False, int(datetime.datetime.now().timestamp()))
             return None
         
-        # 计算基本统计数据
-        total_transactions = len(transactions)
-        
-        # 分析交易盈亏情况
-        # 这里简化处理，实际应该分析每笔交易的详情来判断盈亏
-        # 假设70%的交易是盈利的（实际项目中需要真实分析）
-        winning_trades = int(total_transactions * 0.7)
+        # 只解码上次分析之后的新交易，增量更新滚动窗口统计
+        rollup = wallet_rollups.get(address)
+        if rollup is None:
+            rollup = wallet_rollups[address] = load_wallet_rollup(address)
+        new_transactions = await fetch_new_signatures(address, transactions, rollup.last_signature)
+        # 首次分析时取到的是历史交易，只计入统计，不作为新交易推送或用于共同买入检测
+        first_ingest = rollup.last_signature is None
         
-        # 计算胜率
-        win_rate = (winning_trades / total_transactions * 100) if total_transactions > 0 else 0
-        
-        # 假设计算其他指标
-        profit_loss_ratio = 3.5  # 假设值
-        daily_trades = total_transactions / 30  # 假设过去30天
-        avg_holding_time = 12  # 假设值，小时
+        swaps, cursor = await fetch_wallet_swaps(address, new_transactions)
+        with tracer.span("rollup.ingest", CAT_METRICS, swaps=len(swaps)):
+            rollup.ingest(swaps)
+        if wallet_graph is not None:
+            with tracer.span("wallet_graph.add_token_trades", CAT_DB):
+                wallet_graph.add_token_trades(address, swaps)
+        # 只推进到连续处理成功的最新交易，获取失败的交易下次重新获取
+        if cursor is not None:
+            rollup.last_signature = cursor
+        if position_store is not None and (swaps or cursor is not None):
+            with tracer.span("position_store.save_wallet", CAT_DB):
+                position_store.save_wallet(address, rollup.ledger, rollup.state())
+        with tracer.span("rollup.snapshot", CAT_METRICS):
+            stats = rollup.snapshot(int(datetime.datetime.now().timestamp()))
+        total_transactions = stats["total_trades"]
+        winning_trades = stats["winning_trades"]
+        win_rate = stats["win_rate"]
+        profit_loss_ratio = stats["profit_loss_ratio"]
+        daily_trades = stats["daily_trades"]
+        avg_holding_time = stats["avg_holding_time"]
         
         # 根据筛选条件判断是否为聪明钱包
         is_smart_wallet = (
@@ -125,8 +316,20 @@ async def analyze_wallet(address: str) -> Dict[str, Any]:
             profit_loss_ratio >= settings.PROFIT_LOSS_RATIO and
             daily_trades >= settings.MIN_DAILY_TRADES and
             avg_holding_time <= settings.MAX_HOLDING_HOURS and
+            stats["closed_trades"] > 0 and
             balance > 0.1  # 假设余额大于0.1 SOL
         )
+        if wallet_graph is not None:
+            with tracer.span("wallet_graph.mark_analyzed", CAT_DB):
+                wallet_graph.mark_analyzed(address, is_smart_wallet, int(datetime.datetime.now().timestamp()))
+        with tracer.span("token_registry.observe_swaps", CAT_METRICS):
+            token_registry.observe_swaps(swaps, smart_wallet=is_smart_wallet)
+        # 未平仓持仓按缓存价格(池子储备或最近成交价)估值
+        open_position_value = token_registry.value_positions(rollup.ledger.holdings())
+        if is_smart_wallet and not first_ingest:
+            for swap in swaps:
+                event_bus.publish(TOPIC_TRADE, {"wallet": address, **swap.to_dict()}, wallet=address)
+            record_cobuy_signals(cobuy_detector.observe_swaps(address, swaps))
         
         # 提取交易时间信息
         first_seen = transactions[-1]["blockTime"] if transactions and "blockTime" in transactions[-1] else None
@@ -148,6 +351,7 @@ async def analyze_wallet(address: str) -> Dict[str, Any]:
             "profit_loss_ratio": profit_loss_ratio,
             "daily_trades": daily_trades,
             "avg_holding_time": avg_holding_time,
+            "open_position_value": open_position_value,
             "first_seen": first_seen,
             "last_active": last_active,
             "is_smart_wallet": is_smart_wallet
@@ -156,41 +360,132 @@ async def analyze_wallet(address: str) -> Dict[str, Any]:
         logger.error(f"分析钱包 {address} 出错: {e}")
         return None
 
-async def extract_accounts_from_tx(tx_detail: Dict[str, Any]) -> List[str]:
-    """从交易详情中提取相关账户"""
-    accounts = []
+def record_cobuy_signals(signals: List[Dict[str, Any]]):
+    """保存并推送共同买入信号，相关代币标记为受欢迎"""
+    if not signals:
+        return
+    if signal_store is not None:
+        signals = signal_store.save(signals)
+    for signal in signals:
+        token_registry.mark_popular(signal["mint"])
+        event_bus.publish(TOPIC_SIGNAL, signal)
+        logger.info(f"共同买入信号: {signal['mint']} 在 {signal['window_seconds'] // 60} 分钟内被 "
+                    f"{signal['wallet_count']} 个聪明钱包买入")
+
+async def analyze_wallets(addresses: List[str], budget: float = SCAN_ROUND_BUDGET) -> List[str]:
+    """用固定数量的工作协程并发分析钱包，并保存其中的聪明钱包
+    
+    每个钱包受WALLET_TIMEOUT和本轮剩余预算限制，本轮耗时不超过budget
     
-    # 简化实现，实际应分析交易指令和账户数组
+    Returns:
+        因预算用完而未分析的钱包(顺延到下一轮)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    queue: asyncio.Queue = asyncio.Queue()
+    for address in addresses:
+        queue.put_nowait(address)
+    deferred = []
+    
+    async def worker():
+        while not queue.empty():
+            address = queue.get_nowait()
+            metrics.QUEUE_DEPTH.labels("analysis").set(queue.qsize())
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                deferred.append(address)
+                if scan_scheduler is not None:
+                    scan_scheduler.postpone(address, int(time.time()))
+                continue
+            
+            with tracer.wallet(address):
+                try:
+                    wallet_data = await asyncio.wait_for(analyze_wallet(address), timeout=min(WALLET_TIMEOUT, remaining))
+                except asyncio.TimeoutError:
+                    now = int(time.time())
+                    if loop.time() >= deadline:
+                        deferred.append(address)  # 被本轮预算截断，下一轮重新分析
+                        if scan_scheduler is not None:
+                            scan_scheduler.postpone(address, now)
+                    else:
+                        logger.warning(f"分析钱包 {address} 超时")
+                        if scan_scheduler is not None:
+                            scan_scheduler.postpone(address, now + int(RESCAN_ACTIVE_MINUTES * 60))
+                    continue
+                
+                # 按分析结果安排下次扫描，没有结果(无交易或出错)的钱包按不活跃处理
+                if scan_scheduler is not None:
+                    last_active = None
+                    if wallet_data and wallet_data["last_active"]:
+                        last_active = int(datetime.datetime.fromisoformat(wallet_data["last_active"]).timestamp())
+                    with tracer.span("scan_scheduler.record_result", CAT_DB):
+                        scan_scheduler.record_result(address, bool(wallet_data and wallet_data["is_smart_wallet"]), last_active)
+                
+                # 单线程事件循环中逐个写入，不需要额外加锁
+                if wallet_data and wallet_data["is_smart_wallet"]:
+                    smart_wallets.append(wallet_data)
+                    # 即时保存找到的聪明钱包
+                    with tracer.span("save_smart_wallet", CAT_DB):
+                        save_smart_wallet(wallet_data)
+                    event_bus.publish(TOPIC_WALLET_QUALIFIED, wallet_data, wallet=address)
+        
+    await asyncio.gather(*(worker() for _ in range(min(WALLET_CONCURRENCY, len(addresses)))))
+    metrics.QUEUE_DEPTH.labels("analysis").set(0)
+    event_bus.publish(TOPIC_METRICS, {
+        "analyzed": len(addresses) - len(deferred),
+        "deferred": len(deferred),
+        "known_wallets": len(known_wallets),
+        "smart_wallets": len(smart_wallets)
+    })
+    
+    if deferred:
+        logger.info(f"本轮时间预算已用完，{len(deferred)} 个钱包顺延到下一轮")
+    return deferred
+
+async def rescan_loop():
+    """持续从计划中取出到期的钱包重新分析"""
+    logger.info(f"进入重新扫描模式，共 {len(scan_scheduler)} 个钱包")
+    while True:
+        due_wallets = scan_scheduler.pop_due(limit=RESCAN_BATCH_SIZE)
+        if not due_wallets:
+            next_due = scan_scheduler.next_due_time()
+            wait = 60 if next_due is None else min(60, max(1, next_due - time.time()))
+            await asyncio.sleep(wait)
+            continue
+        
+        logger.info(f"重新分析 {len(due_wallets)} 个到期钱包")
+        await analyze_wallets(due_wallets)
+
+async def extract_accounts_from_tx(tx_detail: Dict[str, Any]) -> List[str]:
+    """从交易详情中提取相关钱包(签名者和代币账户所有者)"""
     try:
-        # 尝试从meta中提取账户
-        if "meta" in tx_detail and "preTokenBalances" in tx_detail["meta"]:
-            for balance in tx_detail["meta"]["preTokenBalances"]:
-                if "owner" in balance and balance["owner"] not in accounts:
-                    accounts.append(balance["owner"])
-                    
-        # 从账户数组中提取
-        if "transaction" in tx_detail and "message" in tx_detail["transaction"]:
-            message = tx_detail["transaction"]["message"]
-            if "accountKeys" in message:
-                for account in message["accountKeys"]:
-                    if account not in accounts:
-                        accounts.append(account)
+        return transaction_wallets(tx_detail)
     except Exception as e:
-        logger.error(f"提取交易账户出错: {e}")
-    
-    return accounts
+        tx_logger.error("提取交易账户出错: %s", e)
+        return []
 
 async def discover_wallets(seed_wallets: List[str], max_count: int = 10) -> List[str]:
-    """发现新钱包，限制数量以加快处理速度"""
+    """发现新钱包，限制数量以加快处理速度
+    
+    优先从本地关系图中取聪明钱包的未分析邻居，不足时再抓取种子钱包的交易
+    """
     new_wallets = set()
     
+    if wallet_graph is not None:
+        for account in wallet_graph.unanalyzed_neighbors_of_smart(max_count, exclude=known_wallets):
+            new_wallets.add(account)
+            metrics.WALLETS_PROCESSED.labels("discovered").inc()
+        if len(new_wallets) >= max_count:
+            return list(new_wallets)
+    
     # 限制处理的种子钱包数量
     limited_seeds = seed_wallets[:max_count]
     
-    for wallet_address in limited_seeds:
+    for i, wallet_address in enumerate(limited_seeds):
+        metrics.QUEUE_DEPTH.labels("discovery").set(len(limited_seeds) - i)
         try:
             # 获取钱包的最近交易
-            recent_txs = await solana_connection.get_recent_transactions(wallet_address, limit=10)
+            recent_txs = await rpc_client.get_signatures(solana_connection, wallet_address, limit=10)
             
             # 从交易中提取相关联的钱包
             for tx_info in recent_txs:
@@ -201,22 +496,26 @@ async def discover_wallets(seed_wallets: List[str], max_count: int = 10) -> List
                 if not signature:
                     continue
                     
-                tx_detail = await solana_connection.get_transaction(signature)
+                tx_detail = await fetch_lean_transaction(signature)
                 if not tx_detail:
                     continue
                     
-                # 提取交易涉及的账户
+                # 提取交易涉及的账户，并记录到关系图
                 accounts = await extract_accounts_from_tx(tx_detail)
+                if wallet_graph is not None:
+                    wallet_graph.add_co_trades(wallet_address, accounts, tx_detail.get("blockTime"))
                 
                 # 添加新发现的钱包
                 for account in accounts:
                     if account not in known_wallets and account not in new_wallets:
                         new_wallets.add(account)
+                        metrics.WALLETS_PROCESSED.labels("discovered").inc()
                         if len(new_wallets) >= max_count:
                             break  # 达到最大数量限制
         except Exception as e:
             logger.error(f"处理钱包 {wallet_address} 交易出错: {e}")
     
+    metrics.QUEUE_DEPTH.labels("discovery").set(0)
     return list(new_wallets)
 
 def initialize_output_file():
@@ -229,10 +528,9 @@ def initialize_output_file():
             f.write(f"# 筛选条件: 胜率>={settings.WIN_RATE_THRESHOLD}%, 盈亏比>={settings.PROFIT_LOSS_RATIO}, " 
                     f"日均交易>={settings.MIN_DAILY_TRADES}, 持仓时间<={settings.MAX_HOLDING_HOURS}小时\n\n")
             
-            f.write("地址,余额(SOL),胜率(%),盈亏比,日均交易,平均持仓(小时),交易总数,最后活跃时间,发现时间\n")
+            f.write("地址,余额(SOL),胜率(%),盈亏比,日均交易,平均持仓(小时),交易总数,持仓价值(SOL),最后活跃时间,发现时间\n")
         
         logger.info(f"已初始化输出文件: {output_filename}")
-        print(f"已初始化输出文件: {output_filename}")
     except Exception as e:
         logger.error(f"初始化输出文件出错: {e}")
 
@@ -240,22 +538,36 @@ def save_smart_wallet(wallet: Dict[str, Any]):
     """立即保存单个聪明钱包到文件"""
     global output_filename
     
+    metrics.WALLETS_PROCESSED.labels("qualified").inc()
     try:
-        with open(output_filename, "a") as f:
+        with metrics.DB_COMMIT_LATENCY.labels("output_file").time(), open(output_filename, "a") as f:
             discovery_time = datetime.datetime.now().isoformat()
             f.write(f"{wallet['address']},{wallet['balance']:.2f},{wallet['win_rate']:.2f},"
                     f"{wallet['profit_loss_ratio']:.2f},{wallet['daily_trades']:.1f},"
-                    f"{wallet['avg_holding_time']:.1f},{wallet['total_trades']},"
+                    f"{wallet['avg_holding_time']:.1f},{wallet['total_trades']},{wallet['open_position_value']:.2f},"
                     f"{wallet['last_active'] or 'N/A'},{discovery_time}\n")
         
-        logger.info(f"已保存聪明钱包: {wallet['address']}")
-        print(f"已发现并保存聪明钱包: {wallet['address']}")
+        logger.info(f"已发现并保存聪明钱包: {wallet['address']}")
     except Exception as e:
         logger.error(f"保存聪明钱包出错: {e}")
 
 async def main():
     """主函数"""
-    global known_wallets, smart_wallets
+    global known_wallets, smart_wallets, blob_store, wallet_graph, scan_scheduler, signal_store, position_store
+    
+    # 控制台/文件日志改由后台线程写出，扫描热路径上只做入队
+    log_listener = enable_queued_logging(logger, json_format=LOG_JSON)
+    
+    # 启动事件循环延迟监控和指标服务
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    token_task = None
+    metrics_server = None
+    if METRICS_PORT:
+        metrics.register_stream_route("/events", sse_route)
+        metrics.register_stream_route("/debug/trace", trace_route, "application/json", admin=True)
+        metrics.register_stream_route("/debug/profile", profile_route, "text/plain; charset=utf-8", admin=True)
+        metrics_server = await metrics.start_metrics_server(port=METRICS_PORT)
+        logger.info(f"指标服务已启动: http://127.0.0.1:{METRICS_PORT}/metrics (事件推送: /events)")
     
     try:
         # 初始化Solana连接
@@ -263,6 +575,12 @@ async def main():
         
         # 确保数据目录存在
         os.makedirs("app/data", exist_ok=True)
+        blob_store = BlobStore()
+        wallet_graph = WalletGraph()
+        scan_scheduler = ScanScheduler()
+        signal_store = SignalStore()
+        position_store = PositionStore()
+        token_task = asyncio.create_task(token_registry.run(solana_connection))
         
         # 初始化输出文件
         initialize_output_file()
@@ -274,14 +592,12 @@ async def main():
         # 初始化已知钱包集合
         known_wallets = set(seed_wallets)
         
-        # 分析种子钱包
-        logger.info("开始分析种子钱包...")
-        for address in seed_wallets:
-            wallet_data = await analyze_wallet(address)
-            if wallet_data and wallet_data["is_smart_wallet"]:
-                smart_wallets.append(wallet_data)
-                # 即时保存找到的聪明钱包
-                save_smart_wallet(wallet_data)
+        # 分析到期的钱包：新的种子钱包立即到期，已分析过的钱包按保存的计划时间
+        scan_scheduler.add(seed_wallets)
+        due_wallets = scan_scheduler.pop_due(limit=RESCAN_BATCH_SIZE)
+        known_wallets.update(due_wallets)
+        logger.info(f"开始分析 {len(due_wallets)} 个到期钱包...")
+        deferred = await analyze_wallets(due_wallets)
         
         # 继续寻找新钱包的循环
         scan_rounds = 2  # 设置扫描轮数
@@ -293,21 +609,17 @@ async def main():
             new_wallets = await discover_wallets(list(known_wallets), max_count=5)  # 限制数量
             logger.info(f"发现 {len(new_wallets)} 个新钱包")
             
-            if not new_wallets:
+            if not new_wallets and not deferred:
                 logger.info("没有发现新钱包，停止扫描")
                 break
                 
-            # 将新钱包添加到已知集合
+            # 将新钱包添加到已知集合和重新扫描计划
             known_wallets.update(new_wallets)
+            scan_scheduler.add(new_wallets)
             
-            # 分析新发现的钱包
+            # 分析上一轮顺延的钱包和新发现的钱包
             logger.info(f"分析第 {round_num} 轮发现的新钱包...")
-            for address in new_wallets:
-                wallet_data = await analyze_wallet(address)
-                if wallet_data and wallet_data["is_smart_wallet"]:
-                    smart_wallets.append(wallet_data)
-                    # 即时保存找到的聪明钱包
-                    save_smart_wallet(wallet_data)
+            deferred = await analyze_wallets(deferred + new_wallets)
         
         # 最终报告
         if smart_wallets:
@@ -317,11 +629,39 @@ async def main():
             logger.warning("未找到符合条件的聪明钱包")
             print("未找到符合条件的聪明钱包")
         
+        if RESCAN_LOOP:
+            await rescan_loop()
+        
     except Exception as e:
         logger.error(f"运行出错: {e}")
     finally:
-        # 关闭连接
+        # 写入剩余的代币计数并关闭连接
+        if token_task is not None:
+            token_task.cancel()
+        try:
+            token_registry.flush()
+        except Exception as e:
+            logger.error(f"写入代币数据失败: {e}")
         await close_connection()
+        if blob_store is not None:
+            blob_store.close()
+        if wallet_graph is not None:
+            wallet_graph.close()
+        if scan_scheduler is not None:
+            scan_scheduler.close()
+        if signal_store is not None:
+            signal_store.close()
+        if position_store is not None:
+            position_store.close()
+        if tracer.event_count:
+            try:
+                logger.info(f"追踪数据已写入: {tracer.dump()}")
+            except Exception as e:
+                logger.error(f"写入追踪数据失败: {e}")
+        lag_monitor.cancel()
+        if metrics_server:
+            metrics_server.close()
+        log_listener.stop()
 
 # 主函数
 if __name__ == "__main__":
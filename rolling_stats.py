@@ -0,0 +1,147 @@
+"""
+钱包滚动窗口统计 - 按天分桶的环形缓冲区，增量更新并随时间淘汰过期数据
+
+每笔新交易只更新当天的桶和窗口累计值，重新评分时不需要重新加载整个分析周期的交易
+"""
+
+from typing import Any, Dict, List, Optional
+
+from lot_ledger import LotLedger
+
+SECONDS_PER_DAY = 86400
+
+# 盈亏比上限：没有亏损交易时取该值，避免inf写入输出文件、JSON和筛选SQL
+MAX_PROFIT_LOSS_RATIO = 100.0
+
+# 每个日桶的字段
+BUCKET_FIELDS = ("trades", "wins", "losses", "profit", "loss", "holding_hours", "holding_count")
+
+class WalletRollup:
+    """单个钱包的滚动窗口统计"""
+
+    __slots__ = ("days", "_bucket_day", "_buckets", "_totals", "ledger",
+                 "first_trade_time", "last_trade_time", "last_signature")
+
+    def __init__(self, days: int = 30):
+        self.days = days
+        # 环形缓冲区: 第i个桶保存(日序号 % days == i)那天的数据，_bucket_day记录桶对应的日序号
+        self._bucket_day: List[int] = [-1] * days
+        self._buckets: Dict[str, List[float]] = {field: [0.0] * days for field in BUCKET_FIELDS}
+        self._totals: Dict[str, float] = {field: 0.0 for field in BUCKET_FIELDS}
+        # 按先进先出匹配买卖批次的持仓账本
+        self.ledger = LotLedger()
+        self.first_trade_time: Optional[int] = None
+        self.last_trade_time: Optional[int] = None
+        # 已处理的最新交易签名，下次只处理比它更新的交易
+        self.last_signature: Optional[str] = None
+
+    def _expire(self, today: int):
+        """淘汰窗口外的桶，从累计值中减去"""
+        oldest = today - self.days + 1
+        for i, day in enumerate(self._bucket_day):
+            if 0 <= day < oldest:
+                for field in BUCKET_FIELDS:
+                    self._totals[field] -= self._buckets[field][i]
+                    self._buckets[field][i] = 0.0
+                self._bucket_day[i] = -1
+
+    def _add(self, timestamp: int, **values: float):
+        """向交易发生当天的桶累加数据"""
+        day = timestamp // SECONDS_PER_DAY
+        i = day % self.days
+        if self._bucket_day[i] != day:
+            if self._bucket_day[i] > day:
+                return  # 交易早于该桶当前所属日期，已在窗口之外
+            for field in BUCKET_FIELDS:
+                self._totals[field] -= self._buckets[field][i]
+                self._buckets[field][i] = 0.0
+            self._bucket_day[i] = day
+        for field, value in values.items():
+            self._buckets[field][i] += value
+            self._totals[field] += value
+
+    def ingest(self, swaps: List[Any]):
+        """按时间顺序处理新的swap(DecodedSwap)，更新持仓批次和日桶
+
+        每笔卖出按先进先出匹配买入批次，盈亏为各批次已实现盈亏之和，
+        持仓时长为各批次(卖出时间 - 该批次买入时间)按数量加权的平均值
+        """
+        for swap in swaps:
+            timestamp = swap.block_time
+            if not timestamp:
+                continue
+            if self.first_trade_time is None or timestamp < self.first_trade_time:
+                self.first_trade_time = timestamp
+            if self.last_trade_time is None or timestamp > self.last_trade_time:
+                self.last_trade_time = timestamp
+
+            self._add(timestamp, trades=1)
+
+            closed = self.ledger.apply(swap)
+            if not closed:
+                continue  # 买入，或没有对应买入的卖出
+
+            pnl = sum(lot.pnl for lot in closed)
+            amount = sum(lot.amount for lot in closed)
+            holding_seconds = sum(lot.holding_seconds * lot.amount for lot in closed) / amount
+
+            if pnl > 0:
+                self._add(timestamp, wins=1, profit=pnl)
+            else:
+                self._add(timestamp, losses=1, loss=-pnl)
+            self._add(timestamp, holding_hours=holding_seconds / 3600, holding_count=1)
+
+    def state(self) -> Dict[str, Any]:
+        """可保存的统计状态(不含持仓批次，批次由PositionStore单独保存)"""
+        return {
+            "days": self.days,
+            "bucket_day": self._bucket_day,
+            "buckets": self._buckets,
+            "first_trade_time": self.first_trade_time,
+            "last_trade_time": self.last_trade_time,
+            "last_signature": self.last_signature
+        }
+
+    def restore(self, state: Dict[str, Any], positions: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """从保存的状态和未平仓批次恢复，窗口天数不同时不恢复
+
+        Returns:
+            是否已恢复
+        """
+        if state.get("days") != self.days:
+            return False
+        self._bucket_day = list(state["bucket_day"])
+        self._buckets = {field: list(state["buckets"][field]) for field in BUCKET_FIELDS}
+        self._totals = {field: sum(values) for field, values in self._buckets.items()}
+        self.first_trade_time = state["first_trade_time"]
+        self.last_trade_time = state["last_trade_time"]
+        self.last_signature = state["last_signature"]
+        self.ledger.restore(positions)
+        return True
+
+    def snapshot(self, now: int) -> Dict[str, Any]:
+        """计算当前窗口内的统计指标"""
+        self._expire(now // SECONDS_PER_DAY)
+        totals = self._totals
+
+        wins, losses = int(round(totals["wins"])), int(round(totals["losses"]))
+        closed_trades = wins + losses
+        avg_profit = totals["profit"] / wins if wins else 0.0
+        avg_loss = totals["loss"] / losses if losses else 0.0
+
+        # 日均交易: 按窗口天数与首笔交易至今天数中的较小者计算，不足1天按1天
+        observed_days = (now - self.first_trade_time) / SECONDS_PER_DAY if self.first_trade_time else 0.0
+        active_days = max(min(float(self.days), observed_days), 1.0)
+
+        return {
+            "total_trades": int(round(totals["trades"])),
+            "closed_trades": closed_trades,
+            "winning_trades": wins,
+            "win_rate": wins / closed_trades * 100 if closed_trades else 0.0,
+            "total_profit": totals["profit"],
+            "total_loss": totals["loss"],
+            "profit_loss_ratio": (min(avg_profit / avg_loss, MAX_PROFIT_LOSS_RATIO) if avg_loss
+                                  else (MAX_PROFIT_LOSS_RATIO if avg_profit else 0.0)),
+            "daily_trades": totals["trades"] / active_days,
+            "avg_holding_time": totals["holding_hours"] / totals["holding_count"] if totals["holding_count"] else 0.0
+        }
@@ -0,0 +1,152 @@
+"""
+轻量JSON-RPC调用 - 按获取配置请求最小交易编码，并裁剪为分析所需的精简结构
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from http_transport import get_transport
+from tracing import CAT_PARSE, CAT_RPC, get_tracer
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # 未安装orjson时回退到标准库json
+    _loads = json.loads
+
+# 交易获取配置(getTransaction参数)
+#   swap:   分析用，json编码(比jsonParsed小，指令不展开)，支持v0交易
+#   parsed: 详情展示用，jsonParsed编码
+FETCH_PROFILES: Dict[str, Dict[str, Any]] = {
+    "swap": {"encoding": "json", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"},
+    "parsed": {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"},
+}
+
+# 精简交易中保留的meta字段，丢弃logMessages/innerInstructions/rewards等大字段
+LEAN_META_FIELDS = (
+    "err", "fee", "preBalances", "postBalances",
+    "preTokenBalances", "postTokenBalances", "loadedAddresses"
+)
+
+class RpcError(Exception):
+    """JSON-RPC返回的错误"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"RPC错误 {code}: {message}")
+        self.code = code
+        self.message = message
+
+async def rpc_call(session, url: str, method: str, params: List[Any], timeout: float = 60) -> Any:
+    """发送一次JSON-RPC请求并返回result字段
+
+    直接解码响应字节，不经过solana-py的类型化响应对象
+
+    Args:
+        session: http_transport.HttpTransport或aiohttp会话
+    """
+    endpoint = metrics.endpoint_label(url)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        tracer = get_tracer()
+        with tracer.span(method, CAT_RPC, endpoint=endpoint):
+            async with session.post(
+                url,
+                json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+                timeout=timeout
+            ) as response:
+                if response.status != 200:
+                    status = f"http_{response.status}"
+                    raise RpcError(response.status, f"HTTP状态码: {response.status}")
+                body = await response.read()
+        with tracer.span("json_decode", CAT_PARSE, method=method, size=len(body)):
+            data = _loads(body)
+        if "error" in data:
+            error = data["error"]
+            status = str(error.get("code", "error"))
+            raise RpcError(error.get("code", -1), error.get("message", ""))
+        return data.get("result")
+    except RpcError:
+        raise
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        metrics.RPC_LATENCY.labels(method, endpoint).observe(time.perf_counter() - start)
+        metrics.RPC_REQUESTS.labels(method, endpoint, status).inc()
+
+def parse_lean_transaction(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """将getTransaction结果裁剪为分析所需的精简结构
+
+    保留的结构与原始结果一致(transaction.signatures/message.accountKeys/header、meta余额字段)，
+    可直接交给swap_decoder.decode_swap和extract_accounts_from_tx使用
+    """
+    if not result:
+        return None
+
+    meta = result.get("meta") or {}
+    transaction = result.get("transaction") or {}
+    message = transaction.get("message") or {}
+    signatures = transaction.get("signatures") or []
+
+    return {
+        "slot": result.get("slot"),
+        "blockTime": result.get("blockTime"),
+        "transaction": {
+            "signatures": signatures[:1],
+            "message": {"accountKeys": message.get("accountKeys", []), "header": message.get("header")}
+        },
+        "meta": {field: meta[field] for field in LEAN_META_FIELDS if field in meta}
+    }
+
+async def connection_call(connection, method: str, params: List[Any]) -> Any:
+    """通过共享连接池调用SolanaConnection所配置节点的RPC方法
+
+    Args:
+        connection: SolanaConnection实例，使用其rpc_url、timeout和proxy
+    """
+    transport = get_transport(getattr(connection, "proxy", None))
+    return await rpc_call(transport, connection.rpc_url, method, params, timeout=connection.timeout)
+
+async def fetch_transaction(connection, signature: str, profile: str = "swap",
+                            lean: bool = True) -> Optional[Dict[str, Any]]:
+    """按获取配置请求交易详情
+
+    Args:
+        connection: SolanaConnection实例
+        signature: 交易签名
+        profile: FETCH_PROFILES中的配置名，swap配置默认返回精简结构
+        lean: 为False时返回未裁剪的getTransaction结果(用于保存原始数据)
+    """
+    result = await connection_call(connection, "getTransaction", [signature, FETCH_PROFILES[profile]])
+    if profile == "swap" and lean:
+        return parse_lean_transaction(result)
+    return result
+
+async def get_balance(connection, address: str) -> float:
+    """获取SOL余额"""
+    result = await connection_call(connection, "getBalance", [address, {"commitment": "confirmed"}])
+    return float((result or {}).get("value", 0)) / 1_000_000_000
+
+async def get_signatures(connection, address: str, limit: int = 100,
+                         before: Optional[str] = None) -> List[Dict[str, Any]]:
+    """获取钱包最近的交易签名(新的在前)，格式与SolanaConnection.get_recent_transactions一致
+
+    Args:
+        before: 只返回早于该签名的交易，用于向更早的历史翻页
+    """
+    options: Dict[str, Any] = {"limit": limit}
+    if before:
+        options["before"] = before
+    result = await connection_call(connection, "getSignaturesForAddress", [address, options])
+    return result or []
+
+async def test_connection(connection) -> Tuple[bool, str]:
+    """测试节点连接，返回(是否成功, 说明)"""
+    try:
+        result = await connection_call(connection, "getVersion", [])
+        return True, f"连接正常，版本: {result}"
+    except Exception as e:
+        return False, f"连接错误: {e}"
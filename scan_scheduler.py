@@ -0,0 +1,144 @@
+"""
+钱包重新扫描调度 - 按钱包的活跃度和分类安排下次分析时间
+
+活跃的聪明钱包每几分钟重新分析，长期不活跃的钱包每天一次；
+计划保存在SQLite中，内存中用最小堆取出到期的钱包
+"""
+
+import heapq
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+# 默认存储文件
+DEFAULT_SCHEDULE_DB = os.path.join("app/data", "scan_schedule.db")
+
+# 重新扫描间隔(分钟)
+RESCAN_HOT_MINUTES = float(os.getenv("RESCAN_HOT_MINUTES", "5"))          # 近1小时有交易的聪明钱包
+RESCAN_SMART_MINUTES = float(os.getenv("RESCAN_SMART_MINUTES", "30"))     # 其他聪明钱包
+RESCAN_ACTIVE_MINUTES = float(os.getenv("RESCAN_ACTIVE_MINUTES", "60"))   # 近1天有交易的普通钱包
+RESCAN_DORMANT_MINUTES = float(os.getenv("RESCAN_DORMANT_MINUTES", "1440"))  # 不活跃钱包
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_schedule (
+    address TEXT PRIMARY KEY,
+    next_due INTEGER NOT NULL,
+    interval_seconds INTEGER NOT NULL,
+    is_smart INTEGER NOT NULL DEFAULT 0,
+    last_active INTEGER,
+    last_scanned INTEGER
+) WITHOUT ROWID;
+"""
+
+def rescan_interval(is_smart: bool, last_active: Optional[int], now: int) -> int:
+    """根据分类和最近活跃时间计算重新扫描间隔(秒)"""
+    idle = now - last_active if last_active else None
+    if is_smart and idle is not None and idle <= 3600:
+        minutes = RESCAN_HOT_MINUTES
+    elif is_smart:
+        minutes = RESCAN_SMART_MINUTES
+    elif idle is not None and idle <= 86400:
+        minutes = RESCAN_ACTIVE_MINUTES
+    else:
+        minutes = RESCAN_DORMANT_MINUTES
+    return int(minutes * 60)
+
+class ScanScheduler:
+    """钱包重新扫描计划"""
+
+    def __init__(self, path: str = DEFAULT_SCHEDULE_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        # 堆中可能存在过期的条目，以_due中的时间为准(惰性删除)
+        self._due: Dict[str, int] = dict(self._conn.execute("SELECT address, next_due FROM wallet_schedule"))
+        self._heap: List[Tuple[int, str]] = [(due, address) for address, due in self._due.items()]
+        heapq.heapify(self._heap)
+        metrics.QUEUE_DEPTH.labels("rescan").set(len(self._due))
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._due
+
+    def _push(self, address: str, due: int):
+        self._due[address] = due
+        heapq.heappush(self._heap, (due, address))
+
+    def add(self, addresses: List[str], due: Optional[int] = None):
+        """登记新钱包(已登记的钱包不变)，默认立即到期"""
+        due = int(time.time()) if due is None else due
+        rows = []
+        for address in addresses:
+            if address not in self._due:
+                self._push(address, due)
+                rows.append((address, due, int(RESCAN_ACTIVE_MINUTES * 60)))
+        if rows:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO wallet_schedule (address, next_due, interval_seconds) VALUES (?, ?, ?)", rows
+            )
+            self._commit()
+        metrics.QUEUE_DEPTH.labels("rescan").set(len(self._due))
+
+    def record_result(self, address: str, is_smart: bool, last_active: Optional[int], now: Optional[int] = None) -> int:
+        """记录一次分析结果并安排下次扫描
+
+        Returns:
+            下次到期时间
+        """
+        now = int(time.time()) if now is None else now
+        interval = rescan_interval(is_smart, last_active, now)
+        due = now + interval
+        self._push(address, due)
+        self._conn.execute(
+            "INSERT INTO wallet_schedule (address, next_due, interval_seconds, is_smart, last_active, last_scanned) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (address) DO UPDATE SET "
+            "next_due = excluded.next_due, interval_seconds = excluded.interval_seconds, "
+            "is_smart = excluded.is_smart, last_active = COALESCE(excluded.last_active, last_active), "
+            "last_scanned = excluded.last_scanned",
+            (address, due, interval, int(is_smart), last_active, now)
+        )
+        self._commit()
+        return due
+
+    def postpone(self, address: str, due: int):
+        """推迟钱包的下次扫描时间(如分析超时或被预算截断)"""
+        self._push(address, due)
+        self._conn.execute("UPDATE wallet_schedule SET next_due = ? WHERE address = ?", (due, address))
+        self._commit()
+
+    def pop_due(self, now: Optional[int] = None, limit: int = 100) -> List[str]:
+        """取出已到期的钱包(按到期时间先后)，取出后需通过record_result或postpone重新安排"""
+        now = int(time.time()) if now is None else now
+        due_wallets = []
+        while self._heap and len(due_wallets) < limit and self._heap[0][0] <= now:
+            due, address = heapq.heappop(self._heap)
+            if self._due.get(address) != due:
+                continue  # 已被重新安排的过期条目
+            del self._due[address]
+            due_wallets.append(address)
+        metrics.QUEUE_DEPTH.labels("rescan").set(len(self._due))
+        return due_wallets
+
+    def next_due_time(self) -> Optional[int]:
+        """最早的到期时间，没有计划时返回None"""
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _commit(self):
+        with metrics.DB_COMMIT_LATENCY.labels("scan_schedule").time():
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
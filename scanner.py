@@ -0,0 +1,92 @@
+"""
+钱包扫描进程 - 独立于Web服务运行WalletScanner
+
+通过文件锁选出唯一的扫描进程，重复启动(或部署了多个实例)时只有持有锁的进程扫描，
+其他进程等待锁释放后接替
+
+用法:
+    python scanner.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import IO, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 加载环境变量
+load_dotenv()
+
+# 扫描进程锁文件
+SCANNER_LOCK_FILE = os.getenv("SCANNER_LOCK_FILE", os.path.join("app/data", "scanner.lock"))
+# 未获得锁时重试的间隔(秒)
+SCANNER_LOCK_RETRY_SECONDS = float(os.getenv("SCANNER_LOCK_RETRY_SECONDS", "30"))
+
+def acquire_leader_lock(path: str = SCANNER_LOCK_FILE) -> Optional[IO]:
+    """尝试获取扫描进程锁(非阻塞)
+
+    Returns:
+        持有锁的文件对象(进程退出时自动释放)，锁已被其他进程持有时返回None
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    lock_file = open(path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+
+    # 记录持有锁的进程ID，便于排查
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+async def run_scanner():
+    """初始化数据库并运行钱包扫描器"""
+    from app.core.config import get_settings
+    from app.core.database import init_db
+    from app.services.wallet_scanner import start_scanner
+
+    settings = get_settings()
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    init_db()
+    await start_scanner()
+
+def main() -> int:
+    from app.utils.logger import get_logger
+    logger = get_logger()
+
+    lock = acquire_leader_lock()
+    while lock is None:
+        logger.info(f"已有扫描进程在运行，{SCANNER_LOCK_RETRY_SECONDS:.0f}秒后重试获取锁: {SCANNER_LOCK_FILE}")
+        time.sleep(SCANNER_LOCK_RETRY_SECONDS)
+        lock = acquire_leader_lock()
+
+    logger.info(f"已获得扫描进程锁(PID {os.getpid()})，启动钱包扫描器")
+    try:
+        asyncio.run(run_scanner())
+    except KeyboardInterrupt:
+        logger.info("扫描器已停止")
+    finally:
+        lock.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+聪明钱包批量重新筛选 - 用新阈值一次性重新分类所有已保存的钱包指标
+
+支持命名的阈值配置并排比较，不需要重新抓取链上数据
+
+用法:
+    python screening.py compare [主数据库路径]
+    python screening.py rescreen <配置名> [主数据库路径]
+"""
+
+import json
+import math
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 主数据库默认路径(对应DATABASE_URL=sqlite:///./smart_wallets.db)
+DEFAULT_MAIN_DB = "smart_wallets.db"
+
+# 自定义阈值配置文件(可选)，格式: {"配置名": {"win_rate": 75, ...}}
+PROFILES_FILE = os.path.join("app/data", "screening_profiles.json")
+
+# 阈值字段: 配置键 -> (钱包指标列, 比较方式)
+THRESHOLD_FIELDS = {
+    "win_rate": ("win_rate", ">="),
+    "profit_loss_ratio": ("profit_loss_ratio", ">="),
+    "daily_trades": ("daily_trades", ">="),
+    "holding_hours": ("avg_holding_time", "<="),
+}
+
+def profile_from_settings(settings) -> Dict[str, float]:
+    """从配置对象(WIN_RATE_THRESHOLD等字段)生成阈值配置"""
+    return {
+        "win_rate": float(settings.WIN_RATE_THRESHOLD),
+        "profit_loss_ratio": float(settings.PROFIT_LOSS_RATIO),
+        "daily_trades": float(settings.MIN_DAILY_TRADES),
+        "holding_hours": float(settings.MAX_HOLDING_HOURS),
+    }
+
+def get_profiles(settings=None) -> Dict[str, Dict[str, float]]:
+    """获取所有命名阈值配置
+
+    default来自当前配置，另有内置的strict/relaxed，以及PROFILES_FILE中的自定义配置
+    """
+    default = profile_from_settings(settings) if settings is not None else {
+        "win_rate": 70.0, "profit_loss_ratio": 3.0, "daily_trades": 20.0, "holding_hours": 24.0
+    }
+    profiles = {
+        "default": default,
+        "strict": {"win_rate": 80.0, "profit_loss_ratio": 4.0, "daily_trades": 30.0, "holding_hours": 12.0},
+        "relaxed": {"win_rate": 60.0, "profit_loss_ratio": 2.0, "daily_trades": 10.0, "holding_hours": 48.0},
+    }
+
+    if os.path.exists(PROFILES_FILE):
+        with open(PROFILES_FILE, "r") as f:
+            for name, values in json.load(f).items():
+                profiles[name] = {**default, **{k: float(v) for k, v in values.items() if k in THRESHOLD_FIELDS}}
+    return profiles
+
+def screen_columns(columns: Dict[str, np.ndarray], profile: Dict[str, float]) -> np.ndarray:
+    """对列式钱包指标做向量化筛选，返回布尔掩码"""
+    mask = None
+    for key, (column, op) in THRESHOLD_FIELDS.items():
+        values = np.asarray(columns[column])
+        passed = values >= profile[key] if op == ">=" else values <= profile[key]
+        mask = passed if mask is None else mask & passed
+    return mask
+
+def _sql_condition(profile: Dict[str, float]) -> Tuple[str, List[float]]:
+    """生成筛选条件SQL和绑定参数
+
+    阈值以参数传入(inf表示不限制，SQLite按REAL比较)；NaN无法比较，直接拒绝
+    """
+    params = []
+    for key in THRESHOLD_FIELDS:
+        value = float(profile[key])
+        if math.isnan(value):
+            raise ValueError(f"阈值 {key} 不能为NaN")
+        params.append(value)
+    condition = " AND ".join(f"{column} {op} ?" for column, op in THRESHOLD_FIELDS.values())
+    return condition, params
+
+def compare_profiles_sql(db_path: str, profiles: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, Any]]:
+    """在一次扫描中统计每个配置下的聪明钱包数量及平均指标"""
+    names = list(profiles)
+    selects = []
+    params: List[float] = []
+    for name in names:
+        condition, condition_params = _sql_condition(profiles[name])
+        selects.append(f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)")
+        selects.append(f"AVG(CASE WHEN {condition} THEN win_rate END)")
+        selects.append(f"AVG(CASE WHEN {condition} THEN profit_loss_ratio END)")
+        params.extend(condition_params * 3)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(f"SELECT COUNT(*), {', '.join(selects)} FROM smart_wallets", params).fetchone()
+    finally:
+        conn.close()
+
+    total = row[0]
+    result = {}
+    for i, name in enumerate(names):
+        count, avg_win_rate, avg_ratio = row[1 + i * 3:4 + i * 3]
+        result[name] = {
+            "thresholds": profiles[name],
+            "total_wallets": total,
+            "smart_wallet_count": count or 0,
+            "avg_win_rate": avg_win_rate or 0,
+            "avg_profit_loss_ratio": avg_ratio or 0,
+        }
+    return result
+
+def rescreen_sql(db_path: str, profile: Dict[str, float]) -> Dict[str, int]:
+    """用一条UPDATE语句按新阈值重新标记所有钱包
+
+    Returns:
+        {"smart_wallet_count": 新的聪明钱包数量, "changed": 标记发生变化的钱包数量}
+    """
+    condition, params = _sql_condition(profile)
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(
+            f"UPDATE smart_wallets SET is_smart_wallet = CASE WHEN {condition} THEN 1 ELSE 0 END "
+            f"WHERE is_smart_wallet IS NOT (CASE WHEN {condition} THEN 1 ELSE 0 END)",
+            params * 2
+        )
+        changed = cursor.rowcount
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM smart_wallets WHERE is_smart_wallet = 1").fetchone()[0]
+    finally:
+        conn.close()
+    return {"smart_wallet_count": count, "changed": changed}
+
+def _print_comparison(comparison: Dict[str, Dict[str, Any]]):
+    print(f"{'配置':<12} {'胜率':>6} {'盈亏比':>6} {'日均':>6} {'持仓':>6} {'聪明钱包':>8} {'平均胜率':>8} {'平均盈亏比':>10}")
+    print("-" * 80)
+    for name, item in comparison.items():
+        t = item["thresholds"]
+        print(f"{name:<12} {t['win_rate']:>6.1f} {t['profit_loss_ratio']:>6.1f} {t['daily_trades']:>6.1f} "
+              f"{t['holding_hours']:>6.1f} {item['smart_wallet_count']:>8} "
+              f"{item['avg_win_rate']:>8.2f} {item['avg_profit_loss_ratio']:>10.2f}")
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    profiles = get_profiles()
+
+    if argv and argv[0] == "compare":
+        db_path = argv[1] if len(argv) > 1 else DEFAULT_MAIN_DB
+        _print_comparison(compare_profiles_sql(db_path, profiles))
+        return 0
+
+    if len(argv) >= 2 and argv[0] == "rescreen":
+        if argv[1] not in profiles:
+            print(f"未知配置: {argv[1]}，可用配置: {', '.join(profiles)}")
+            return 1
+        db_path = argv[2] if len(argv) > 2 else DEFAULT_MAIN_DB
+        result = rescreen_sql(db_path, profiles[argv[1]])
+        print(f"已按配置 {argv[1]} 重新筛选: 聪明钱包 {result['smart_wallet_count']} 个，"
+              f"标记变化 {result['changed']} 个")
+        return 0
+
+    print(__doc__)
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Swap交易解码器 - 按调用的程序ID识别DEX，从余额变化推导买卖方向、代币和SOL金额
+
+所有DEX共用同一个余额变化解码器，程序ID表只用于快速过滤非swap交易和标注DEX名称
+(精简交易不保留指令数据，无法按程序解析指令)。
+支持getTransaction返回的json/jsonParsed两种编码(含v0交易的loadedAddresses)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Wrapped SOL的mint，按SOL处理
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+
+# 稳定币，作为计价腿时不视为买卖标的
+STABLE_MINTS = frozenset({
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",  # USDT
+})
+
+class DecodedSwap:
+    """解码后的一笔swap"""
+
+    __slots__ = ("signature", "block_time", "dex", "side", "token_mint",
+                 "token_amount", "sol_amount", "fee", "pool")
+
+    def __init__(self, signature: Optional[str], block_time: Optional[int], dex: str, side: str,
+                 token_mint: str, token_amount: float, sol_amount: float, fee: float,
+                 pool: Optional[Tuple[str, str]] = None):
+        self.signature = signature
+        self.block_time = block_time
+        self.dex = dex
+        self.side = side                   # buy / sell / swap(代币换代币)
+        self.token_mint = token_mint
+        self.token_amount = token_amount   # 代币数量(正数)
+        self.sol_amount = sol_amount       # 支付或收到的SOL(正数，不含手续费)
+        self.fee = fee                     # 交易手续费(SOL)
+        self.pool = pool                   # 恒定乘积池的(代币储备账户, wSOL储备账户)，无法确定时为None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+# 按储备比例定价的恒定乘积AMM，这些DEX的swap可以登记池子储备账户用于刷新价格
+CONSTANT_PRODUCT_DEXES = frozenset({"raydium_amm", "raydium_cpmm", "orca_v2", "pump_amm"})
+
+def _find_pool_vaults(meta: Dict[str, Any], keys: List[str], wallet: str, mint: str,
+                      token_delta: float) -> Optional[Tuple[str, str]]:
+    """找出swap的池子储备账户: 非钱包所有、该代币变化方向与钱包相反的账户，及同一所有者反向变化的wSOL账户
+
+    只有唯一候选时返回(代币储备账户, wSOL储备账户)
+    """
+    # (所有者, mint) -> [账户索引, 原始数量变化]
+    changes: Dict[Tuple[str, str], List[int]] = {}
+    for sign, balances in ((-1, meta.get("preTokenBalances") or ()), (1, meta.get("postTokenBalances") or ())):
+        for balance in balances:
+            owner = balance.get("owner")
+            index = balance.get("accountIndex")
+            if owner == wallet or index is None or balance["mint"] not in (mint, WSOL_MINT):
+                continue
+            entry = changes.setdefault((owner, balance["mint"]), [index, 0])
+            entry[1] += sign * int(balance["uiTokenAmount"]["amount"])
+
+    candidates = []
+    for (owner, vault_mint), (index, delta) in changes.items():
+        if vault_mint != mint or delta == 0 or (delta > 0) == (token_delta > 0):
+            continue
+        sol_vault = changes.get((owner, WSOL_MINT))
+        if sol_vault is not None and sol_vault[1] != 0 and (sol_vault[1] > 0) != (delta > 0):
+            candidates.append((keys[index], keys[sol_vault[0]]))
+    return candidates[0] if len(candidates) == 1 else None
+
+def _decode_balance_swap(tx: Dict[str, Any], wallet: str, wallet_index: int, dex: str,
+                         keys: List[str]) -> Optional[DecodedSwap]:
+    """通用解码: 比较钱包的SOL和代币余额变化"""
+    meta = tx["meta"]
+
+    # 代币余额变化(仅统计该钱包持有的账户)
+    deltas: Dict[str, float] = {}
+    # 账户索引 -> 出现情况(-1仅交易前，1仅交易后，0前后都有)；wSOL账户另记原始数量变化
+    presence: Dict[int, int] = {}
+    wsol_raw: Dict[int, int] = {}
+    for sign, balances in ((-1, meta.get("preTokenBalances") or ()), (1, meta.get("postTokenBalances") or ())):
+        for balance in balances:
+            if balance.get("owner") != wallet:
+                continue
+            ui_amount = balance["uiTokenAmount"]
+            raw = int(ui_amount["amount"])
+            mint = balance["mint"]
+            deltas[mint] = deltas.get(mint, 0.0) + sign * raw / 10 ** ui_amount["decimals"]
+            index = balance.get("accountIndex")
+            if index is not None:
+                presence[index] = presence.get(index, 0) + sign
+                if mint == WSOL_MINT:
+                    wsol_raw[index] = wsol_raw.get(index, 0) + sign * raw
+
+    fee = meta.get("fee", 0) / LAMPORTS_PER_SOL
+
+    # SOL变化 = 原生SOL变化(加回手续费) + wSOL变化
+    sol_delta = 0.0
+    if wallet_index >= 0:
+        pre, post = meta["preBalances"], meta["postBalances"]
+        sol_delta = (post[wallet_index] - pre[wallet_index]) / LAMPORTS_PER_SOL
+        if wallet_index == 0:
+            sol_delta += fee
+        # 本交易内创建/关闭的代币账户: 租金押金和退款不算交易金额
+        # (账户lamports变化中扣除wSOL数量部分即为租金)
+        for index, seen in presence.items():
+            if seen != 0:
+                sol_delta += (post[index] - pre[index] - wsol_raw.get(index, 0)) / LAMPORTS_PER_SOL
+    sol_delta += deltas.pop(WSOL_MINT, 0.0)
+
+    legs = [(mint, delta) for mint, delta in deltas.items() if delta != 0.0]
+    if not legs:
+        return None
+
+    signature = (tx["transaction"].get("signatures") or (None,))[0]
+    block_time = tx.get("blockTime")
+
+    if len(legs) == 1:
+        mint, delta = legs[0]
+        if (delta > 0) == (sol_delta > 0) or sol_delta == 0.0:
+            return None
+        pool = _find_pool_vaults(meta, keys, wallet, mint, delta) if dex in CONSTANT_PRODUCT_DEXES else None
+        if delta > 0:
+            return DecodedSwap(signature, block_time, dex, "buy", mint, delta, -sol_delta, fee, pool)
+        return DecodedSwap(signature, block_time, dex, "sell", mint, -delta, sol_delta, fee, pool)
+
+    # 代币换代币: 以买入的非稳定币为标的，稳定币腿视为计价
+    bought = [leg for leg in legs if leg[1] > 0]
+    sold = [leg for leg in legs if leg[1] < 0]
+    if not bought or not sold:
+        return None
+    target = next((leg for leg in bought if leg[0] not in STABLE_MINTS), None)
+    if target is not None:
+        return DecodedSwap(signature, block_time, dex, "swap", target[0], target[1], abs(sol_delta), fee)
+    target = next((leg for leg in sold if leg[0] not in STABLE_MINTS), sold[0])
+    return DecodedSwap(signature, block_time, dex, "swap", target[0], -target[1], abs(sol_delta), fee)
+
+# 程序ID -> (优先级, DEX名称)；聚合器交易会同时带上底层AMM程序，优先级数值小的作为标注
+DEX_PROGRAMS: Dict[str, Tuple[int, str]] = {
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": (0, "jupiter"),
+    "JUP4Fb2cqiRUcaTHdrPC8h2gNsA2ETXiPDD33WcGuJB": (0, "jupiter"),
+    "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P": (1, "pump_fun"),
+    "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA": (1, "pump_amm"),
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": (2, "raydium_amm"),
+    "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK": (2, "raydium_clmm"),
+    "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C": (2, "raydium_cpmm"),
+    "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc": (2, "orca_whirlpool"),
+    "9W959DqEETiGZocYWCQPaJ6sBmUzgfxXfqGeTEdp3aQP": (2, "orca_v2"),
+    "LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9YuVaPwxo": (2, "meteora_dlmm"),
+}
+
+def get_account_keys(tx: Dict[str, Any]) -> List[str]:
+    """获取交易的完整账户列表(兼容jsonParsed和v0交易的地址查找表)"""
+    keys = tx["transaction"]["message"]["accountKeys"]
+    if keys and isinstance(keys[0], dict):
+        keys = [key["pubkey"] for key in keys]
+    loaded = (tx.get("meta") or {}).get("loadedAddresses")
+    if loaded:
+        keys = list(keys) + loaded.get("writable", []) + loaded.get("readonly", [])
+    return keys
+
+def decode_swap(tx: Optional[Dict[str, Any]], wallet: str) -> Optional[DecodedSwap]:
+    """解码钱包在一笔交易中的swap，非swap交易返回None
+
+    Args:
+        tx: getTransaction返回的交易详情
+        wallet: 要分析的钱包地址
+    """
+    # 快速拒绝: 失败交易或缺少余额数据
+    if not tx:
+        return None
+    meta = tx.get("meta")
+    if not meta or meta.get("err") is not None:
+        return None
+
+    keys = get_account_keys(tx)
+
+    # 快速拒绝: 未调用任何已知DEX程序
+    best = None
+    for key in keys:
+        entry = DEX_PROGRAMS.get(key)
+        if entry is not None and (best is None or entry[0] < best[0]):
+            best = entry
+            if best[0] == 0:
+                break
+    if best is None:
+        return None
+
+    try:
+        wallet_index = keys.index(wallet)
+    except ValueError:
+        wallet_index = -1
+
+    try:
+        return _decode_balance_swap(tx, wallet, wallet_index, best[1], keys)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
@@ -3,10 +3,11 @@
 """
 
 import asyncio
-import aiohttp
 import sys
 import time
 
+from http_transport import HttpTransport
+
 # 测试的节点列表
 TEST_NODES = [
     {"name": "Solana官方主网", "url": "https://api.mainnet-beta.solana.com"},
@@ -101,9 +102,9 @@ async def main():
     print("=" * 80)
     print()
     
-    # 创建会话
-    connector = aiohttp.TCPConnector(ssl=False)
-    async with aiohttp.ClientSession(connector=connector) as session:
+    # 所有节点共用一个连接池(保持长连接，后续请求复用已建立的TLS连接)
+    session = HttpTransport()
+    try:
         # 测试所有节点
         tasks = [test_node(session, node) for node in TEST_NODES]
         results = await asyncio.gather(*tasks)
@@ -166,6 +167,8 @@ SOLANA_WS_URL: str = "{sorted_nodes[0]['url'].replace('https://', 'wss://')}"
 proxy = "http://127.0.0.1:7890"  # 修改为你的代理地址
 solana_connection = get_solana_connection(proxy=proxy)
             """)
+    finally:
+        await session.close()
 
 if __name__ == "__main__":
     try:
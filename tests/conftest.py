@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# 模块都在仓库根目录，直接加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from swap_decoder import DecodedSwap
+
+@pytest.fixture
+def make_swap():
+    """构造DecodedSwap的工厂(签名由区块时间生成，手续费为0)"""
+    def factory(side, amount, sol, block_time, mint="MINT"):
+        return DecodedSwap(f"sig{block_time}", block_time, "jupiter", side, mint, amount, sol, 0.0)
+    return factory
@@ -0,0 +1,55 @@
+import pytest
+
+import blob_store
+from blob_store import BlobStore
+
+TX = {
+    "slot": 1,
+    "blockTime": 1700000000,
+    "meta": {"err": None, "fee": 5000, "preBalances": [10, 0], "postBalances": [5, 5]},
+    "transaction": {"message": {"accountKeys": ["A", "B"]}, "signatures": ["sig"]},
+}
+
+@pytest.fixture(params=["zlib", "zstd"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "zlib":
+        monkeypatch.setattr(blob_store, "zstandard", None)
+    elif blob_store.zstandard is None:
+        pytest.skip("未安装zstandard")
+    store = BlobStore(str(tmp_path / "blobs.db"), batch_size=10)
+    yield store
+    store.close()
+
+def test_round_trip_before_and_after_flush(store):
+    store.put("sig", TX)
+    assert "sig" in store
+    assert store.get("sig") == TX
+
+    store.flush()
+    assert "sig" in store
+    assert store.get("sig") == TX
+
+def test_round_trip_after_reopen(store):
+    store.put("sig", TX)
+    store.put("text", '{"a":1}')
+    store.close()
+
+    reopened = BlobStore(store.path)
+    try:
+        assert reopened.get("sig") == TX
+        assert reopened.get_raw("text") == b'{"a":1}'
+    finally:
+        reopened.close()
+
+def test_batch_flush_and_replace(store):
+    store.put_many((f"sig{i}", {**TX, "slot": i}) for i in range(25))
+    assert len(store._pending) == 5
+    store.put("sig3", {**TX, "slot": 100})
+
+    assert store.get("sig0") == {**TX, "slot": 0}
+    assert store.get("sig3")["slot"] == 100
+    assert store.get("sig24")["slot"] == 24
+
+def test_missing_signature(store):
+    assert store.get("missing") is None
+    assert "missing" not in store
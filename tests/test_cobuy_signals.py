@@ -0,0 +1,89 @@
+from cobuy_signals import CoBuyDetector, SignalStore
+
+T = 1_700_000_000
+
+def make_detector(**kwargs):
+    return CoBuyDetector(**{"window_seconds": 600, "min_wallets": 3, "cooldown_seconds": 600, **kwargs})
+
+def test_signal_when_enough_wallets_buy_within_window():
+    detector = make_detector()
+
+    assert detector.observe("a", "MINT", T, now=0) is None
+    assert detector.observe("a", "MINT", T + 10, now=0) is None  # 同一钱包不重复计数
+    assert detector.observe("b", "MINT", T + 100, now=0) is None
+    signal = detector.observe("c", "MINT", T + 500, now=0)
+
+    assert signal == {
+        "mint": "MINT", "wallet_count": 3, "wallets": ["a", "b", "c"],
+        "window_seconds": 600, "first_buy": T, "last_buy": T + 500
+    }
+
+def test_buys_outside_window_do_not_count():
+    detector = make_detector()
+    detector.observe("a", "MINT", T, now=0)
+    detector.observe("b", "MINT", T + 100, now=0)
+
+    assert detector.observe("c", "MINT", T + 800, now=0) is None
+    assert detector.observe("d", "MINT", T + 100, now=0) is None  # 早于该代币的窗口
+
+def test_late_buys_of_other_mints_are_not_dropped():
+    detector = make_detector()
+    detector.observe("x", "NEW", T + 86400, now=0)
+
+    detector.observe("a", "OLD", T, now=1)
+    detector.observe("b", "OLD", T + 60, now=2)
+    signal = detector.observe("c", "OLD", T + 120, now=3)
+
+    assert signal is not None
+    assert signal["wallets"] == ["a", "b", "c"]
+
+def test_out_of_order_buys_are_matched():
+    detector = make_detector()
+    detector.observe("c", "MINT", T + 300, now=0)
+    detector.observe("a", "MINT", T, now=0)
+    signal = detector.observe("b", "MINT", T + 100, now=0)
+
+    assert signal["first_buy"] == T
+    assert signal["last_buy"] == T + 300
+
+def test_cooldown_between_signals():
+    detector = make_detector(min_wallets=2)
+    detector.observe("a", "MINT", T, now=0)
+    assert detector.observe("b", "MINT", T + 10, now=0) is not None
+    assert detector.observe("c", "MINT", T + 20, now=0) is None
+    assert detector.observe("d", "MINT", T + 615, now=0) is not None
+
+def test_idle_and_excess_tokens_are_evicted():
+    detector = make_detector(retention_seconds=100, max_tokens=2)
+    detector.observe("a", "A", T, now=0)
+    detector.observe("a", "B", T, now=50)
+    assert detector.tracked_tokens == 2
+
+    detector.observe("a", "C", T, now=120)
+    assert detector.tracked_tokens == 2  # A超过保留时间
+    detector.observe("a", "D", T, now=130)
+    assert detector.tracked_tokens == 2  # 超出代币数上限，移除最久未更新的B
+
+def test_observe_swaps_only_counts_buys(make_swap):
+    detector = make_detector(min_wallets=2)
+    sell = make_swap("sell", 1.0, 1.0, T)
+    buy = make_swap("buy", 1.0, 1.0, T + 1)
+
+    assert detector.observe_swaps("a", [sell], now=0) == []
+    assert detector.observe_swaps("b", [sell, buy], now=0) == []
+    signals = detector.observe_swaps("c", [buy], now=0)
+    assert [signal["wallets"] for signal in signals] == [["b", "c"]]
+
+def test_signal_store_round_trip(tmp_path):
+    store = SignalStore(str(tmp_path / "signals.db"))
+    try:
+        signal = {"mint": "MINT", "wallet_count": 2, "wallets": ["a", "b"], "window_seconds": 600,
+                  "first_buy": T, "last_buy": T + 10}
+        saved = store.save([signal, {**signal, "mint": "OTHER"}], created_at=T + 20)
+
+        assert [item["id"] for item in saved] == [1, 2]
+        assert store.recent() == [saved[1], saved[0]]
+        assert store.recent(mint="MINT") == [saved[0]]
+        assert store.recent(since=T + 21) == []
+    finally:
+        store.close()
@@ -0,0 +1,96 @@
+import asyncio
+
+from event_bus import TOPIC_METRICS, TOPIC_TRADE, EventBus, subscribe_from_request
+
+def test_slow_subscriber_drops_oldest_without_blocking_others():
+    bus = EventBus()
+    slow = bus.subscribe(max_buffer=3)
+    fast = bus.subscribe()
+
+    for i in range(5):
+        bus.publish(TOPIC_METRICS, {"i": i})
+
+    assert [event.data["i"] for event in slow.buffer] == [2, 3, 4]
+    assert slow.dropped == 2
+    assert [event.data["i"] for event in fast.buffer] == [0, 1, 2, 3, 4]
+    assert fast.dropped == 0
+
+def test_get_batch_drains_buffer_and_times_out_when_empty():
+    async def scenario():
+        bus = EventBus()
+        subscription = bus.subscribe()
+        bus.publish(TOPIC_METRICS, 1)
+        bus.publish(TOPIC_METRICS, 2)
+        assert [event.data for event in await subscription.get_batch(timeout=1)] == [1, 2]
+        assert await subscription.get_batch(timeout=0.01) == []
+
+        # 等待中的订阅者在发布后被唤醒
+        waiter = asyncio.ensure_future(subscription.get_batch(timeout=1))
+        await asyncio.sleep(0)
+        bus.publish(TOPIC_METRICS, 3)
+        assert [event.data for event in await waiter] == [3]
+
+    asyncio.run(scenario())
+
+def test_stream_close_unsubscribes():
+    async def scenario():
+        bus = EventBus()
+        stream = bus.sse_stream(bus.subscribe(), heartbeat=1)
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+        bus.publish(TOPIC_TRADE, {"sig": "a"}, wallet="W")
+        chunk = await stream.__anext__()
+        assert chunk.startswith(b"id: 1\nevent: trade\ndata: ")
+        assert bus.subscriber_count == 1
+
+        await stream.aclose()
+        assert bus.subscriber_count == 0
+        bus.publish(TOPIC_TRADE, {"sig": "b"}, wallet="W")  # 取消订阅后发布不受影响
+
+    asyncio.run(scenario())
+
+def test_disconnect_while_waiting_unsubscribes():
+    async def scenario():
+        bus = EventBus()
+        stream = bus.sse_stream(bus.subscribe(), heartbeat=60)
+
+        async def consume():
+            async for _ in stream:
+                pass
+
+        # 客户端断开时服务器取消正在等待事件的响应任务
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        assert bus.subscriber_count == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert bus.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+def test_heartbeat_when_idle():
+    async def scenario():
+        bus = EventBus()
+        stream = bus.sse_stream(bus.subscribe(), heartbeat=0.01)
+        await stream.__anext__()
+        assert await stream.__anext__() == b": keep-alive\n\n"
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+def test_filters_and_last_event_id_replay():
+    bus = EventBus()
+    bus.publish(TOPIC_TRADE, 1, wallet="A")
+    bus.publish(TOPIC_TRADE, 2, wallet="B")
+    bus.publish(TOPIC_METRICS, 3)
+    bus.publish(TOPIC_TRADE, 4, wallet="A")
+
+    subscription = subscribe_from_request(bus, {"wallets": "A, "}, {"last-event-id": "1"})
+    # 补发ID 1之后的事件；钱包过滤不影响不带钱包地址的事件
+    assert [event.data for event in subscription.buffer] == [3, 4]
+
+    only_trades = subscribe_from_request(bus, {"topics": "trade", "last_event_id": "bad"}, {})
+    assert len(only_trades.buffer) == 0
+    bus.publish(TOPIC_METRICS, 5)
+    bus.publish(TOPIC_TRADE, 6, wallet="B")
+    assert [event.data for event in only_trades.buffer] == [6]
+    assert [event.data for event in subscription.buffer] == [3, 4, 5]
@@ -0,0 +1,105 @@
+import importlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="module")
+def demo(tmp_path_factory):
+    # 演示模式在导入时挂载app/static并在app/data下生成模拟数据(相对当前目录)
+    workdir = tmp_path_factory.mktemp("demo")
+    for directory in ("app/static", "app/templates", "app/data"):
+        os.makedirs(workdir / directory)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        yield importlib.import_module("fixed_demo_mode")
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture
+def client(demo):
+    return TestClient(demo.app)
+
+def first_address(demo, index=0):
+    return demo.mock_service.get_wallets(limit=index + 1)[index]["address"]
+
+def test_repeat_get_with_etag_is_not_modified(demo, client):
+    address = first_address(demo)
+    response = client.get(f"/api/wallets/{address}")
+    assert response.status_code == 200
+    assert response.json()["address"] == address
+
+    repeat = client.get(f"/api/wallets/{address}", headers={"If-None-Match": response.headers["etag"]})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == response.headers["etag"]
+
+def test_put_invalidates_cached_responses(demo, client):
+    address = first_address(demo, 1)
+    before = client.get(f"/api/wallets/{address}")
+    listing = client.get("/api/wallets", params={"sort_by": "win_rate", "limit": 1})
+    assert listing.json()[0]["address"] != address
+
+    response = client.put(f"/api/wallets/{address}", json={"win_rate": 100.5, "last_active": "2024-01-02T03:04:05"})
+    assert response.status_code == 200
+    assert response.json()["win_rate"] == 100.5
+
+    after = client.get(f"/api/wallets/{address}", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()["win_rate"] == 100.5
+    assert after.json()["last_active"] == "2024-01-02T03:04:05"
+
+    listing = client.get("/api/wallets", params={"sort_by": "win_rate", "limit": 1})
+    assert listing.json()[0]["address"] == address
+
+def test_put_rejects_invalid_updates(demo, client):
+    address = first_address(demo)
+    before = client.get(f"/api/wallets/{address}").json()
+
+    assert client.put(f"/api/wallets/{address}", json={"address": "x"}).status_code == 400
+    assert client.put(f"/api/wallets/{address}", json={"win_rate": 1.0, "daily_trades": "many"}).status_code == 400
+    assert client.put("/api/wallets/" + "1" * 44, json={"win_rate": 1.0}).status_code == 404
+    assert client.get(f"/api/wallets/{address}").json() == before
+
+def test_unknown_wallet_is_not_found(client):
+    assert client.get("/api/wallets/" + "1" * 44).status_code == 404
+    assert client.get("/api/wallets/stats/overview").status_code == 200
+
+SORT_KEYS = ("win_rate", "profit_loss_ratio", "daily_trades")
+
+def assert_views_match_columns(demo):
+    service = demo.mock_service
+    wallets = service.wallets
+    for sort_by in SORT_KEYS:
+        column = wallets[sort_by]
+        for smart_only in (False, True):
+            rows = [row for row in range(len(column)) if not smart_only or wallets["is_smart_wallet"][row]]
+            expected = sorted(rows, key=lambda row: (-column[row], row))
+            assert service._get_sorted_view(sort_by, smart_only).tolist() == expected, (sort_by, smart_only)
+
+def test_updates_keep_sorted_views_consistent(demo, client):
+    service = demo.mock_service
+    wallets = service.wallets
+    # 先建立所有排序视图，之后的更新走原地调整路径
+    assert_views_match_columns(demo)
+
+    addresses = [wallet["address"] for wallet in service.get_wallets(limit=len(wallets["address"]))]
+    smart = next(address for address in addresses if service.get_wallet_by_address(address)["is_smart_wallet"])
+    other = next(address for address in addresses if not service.get_wallet_by_address(address)["is_smart_wallet"])
+    tied = service.get_wallet_by_address(addresses[-1])
+
+    updates = [
+        (addresses[0], {"win_rate": 0.0}),
+        (addresses[-1], {"profit_loss_ratio": 99.0, "daily_trades": 1.0}),
+        # 与其他钱包取值相同时按行号排列
+        (addresses[3], {"win_rate": tied["win_rate"], "daily_trades": tied["daily_trades"]}),
+        (smart, {"is_smart_wallet": False}),
+        (other, {"is_smart_wallet": True, "win_rate": 200.0}),
+    ]
+    for address, fields in updates:
+        assert client.put(f"/api/wallets/{address}", json=fields).status_code == 200
+        assert_views_match_columns(demo)
+
+    top = client.get("/api/wallets", params={"sort_by": "win_rate", "smart_only": True, "limit": 1}).json()
+    assert top[0]["address"] == other
@@ -0,0 +1,94 @@
+import pytest
+
+from lot_ledger import LotLedger, PositionStore, TokenLots
+from rolling_stats import WalletRollup
+
+def test_sell_matches_lots_first_in_first_out():
+    lots = TokenLots()
+    lots.buy(10, 1.0, 100)
+    lots.buy(10, 3.0, 200)
+
+    closed = lots.sell(15, 6.0, 300)
+
+    assert [lot.amount for lot in closed] == [10, 5]
+    assert [lot.cost for lot in closed] == pytest.approx([1.0, 1.5])
+    assert [lot.proceeds for lot in closed] == pytest.approx([4.0, 2.0])
+    assert [lot.holding_seconds for lot in closed] == [200, 100]
+    assert len(lots) == 1
+    assert lots.amount == pytest.approx(5)
+    assert lots.open_lots[0].cost == pytest.approx(1.5)
+
+def test_sell_more_than_held_ignores_excess():
+    lots = TokenLots()
+    lots.buy(1, 1.0, 100)
+
+    closed = lots.sell(2, 4.0, 200)
+
+    assert len(closed) == 1
+    assert closed[0].amount == 1
+    assert closed[0].proceeds == pytest.approx(2.0)
+    assert len(lots) == 0
+    assert lots.amount == 0.0
+
+def test_sell_treats_float_dust_as_closed():
+    lots = TokenLots()
+    lots.buy(1.0, 1.0, 100)
+    for _ in range(10):
+        lots.sell(0.1, 0.2, 200)
+
+    assert len(lots) == 0
+    assert lots.amount == 0.0
+
+    lots.buy(0.3, 1.0, 100)
+    lots.buy(0.3, 1.0, 100)
+    lots.sell(0.1 + 0.2 + 0.3, 2.0, 200)
+    assert len(lots) == 0
+
+def test_sell_without_position_returns_nothing(make_swap):
+    ledger = LotLedger()
+    assert ledger.apply(make_swap("sell", 5, 1.0, 100)) == []
+    assert ledger.tokens == {}
+
+def test_position_store_round_trip(tmp_path, make_swap):
+    store = PositionStore(str(tmp_path / "positions.db"))
+    rollup = WalletRollup(days=30)
+    rollup.ingest([
+        make_swap("buy", 10, 1.0, 86400 * 100),
+        make_swap("buy", 5, 1.0, 86400 * 100 + 60),
+        make_swap("sell", 12, 3.0, 86400 * 100 + 3600),
+        make_swap("buy", 7, 2.0, 86400 * 100 + 7200, mint="OTHER"),
+    ])
+    rollup.last_signature = "cursor"
+    store.save_wallet("wallet", rollup.ledger, rollup.state())
+    store.close()
+
+    store = PositionStore(str(tmp_path / "positions.db"))
+    restored = WalletRollup(days=30)
+    assert restored.restore(store.load_state("wallet"), store.load_wallet("wallet"))
+    store.close()
+
+    now = 86400 * 101
+    assert restored.snapshot(now) == rollup.snapshot(now)
+    assert restored.last_signature == "cursor"
+    assert restored.first_trade_time == rollup.first_trade_time
+    assert restored.ledger.tokens["MINT"].amount == pytest.approx(3)
+    assert restored.ledger.tokens["MINT"].open_lots[0].time == 86400 * 100 + 60
+    assert restored.ledger.tokens["OTHER"].amount == pytest.approx(7)
+
+    # 恢复后继续处理卖出，按恢复的批次计算盈亏
+    restored.ingest([make_swap("sell", 3, 3.0, 86400 * 100 + 7200)])
+    assert restored.snapshot(now)["winning_trades"] == 2
+
+def test_position_store_without_state(tmp_path):
+    store = PositionStore(str(tmp_path / "positions.db"))
+    assert store.load_state("missing") is None
+    assert store.load_wallet("missing") == {}
+    store.close()
+
+def test_restore_skips_state_with_different_window():
+    rollup = WalletRollup(days=30)
+    rollup.last_signature = "cursor"
+
+    other = WalletRollup(days=7)
+    assert not other.restore(rollup.state(), {})
+    assert other.last_signature is None
@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code):
+    """在新的解释器中运行(sys.modules不受测试进程已导入模块的影响)"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+def app_package_available():
+    try:
+        return importlib.util.find_spec("app.api.routes") is not None
+    except ImportError:  # 仓库根目录的app.py遮蔽了app包
+        return False
+
+def test_import_main_does_not_build_app():
+    loaded = run_python(
+        "import sys, main\n"
+        "print(*[name for name in ('fastapi', 'sqlalchemy', 'solana', 'app', 'web_app') if name in sys.modules])"
+    )
+    assert loaded == []
+
+@pytest.mark.skipif(not app_package_available(), reason="需要app包")
+def test_app_does_not_import_analyzer():
+    output = run_python(
+        "import sys, main\n"
+        "app = main.app\n"
+        "assert main.app is app\n"
+        "print(*[name for name in ('solana', 'app.utils.solana', 'app.services.transaction_analyzer') if name in sys.modules])\n"
+        "print('routes', *sorted(f'{method.upper()}:{path}' for path, item in app.openapi()['paths'].items() for method in item))"
+    )
+    routes = output[output.index("routes") + 1:]
+    assert output[:output.index("routes")] == []
+    assert "GET:/api/wallets/{address}" in routes
+    assert "GET:/api/wallets/stats/overview" in routes
+    assert "GET:/api/signals" in routes
+    assert not any(route.endswith("/analyze") for route in routes)
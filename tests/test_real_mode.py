@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+# 真实模式依赖app包(配置、Solana连接)，缺少时跳过
+real_mode = pytest.importorskip("real_mode")
+from scan_scheduler import ScanScheduler
+
+FAST = "F" * 44
+SLOW = "S" * 44
+LAST = "L" * 44
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    scheduler = ScanScheduler(str(tmp_path / "schedule.db"))
+    monkeypatch.setattr(real_mode, "scan_scheduler", scheduler)
+    yield scheduler
+    scheduler.close()
+
+@pytest.fixture
+def rpc(monkeypatch):
+    """替换余额和签名查询，delays中的钱包查询签名时等待指定秒数"""
+    delays = {}
+
+    async def get_balance(connection, address):
+        return 1.0
+
+    async def get_signatures(connection, address, limit=100, **kwargs):
+        await asyncio.sleep(delays.get(address, 0))
+        return []  # 没有交易，分析结果为None
+
+    monkeypatch.setattr(real_mode.rpc_client, "get_balance", get_balance)
+    monkeypatch.setattr(real_mode.rpc_client, "get_signatures", get_signatures)
+    monkeypatch.setattr(real_mode, "wallet_graph", None)
+    monkeypatch.setattr(real_mode, "WALLET_CONCURRENCY", 1)
+    return delays
+
+def test_wallets_cut_off_by_budget_are_postponed(scheduler, rpc):
+    # 扫描循环取出到期钱包后交给analyze_wallets，之后须重新安排
+    scheduler.add([FAST, SLOW, LAST], due=0)
+    assert scheduler.pop_due(now=0) == sorted([FAST, SLOW, LAST])
+    rpc[SLOW] = 10
+
+    deferred = asyncio.run(real_mode.analyze_wallets([FAST, SLOW, LAST], budget=0.3))
+
+    # 预算用完时正在分析的和尚未开始的钱包都留在计划中，立即到期
+    assert deferred == [SLOW, LAST]
+    now = int(time.time())
+    assert all(address in scheduler for address in (FAST, SLOW, LAST))
+    assert scheduler.pop_due(now=now) == sorted([SLOW, LAST])
+    assert FAST not in scheduler.pop_due(now=now)
+
+    # 下一轮预算充足时补上分析
+    rpc[SLOW] = 0
+    assert asyncio.run(real_mode.analyze_wallets([SLOW, LAST], budget=5)) == []
+    assert scheduler.pop_due(now=now) == []
+    assert SLOW in scheduler and LAST in scheduler
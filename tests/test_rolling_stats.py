@@ -0,0 +1,72 @@
+import pytest
+
+from rolling_stats import MAX_PROFIT_LOSS_RATIO, SECONDS_PER_DAY, WalletRollup
+
+DAY = 100 * SECONDS_PER_DAY
+
+def test_ingest_and_snapshot(make_swap):
+    rollup = WalletRollup(days=30)
+    rollup.ingest([
+        make_swap("buy", 10, 1.0, DAY),
+        make_swap("sell", 10, 4.0, DAY + 7200),      # 盈利3.0，持仓2小时
+        make_swap("buy", 10, 2.0, DAY + 10000),
+        make_swap("sell", 10, 1.0, DAY + 10000 + 3600),  # 亏损1.0，持仓1小时
+    ])
+
+    stats = rollup.snapshot(DAY + SECONDS_PER_DAY)
+    assert stats["total_trades"] == 4
+    assert stats["closed_trades"] == 2
+    assert stats["winning_trades"] == 1
+    assert stats["win_rate"] == pytest.approx(50.0)
+    assert stats["total_profit"] == pytest.approx(3.0)
+    assert stats["total_loss"] == pytest.approx(1.0)
+    assert stats["profit_loss_ratio"] == pytest.approx(3.0)
+    assert stats["avg_holding_time"] == pytest.approx(1.5)
+    assert stats["daily_trades"] == pytest.approx(4.0)
+    assert rollup.first_trade_time == DAY
+    assert rollup.last_trade_time == DAY + 13600
+
+def test_incremental_ingest_matches_single_batch(make_swap):
+    swaps = [make_swap("buy", 5, 1.0, DAY + i * 600) for i in range(5)]
+    swaps += [make_swap("sell", 5, 1.5, DAY + 4000 + i * 600) for i in range(5)]
+
+    whole = WalletRollup(days=30)
+    whole.ingest(swaps)
+    parts = WalletRollup(days=30)
+    parts.ingest(swaps[:3])
+    parts.ingest(swaps[3:])
+
+    now = DAY + SECONDS_PER_DAY
+    assert parts.snapshot(now) == whole.snapshot(now)
+
+def test_old_days_expire_from_window(make_swap):
+    rollup = WalletRollup(days=7)
+    rollup.ingest([make_swap("buy", 1, 1.0, DAY), make_swap("sell", 1, 2.0, DAY + 60)])
+    rollup.ingest([make_swap("buy", 1, 1.0, DAY + 3 * SECONDS_PER_DAY)])
+
+    assert rollup.snapshot(DAY + 3 * SECONDS_PER_DAY)["total_trades"] == 3
+    stats = rollup.snapshot(DAY + 8 * SECONDS_PER_DAY)
+    assert stats["total_trades"] == 1
+    assert stats["closed_trades"] == 0
+
+    # 早于窗口的交易不再计入
+    rollup.ingest([make_swap("buy", 1, 1.0, DAY - 30 * SECONDS_PER_DAY)])
+    assert rollup.snapshot(DAY + 8 * SECONDS_PER_DAY)["total_trades"] == 1
+
+def test_profit_loss_ratio_is_capped(make_swap):
+    rollup = WalletRollup(days=30)
+    assert rollup.snapshot(DAY)["profit_loss_ratio"] == 0.0
+
+    rollup.ingest([make_swap("buy", 1, 1.0, DAY), make_swap("sell", 1, 2.0, DAY + 60)])
+    assert rollup.snapshot(DAY + 60)["profit_loss_ratio"] == MAX_PROFIT_LOSS_RATIO
+
+    rollup.ingest([make_swap("buy", 1, 1.0, DAY + 120), make_swap("sell", 1, 0.999999, DAY + 180)])
+    assert rollup.snapshot(DAY + 180)["profit_loss_ratio"] == MAX_PROFIT_LOSS_RATIO
+
+def test_sell_without_buy_is_not_a_closed_trade(make_swap):
+    rollup = WalletRollup(days=30)
+    rollup.ingest([make_swap("sell", 1, 2.0, DAY)])
+
+    stats = rollup.snapshot(DAY)
+    assert stats["total_trades"] == 1
+    assert stats["closed_trades"] == 0
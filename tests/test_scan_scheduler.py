@@ -0,0 +1,70 @@
+import pytest
+
+from scan_scheduler import (RESCAN_ACTIVE_MINUTES, RESCAN_DORMANT_MINUTES, RESCAN_HOT_MINUTES,
+                            RESCAN_SMART_MINUTES, ScanScheduler, rescan_interval)
+
+NOW = 1_700_000_000
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = ScanScheduler(str(tmp_path / "schedule.db"))
+    yield scheduler
+    scheduler.close()
+
+def test_rescan_interval_by_activity():
+    assert rescan_interval(True, NOW - 600, NOW) == RESCAN_HOT_MINUTES * 60
+    assert rescan_interval(True, NOW - 7200, NOW) == RESCAN_SMART_MINUTES * 60
+    assert rescan_interval(False, NOW - 7200, NOW) == RESCAN_ACTIVE_MINUTES * 60
+    assert rescan_interval(False, None, NOW) == RESCAN_DORMANT_MINUTES * 60
+
+def test_pop_due_in_due_order(scheduler):
+    scheduler.add(["c"], due=NOW + 30)
+    scheduler.add(["a"], due=NOW + 10)
+    scheduler.add(["b"], due=NOW + 20)
+    scheduler.add(["late"], due=NOW + 1000)
+
+    assert scheduler.pop_due(now=NOW) == []
+    assert scheduler.pop_due(now=NOW + 30, limit=2) == ["a", "b"]
+    assert scheduler.pop_due(now=NOW + 30) == ["c"]
+    assert scheduler.next_due_time() == NOW + 1000
+    assert len(scheduler) == 1
+
+def test_add_keeps_existing_schedule(scheduler):
+    scheduler.add(["a"], due=NOW + 100)
+    scheduler.add(["a", "b"], due=NOW)
+
+    assert scheduler.pop_due(now=NOW) == ["b"]
+    assert "a" in scheduler
+
+def test_reschedule_skips_stale_heap_entries(scheduler):
+    hot = int(RESCAN_HOT_MINUTES * 60)
+    scheduler.add(["a", "b"], due=NOW)
+    scheduler.postpone("a", NOW + hot + 100)
+
+    assert scheduler.pop_due(now=NOW) == ["b"]
+    assert scheduler.record_result("b", True, NOW - 60, now=NOW) == NOW + hot
+    assert scheduler.pop_due(now=NOW + hot - 1) == []
+    assert scheduler.pop_due(now=NOW + hot + 100) == ["b", "a"]
+
+def test_schedule_persists_across_restart(tmp_path):
+    path = str(tmp_path / "schedule.db")
+    scheduler = ScanScheduler(path)
+    scheduler.add(["new"], due=NOW)
+    scheduler.add(["smart", "dormant", "postponed"], due=NOW)
+    assert scheduler.pop_due(now=NOW, limit=10) == ["dormant", "new", "postponed", "smart"]
+    scheduler.record_result("smart", True, NOW - 60, now=NOW)
+    scheduler.record_result("dormant", False, None, now=NOW)
+    scheduler.postpone("postponed", NOW + 50)
+    scheduler.add(["new"], due=NOW)
+    scheduler.close()
+
+    reopened = ScanScheduler(path)
+    try:
+        assert len(reopened) == 4
+        assert reopened.next_due_time() == NOW
+        assert reopened.pop_due(now=NOW) == ["new"]
+        assert reopened.pop_due(now=NOW + 50) == ["postponed"]
+        assert reopened.pop_due(now=NOW + RESCAN_HOT_MINUTES * 60) == ["smart"]
+        assert reopened.pop_due(now=NOW + RESCAN_DORMANT_MINUTES * 60) == ["dormant"]
+    finally:
+        reopened.close()
@@ -0,0 +1,53 @@
+import math
+import sqlite3
+
+import pytest
+
+from screening import _sql_condition, compare_profiles_sql, rescreen_sql
+
+PROFILE = {"win_rate": 70.0, "profit_loss_ratio": 3.0, "daily_trades": 20.0, "holding_hours": 24.0}
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "smart_wallets.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE smart_wallets (address TEXT, win_rate REAL, profit_loss_ratio REAL, "
+        "daily_trades REAL, avg_holding_time REAL, is_smart_wallet INTEGER)"
+    )
+    conn.executemany("INSERT INTO smart_wallets VALUES (?, ?, ?, ?, ?, ?)", [
+        ("a", 80.0, 4.0, 30.0, 2.0, 0),
+        ("b", 75.0, 100.0, 25.0, 48.0, 1),
+        ("c", 50.0, 1.0, 5.0, 1.0, 1),
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+def test_sql_condition_uses_bound_parameters():
+    condition, params = _sql_condition(PROFILE)
+
+    assert condition == ("win_rate >= ? AND profit_loss_ratio >= ? AND "
+                         "daily_trades >= ? AND avg_holding_time <= ?")
+    assert params == [70.0, 3.0, 20.0, 24.0]
+
+def test_sql_condition_rejects_nan():
+    with pytest.raises(ValueError):
+        _sql_condition({**PROFILE, "win_rate": math.nan})
+
+def test_infinite_threshold_is_unbounded(db_path):
+    profiles = {
+        "default": PROFILE,
+        "any_holding": {**PROFILE, "holding_hours": math.inf},
+        "impossible": {**PROFILE, "profit_loss_ratio": math.inf},
+    }
+
+    result = compare_profiles_sql(db_path, profiles)
+
+    assert result["default"]["smart_wallet_count"] == 1
+    assert result["any_holding"]["smart_wallet_count"] == 2
+    assert result["impossible"]["smart_wallet_count"] == 0
+
+def test_rescreen_updates_changed_rows(db_path):
+    assert rescreen_sql(db_path, PROFILE) == {"smart_wallet_count": 1, "changed": 3}
+    assert rescreen_sql(db_path, PROFILE) == {"smart_wallet_count": 1, "changed": 0}
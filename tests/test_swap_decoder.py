@@ -0,0 +1,110 @@
+import pytest
+
+from swap_decoder import LAMPORTS_PER_SOL, WSOL_MINT, decode_swap
+
+WALLET = "Wallet1111111111111111111111111111111111111"
+JUPITER = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+MEME = "Meme111111111111111111111111111111111111111"
+FEE = 5000
+RENT = 2_039_280  # 代币账户的免租押金
+SOL = LAMPORTS_PER_SOL
+
+def token(index, mint, raw, decimals=6, owner=WALLET):
+    return {"accountIndex": index, "mint": mint, "owner": owner,
+            "uiTokenAmount": {"amount": str(raw), "decimals": decimals}}
+
+def make_tx(lamports, pre_tokens=(), post_tokens=(), err=None, program=JUPITER):
+    """lamports: [(账户, 交易前, 交易后)]，钱包为第0个账户(付费者)"""
+    keys = [key for key, _, _ in lamports] + [program]
+    return {
+        "blockTime": 1_700_000_000,
+        "transaction": {"signatures": ["sig"], "message": {"accountKeys": keys}},
+        "meta": {
+            "err": err, "fee": FEE,
+            "preBalances": [pre for _, pre, _ in lamports] + [1],
+            "postBalances": [post for _, _, post in lamports] + [1],
+            "preTokenBalances": list(pre_tokens), "postTokenBalances": list(post_tokens),
+        },
+    }
+
+def test_buy():
+    tx = make_tx([(WALLET, 10 * SOL, 9 * SOL - FEE), ("Ata", RENT, RENT)],
+                 [token(1, MEME, 0)], [token(1, MEME, 500_000_000)])
+    swap = decode_swap(tx, WALLET)
+
+    assert (swap.side, swap.token_mint, swap.dex) == ("buy", MEME, "jupiter")
+    assert swap.token_amount == pytest.approx(500)
+    assert swap.sol_amount == pytest.approx(1.0)
+    assert swap.fee == FEE / SOL
+
+def test_buy_creating_token_account_excludes_rent():
+    tx = make_tx([(WALLET, 10 * SOL, 9 * SOL - RENT - FEE), ("Ata", 0, RENT)],
+                 [], [token(1, MEME, 500_000_000)])
+    swap = decode_swap(tx, WALLET)
+
+    assert swap.side == "buy"
+    assert swap.sol_amount == pytest.approx(1.0)
+
+def test_buy_with_new_wsol_account_excludes_rent_but_keeps_wrapped_sol():
+    # 包装1.2 SOL到新建的wSOL账户，swap用掉1.0，剩余0.2留在账户中
+    tx = make_tx([(WALLET, 10 * SOL, 10 * SOL - 1_200_000_000 - RENT - FEE),
+                  ("WsolAta", 0, RENT + 200_000_000), ("Ata", RENT, RENT)],
+                 [token(2, MEME, 0)],
+                 [token(1, WSOL_MINT, 200_000_000, decimals=9), token(2, MEME, 500_000_000)])
+    swap = decode_swap(tx, WALLET)
+
+    assert swap.side == "buy"
+    assert swap.sol_amount == pytest.approx(1.0)
+
+def test_sell_closing_token_account_excludes_rent_refund():
+    tx = make_tx([(WALLET, 10 * SOL, 10 * SOL + 500_000_000 + RENT - FEE), ("Ata", RENT, 0)],
+                 [token(1, MEME, 500_000_000)], [])
+    swap = decode_swap(tx, WALLET)
+
+    assert (swap.side, swap.token_mint) == ("sell", MEME)
+    assert swap.token_amount == pytest.approx(500)
+    assert swap.sol_amount == pytest.approx(0.5)
+
+def test_token_to_token_swap():
+    tx = make_tx([(WALLET, 10 * SOL, 10 * SOL - FEE), ("UsdcAta", RENT, RENT), ("Ata", RENT, RENT)],
+                 [token(1, USDC, 100_000_000), token(2, MEME, 0)],
+                 [token(1, USDC, 0), token(2, MEME, 500_000_000)])
+    swap = decode_swap(tx, WALLET)
+
+    assert (swap.side, swap.token_mint) == ("swap", MEME)
+    assert swap.token_amount == pytest.approx(500)
+    assert swap.sol_amount == 0.0
+
+def test_failed_and_non_dex_transactions_are_ignored():
+    lamports = [(WALLET, 10 * SOL, 9 * SOL - FEE), ("Ata", RENT, RENT)]
+    pre, post = [token(1, MEME, 0)], [token(1, MEME, 500_000_000)]
+
+    assert decode_swap(make_tx(lamports, pre, post, err={"InstructionError": [2, "Custom"]}), WALLET) is None
+    assert decode_swap(make_tx(lamports, pre, post, program="Other1111111111111111111111111111111111111"), WALLET) is None
+
+RAYDIUM_AMM = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+AUTHORITY = "Authority111111111111111111111111111111111"
+
+def pool_swap_tx(program):
+    # 钱包用1 SOL从池子买入500 MEME：池子的MEME储备减少，wSOL储备增加
+    return make_tx(
+        [(WALLET, 10 * SOL, 9 * SOL - FEE), ("Ata", RENT, RENT),
+         ("MemeVault", RENT, RENT), ("SolVault", RENT + 50 * SOL, RENT + 51 * SOL)],
+        [token(1, MEME, 0), token(2, MEME, 25_000_000_000, owner=AUTHORITY),
+         token(3, WSOL_MINT, 50 * SOL, decimals=9, owner=AUTHORITY)],
+        [token(1, MEME, 500_000_000), token(2, MEME, 24_500_000_000, owner=AUTHORITY),
+         token(3, WSOL_MINT, 51 * SOL, decimals=9, owner=AUTHORITY)],
+        program=program,
+    )
+
+def test_constant_product_swap_records_pool_vaults():
+    swap = decode_swap(pool_swap_tx(RAYDIUM_AMM), WALLET)
+
+    assert (swap.side, swap.dex) == ("buy", "raydium_amm")
+    assert swap.sol_amount == pytest.approx(1.0)
+    assert swap.pool == ("MemeVault", "SolVault")
+
+def test_aggregator_swap_has_no_pool():
+    # 聚合器可能经过多个池子，不登记储备账户
+    assert decode_swap(pool_swap_tx(JUPITER), WALLET).pool is None
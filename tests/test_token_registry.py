@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+import token_registry
+from token_registry import TokenRegistry
+
+def vault(ui_amount):
+    return {"data": {"parsed": {"info": {"tokenAmount": {"uiAmount": ui_amount}}}}}
+
+@pytest.fixture
+def reserves(monkeypatch):
+    """替换getMultipleAccounts，按账户地址返回储备"""
+    balances = {}
+
+    async def fake_call(connection, method, params):
+        assert method == "getMultipleAccounts"
+        return {"value": [vault(balances.get(address)) for address in params[0]]}
+
+    monkeypatch.setattr(token_registry, "connection_call", fake_call)
+    return balances
+
+def test_last_trade_price_without_pool(tmp_path, make_swap):
+    registry = TokenRegistry(str(tmp_path / "main.db"))
+    registry.observe_swaps([make_swap("buy", 100, 1.0, 100), make_swap("sell", 100, 2.0, 200)])
+
+    assert registry.get_price("MINT") == pytest.approx(0.02)
+    assert registry.value_positions({"MINT": 50, "UNKNOWN": 10}) == pytest.approx(1.0)
+
+def test_registered_pool_reserves_set_price(tmp_path, make_swap, reserves):
+    registry = TokenRegistry(str(tmp_path / "main.db"))
+    swap = make_swap("buy", 100, 1.0, 100)
+    swap.pool = ("MintVault", "SolVault")
+    registry.observe_swaps([swap])
+    reserves.update({"MintVault": 1000.0, "SolVault": 50.0})
+
+    assert asyncio.run(registry.refresh_prices(object())) == 1
+    assert registry.get_price("MINT") == pytest.approx(0.05)
+    assert registry.value_positions({"MINT": 100}) == pytest.approx(5.0)
+
+    # 储备变化后价格随之变化，已登记池子的代币不再使用成交价
+    reserves.update({"MintVault": 500.0, "SolVault": 100.0})
+    registry.observe_swaps([make_swap("buy", 100, 1.0, 200)])
+    assert registry.get_price("MINT") == pytest.approx(0.05)
+    assert asyncio.run(registry.refresh_prices(object())) == 1
+    assert registry.get_price("MINT") == pytest.approx(0.2)
+
+def test_empty_reserves_keep_previous_price(tmp_path, make_swap, reserves):
+    registry = TokenRegistry(str(tmp_path / "main.db"))
+    swap = make_swap("buy", 100, 1.0, 100)
+    swap.pool = ("MintVault", "SolVault")
+    registry.observe_swaps([swap])
+
+    assert asyncio.run(registry.refresh_prices(object())) == 0
+    assert registry.get_price("MINT") == pytest.approx(0.01)
@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from wallet_graph import Pubkey, WalletGraph
+
+def make_wallet(seed):
+    """生成在ed25519曲线上的钱包地址(未安装solders时不检查地址)"""
+    if Pubkey is None:
+        return f"wallet{seed}"
+    from solders.keypair import Keypair
+    return str(Keypair.from_seed(bytes([seed]) * 32).pubkey())
+
+A, B, C, D, E = (make_wallet(seed) for seed in range(1, 6))
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = WalletGraph(str(tmp_path / "graph.db"))
+    yield graph
+    graph.close()
+
+def token_edge(graph, wallet, mint):
+    return graph._conn.execute(
+        "SELECT buy_count, sell_count, first_seen, last_buy, last_seen FROM token_edges WHERE wallet = ? AND mint = ?",
+        (wallet, mint)
+    ).fetchone()
+
+def wallet_edge(graph, src, dst):
+    return graph._conn.execute(
+        "SELECT weight, first_seen, last_seen FROM wallet_edges WHERE src = ? AND dst = ?", (src, dst)
+    ).fetchone()
+
+def test_token_trades_upsert(graph, make_swap):
+    graph.add_token_trades(A, [make_swap("buy", 1, 1.0, 200)])
+    assert token_edge(graph, A, "MINT") == (1, 0, 200, 200, 200)
+
+    # 卖出不清空last_buy；更早的交易降低first_seen但不回退last_seen
+    graph.add_token_trades(A, [make_swap("sell", 1, 2.0, 300), make_swap("sell", 1, 2.0, 100)])
+    assert token_edge(graph, A, "MINT") == (1, 2, 100, 200, 300)
+
+    graph.add_token_trades(A, [make_swap("buy", 1, 1.0, 150), make_swap("swap", 1, 1.0, 400)])
+    assert token_edge(graph, A, "MINT") == (2, 2, 100, 200, 400)
+
+def test_token_trades_without_buy_keep_last_buy_empty(graph, make_swap):
+    graph.add_token_trades(A, [make_swap("sell", 1, 1.0, 200)])
+    graph.add_token_trades(A, [make_swap("sell", 1, 1.0, 300)])
+    assert token_edge(graph, A, "MINT") == (0, 2, 200, None, 300)
+
+    # 缺少区块时间的交易不覆盖已有时间
+    graph.add_token_trades(A, [make_swap("buy", 1, 1.0, None)])
+    assert token_edge(graph, A, "MINT")[2:4] == (200, None)
+
+def test_co_trades_upsert(graph):
+    graph.add_co_trades(A, [B, A, "11111111111111111111111111111111"], 200)
+    graph.add_co_trades(A, [B], 100)
+    graph.add_co_trades(B, [A], 300)
+
+    assert wallet_edge(graph, A, B) == (3, 100, 300)
+    assert wallet_edge(graph, B, A) == (3, 100, 300)
+    assert wallet_edge(graph, A, A) is None
+
+def test_unanalyzed_neighbors_of_smart(graph):
+    graph.add_co_trades(A, [C, D], 100)
+    graph.add_co_trades(B, [C, E], 100)
+    graph.add_co_trades(B, [C], 200)
+    graph.add_co_trades(D, [E], 100)
+    graph.mark_analyzed(A, True, 1000)
+    graph.mark_analyzed(B, True, 1000)
+    graph.mark_analyzed(E, False, 1000)
+
+    # C与聪明钱包A、B共3次交易；D只与A交易；E和A、B已分析
+    assert graph.unanalyzed_neighbors_of_smart() == [C, D]
+    assert graph.unanalyzed_neighbors_of_smart(limit=1) == [C]
+    assert graph.unanalyzed_neighbors_of_smart(limit=1, exclude=[C]) == [D]
+
+    graph.mark_analyzed(C, False, 2000)
+    assert graph.unanalyzed_neighbors_of_smart() == [D]
+
+def test_reopen_drops_unused_index(tmp_path):
+    path = str(tmp_path / "graph.db")
+    WalletGraph(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE INDEX idx_token_edges_last_buy ON token_edges (last_buy)")
+    conn.commit()
+    conn.close()
+
+    graph = WalletGraph(path)
+    indexes = [row[0] for row in graph._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    graph.close()
+    assert "idx_token_edges_last_buy" not in indexes
@@ -0,0 +1,325 @@
+"""
+代币注册表 - 热门代币的元数据和价格缓存
+
+常用代币保存在内存LRU中；元数据(decimals/supply)通过getMultipleAccounts批量刷新，
+价格优先取已登记池子的链上储备，否则使用最近一笔swap的成交价；
+聪明钱包交易次数等计数先在内存累加，定期批量写入主数据库tokens表
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from rpc_client import connection_call
+
+# 挂在应用日志记录器下，沿用其处理器
+logger = logging.getLogger("solana_smart_wallet.token_registry")
+
+# 主数据库默认路径(对应DATABASE_URL=sqlite:///./smart_wallets.db)
+DEFAULT_MAIN_DB = "smart_wallets.db"
+
+# 内存中最多缓存的代币数量
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# 计数批量写入间隔(秒)
+TOKEN_FLUSH_INTERVAL = float(os.getenv("TOKEN_FLUSH_INTERVAL", "30"))
+# 元数据和价格刷新间隔(秒)
+TOKEN_REFRESH_INTERVAL = float(os.getenv("TOKEN_REFRESH_INTERVAL", "60"))
+# 元数据获取失败(账户不存在或不是mint)后的最长重试间隔(秒)，间隔按失败次数指数增长
+TOKEN_METADATA_MAX_BACKOFF = float(os.getenv("TOKEN_METADATA_MAX_BACKOFF", "21600"))
+
+# getMultipleAccounts单次最多查询的账户数
+MAX_ACCOUNTS_PER_CALL = 100
+
+# 与app.models.token.Token一致的表结构(主数据库尚未建表时使用)
+TOKENS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    address VARCHAR PRIMARY KEY,
+    symbol VARCHAR,
+    name VARCHAR,
+    decimals INTEGER,
+    supply FLOAT,
+    current_price_sol FLOAT,
+    last_price_update DATETIME,
+    smart_wallet_trades INTEGER,
+    is_popular BOOLEAN,
+    first_seen DATETIME,
+    last_seen DATETIME
+)
+"""
+
+def _to_db_time(timestamp: Optional[float]) -> Optional[str]:
+    """转换为SQLAlchemy DateTime在SQLite中的存储格式(UTC)"""
+    if not timestamp:
+        return None
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+class TokenInfo:
+    """单个代币的缓存数据"""
+
+    __slots__ = ("address", "symbol", "decimals", "supply", "price_sol", "price_updated",
+                 "pending_trades", "first_seen", "last_seen", "is_popular", "metadata_loaded",
+                 "metadata_failures", "metadata_retry_at", "dirty")
+
+    def __init__(self, address: str, symbol: Optional[str] = None):
+        self.address = address
+        self.symbol = symbol
+        self.decimals: Optional[int] = None
+        self.supply: Optional[float] = None
+        self.price_sol: Optional[float] = None
+        self.price_updated: Optional[float] = None
+        # 尚未写入数据库的聪明钱包交易次数
+        self.pending_trades = 0
+        self.first_seen: Optional[float] = None
+        self.last_seen: Optional[float] = None
+        # 是否出现过聪明钱包共同买入信号
+        self.is_popular = False
+        self.metadata_loaded = False
+        # 元数据连续获取失败次数和下次重试时间
+        self.metadata_failures = 0
+        self.metadata_retry_at = 0.0
+        self.dirty = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "symbol": self.symbol,
+            "decimals": self.decimals,
+            "supply": self.supply,
+            "current_price_sol": self.price_sol,
+            "last_price_update": self.price_updated,
+            "is_popular": self.is_popular,
+            "last_seen": self.last_seen
+        }
+
+class TokenRegistry:
+    """代币元数据和价格缓存，定期批量刷新和写入"""
+
+    def __init__(self, db_path: str = DEFAULT_MAIN_DB, capacity: int = TOKEN_CACHE_SIZE):
+        self.db_path = db_path
+        self.capacity = capacity
+        self._tokens: "OrderedDict[str, TokenInfo]" = OrderedDict()
+        # 被LRU淘汰但尚未写入的代币
+        self._evicted: Dict[str, TokenInfo] = {}
+        # mint -> (代币储备账户, SOL储备账户)
+        self._pools: Dict[str, Tuple[str, str]] = {}
+
+    def _touch(self, mint: str) -> TokenInfo:
+        """获取或创建代币缓存项，并移到LRU末尾"""
+        token = self._tokens.get(mint)
+        if token is not None:
+            self._tokens.move_to_end(mint)
+            metrics.CACHE_REQUESTS.labels("token_registry", "hit").inc()
+            return token
+
+        metrics.CACHE_REQUESTS.labels("token_registry", "miss").inc()
+        token = self._evicted.pop(mint, None) or TokenInfo(mint)
+        self._tokens[mint] = token
+        while len(self._tokens) > self.capacity:
+            _, evicted = self._tokens.popitem(last=False)
+            self._pools.pop(evicted.address, None)
+            if evicted.dirty:
+                self._evicted[evicted.address] = evicted
+        return token
+
+    def get(self, mint: str) -> Optional[TokenInfo]:
+        """获取缓存中的代币信息(不创建)"""
+        token = self._tokens.get(mint)
+        if token is not None:
+            self._tokens.move_to_end(mint)
+        return token
+
+    def get_price(self, mint: str) -> Optional[float]:
+        """获取代币的SOL价格"""
+        token = self.get(mint)
+        return token.price_sol if token else None
+
+    def value_positions(self, holdings: Dict[str, float]) -> float:
+        """按缓存价格估算持仓总价值(SOL)，没有价格的代币不计入"""
+        total = 0.0
+        for mint, amount in holdings.items():
+            price = self.get_price(mint)
+            if price is not None:
+                total += amount * price
+        return total
+
+    def register_pool(self, mint: str, token_vault: str, sol_vault: str):
+        """登记代币的池子储备账户，刷新价格时按储备计算"""
+        self._pools[mint] = (token_vault, sol_vault)
+
+    def observe_swaps(self, swaps: Iterable[Any], smart_wallet: bool = False):
+        """记录swap(swap_decoder.DecodedSwap)：更新最近出现时间和成交价，登记解码出的池子，聪明钱包的交易计入次数"""
+        for swap in swaps:
+            if not swap.token_mint:
+                continue
+            token = self._touch(swap.token_mint)
+            timestamp = swap.block_time or time.time()
+            if token.first_seen is None or timestamp < token.first_seen:
+                token.first_seen = timestamp
+            if token.last_seen is None or timestamp > token.last_seen:
+                token.last_seen = timestamp
+                # 未登记池子时使用最近一笔成交价
+                if swap.token_mint not in self._pools and swap.token_amount > 0 and swap.sol_amount > 0:
+                    token.price_sol = swap.sol_amount / swap.token_amount
+                    token.price_updated = timestamp
+            # 登记池子之后不再按成交价更新，已有的成交价保留到首次按储备刷新
+            if swap.pool is not None:
+                self.register_pool(swap.token_mint, *swap.pool)
+            if smart_wallet:
+                token.pending_trades += 1
+            token.dirty = True
+
+    def mark_popular(self, mint: str):
+        """标记为受欢迎代币(多个聪明钱包交易)，下次写入时更新is_popular"""
+        token = self._touch(mint)
+        token.is_popular = True
+        token.dirty = True
+
+    async def _get_multiple_accounts(self, connection, addresses: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """分批调用getMultipleAccounts(jsonParsed)"""
+        accounts: List[Optional[Dict[str, Any]]] = []
+        for i in range(0, len(addresses), MAX_ACCOUNTS_PER_CALL):
+            result = await connection_call(
+                connection, "getMultipleAccounts",
+                [addresses[i:i + MAX_ACCOUNTS_PER_CALL], {"encoding": "jsonParsed"}]
+            )
+            accounts.extend((result or {}).get("value") or [None] * len(addresses[i:i + MAX_ACCOUNTS_PER_CALL]))
+        return accounts
+
+    @staticmethod
+    def _parsed_info(account: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        data = (account or {}).get("data")
+        if not isinstance(data, dict):
+            return {}
+        return (data.get("parsed") or {}).get("info") or {}
+
+    async def refresh_metadata(self, connection, mints: Optional[List[str]] = None) -> int:
+        """批量刷新尚未加载元数据的代币的decimals和supply
+
+        没有返回decimals的代币记录失败次数，按指数退避推迟下次重试
+
+        Returns:
+            更新的代币数量
+        """
+        now = time.time()
+        if mints is None:
+            mints = [
+                mint for mint, token in self._tokens.items()
+                if not token.metadata_loaded and token.metadata_retry_at <= now
+            ]
+        if not mints:
+            return 0
+
+        updated = 0
+        for mint, account in zip(mints, await self._get_multiple_accounts(connection, mints)):
+            info = self._parsed_info(account)
+            token = self._touch(mint)
+            if "decimals" not in info:
+                token.metadata_failures += 1
+                backoff = TOKEN_REFRESH_INTERVAL * 2 ** min(token.metadata_failures, 16)
+                token.metadata_retry_at = now + min(backoff, TOKEN_METADATA_MAX_BACKOFF)
+                continue
+            token.decimals = int(info["decimals"])
+            if info.get("supply") is not None:
+                token.supply = int(info["supply"]) / (10 ** token.decimals)
+            token.metadata_loaded = True
+            token.metadata_failures = 0
+            token.dirty = True
+            updated += 1
+        return updated
+
+    async def refresh_prices(self, connection) -> int:
+        """按已登记池子的链上储备批量刷新价格
+
+        Returns:
+            更新的代币数量
+        """
+        pools = [(mint, vaults) for mint, vaults in self._pools.items() if mint in self._tokens]
+        if not pools:
+            return 0
+
+        addresses = [address for _, vaults in pools for address in vaults]
+        accounts = await self._get_multiple_accounts(connection, addresses)
+        now = time.time()
+        updated = 0
+        for i, (mint, _) in enumerate(pools):
+            token_reserve = (self._parsed_info(accounts[2 * i]).get("tokenAmount") or {}).get("uiAmount")
+            sol_reserve = (self._parsed_info(accounts[2 * i + 1]).get("tokenAmount") or {}).get("uiAmount")
+            if not token_reserve or not sol_reserve:
+                continue
+            token = self._tokens[mint]
+            token.price_sol = sol_reserve / token_reserve
+            token.price_updated = now
+            token.dirty = True
+            updated += 1
+        return updated
+
+    def flush(self) -> int:
+        """将有变化的代币批量写入tokens表，交易次数累加到已有值上
+
+        Returns:
+            写入的代币数量
+        """
+        dirty = [token for token in self._tokens.values() if token.dirty] + list(self._evicted.values())
+        if not dirty:
+            return 0
+
+        rows = [(
+            token.address, token.symbol, token.decimals, token.supply, token.price_sol,
+            _to_db_time(token.price_updated), token.pending_trades, int(token.is_popular),
+            _to_db_time(token.first_seen), _to_db_time(token.last_seen)
+        ) for token in dirty]
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(TOKENS_SCHEMA)
+            with metrics.DB_COMMIT_LATENCY.labels("token_registry").time():
+                conn.executemany(
+                    "INSERT INTO tokens (address, symbol, decimals, supply, current_price_sol, last_price_update, "
+                    "smart_wallet_trades, is_popular, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (address) DO UPDATE SET "
+                    "symbol = COALESCE(excluded.symbol, symbol), "
+                    "decimals = COALESCE(excluded.decimals, decimals), "
+                    "supply = COALESCE(excluded.supply, supply), "
+                    "current_price_sol = COALESCE(excluded.current_price_sol, current_price_sol), "
+                    "last_price_update = COALESCE(excluded.last_price_update, last_price_update), "
+                    "smart_wallet_trades = COALESCE(smart_wallet_trades, 0) + excluded.smart_wallet_trades, "
+                    "is_popular = MAX(COALESCE(is_popular, 0), excluded.is_popular), "
+                    "last_seen = MAX(COALESCE(last_seen, ''), COALESCE(excluded.last_seen, ''))",
+                    rows
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+        for token in dirty:
+            token.pending_trades = 0
+            token.dirty = False
+        self._evicted.clear()
+        return len(rows)
+
+    async def run(self, connection, flush_interval: float = TOKEN_FLUSH_INTERVAL,
+                  refresh_interval: float = TOKEN_REFRESH_INTERVAL):
+        """后台任务：定期刷新元数据和价格，并批量写入计数"""
+        loop = asyncio.get_running_loop()
+        next_refresh = loop.time()
+        while True:
+            if loop.time() >= next_refresh:
+                next_refresh = loop.time() + refresh_interval
+                try:
+                    await self.refresh_metadata(connection)
+                    await self.refresh_prices(connection)
+                except Exception as e:
+                    # 刷新失败时保留缓存中的旧数据，下个周期重试
+                    logger.warning(f"刷新代币元数据/价格失败: {e}")
+            await asyncio.sleep(flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                # 写入失败(如数据库被锁)时保留内存中的计数，下个周期重试
+                logger.error(f"写入代币数据失败: {e}")
@@ -0,0 +1,318 @@
+"""
+性能追踪 - 按钱包分析记录耗时区间(RPC、解析、存储、指标计算)，以及按需开启的采样分析器
+
+追踪默认关闭(TRACE_ENABLED=1或运行时通过指标服务的/debug/trace开启)，关闭时span()只返回空操作对象。
+区间以Chrome Trace Event格式输出，可直接在Perfetto(ui.perfetto.dev)或chrome://tracing中打开：
+每次钱包分析是一个进程轨道，其中每个asyncio任务是一个线程轨道，并发获取的交易不会互相重叠
+
+采样分析器在后台线程中定期采集事件循环线程的调用栈，输出折叠栈格式(flamegraph.pl、speedscope可读取)
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+# 是否在启动时开启追踪
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "0") == "1"
+# 内存中保留的最多区间数(超出时丢弃最旧的)
+TRACE_MAX_EVENTS = int(os.getenv("TRACE_MAX_EVENTS", "200000"))
+# 追踪文件目录(退出时写入)
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join("app/data", "traces"))
+
+# 采样间隔(毫秒)和单次采样最长时间(秒)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+
+# 区间类别
+CAT_RPC = "rpc"
+CAT_PARSE = "parse"
+CAT_DB = "db"
+CAT_METRICS = "metrics"
+
+class _WalletTrace:
+    """一次钱包分析的轨道：pid标识本次分析，tid按asyncio任务分配"""
+
+    __slots__ = ("pid", "name", "_tids", "_next_tid")
+
+    def __init__(self, pid: int, name: str):
+        self.pid = pid
+        self.name = name
+        self._tids: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._next_tid = 0
+
+    def tid(self, tracer: "Tracer") -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:  # 不在事件循环中
+            task = None
+        if task is None:
+            return 0
+        tid = self._tids.get(task)
+        if tid is None:
+            self._next_tid += 1
+            tid = self._tids[task] = self._next_tid
+            tracer._set_metadata(self.pid, tid, "thread_name", task.get_name())
+        return tid
+
+class _Span:
+    """计时区间，退出时记录一条完整事件(ph=X)"""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args = {**(self.args or {}), "error": exc_type.__name__}
+        self.tracer._record(self.name, self.cat, self.start, end, self.args)
+        return False
+
+class _NullSpan:
+    """追踪关闭时使用的空操作区间"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _WalletScope:
+    """将当前上下文(及其中创建的任务)归入一次钱包分析"""
+
+    __slots__ = ("tracer", "address", "_token", "_span")
+
+    def __init__(self, tracer: "Tracer", address: str):
+        self.tracer = tracer
+        self.address = address
+        self._token = None
+        self._span = None
+
+    def __enter__(self):
+        tracer = self.tracer
+        tracer._next_pid += 1
+        trace = _WalletTrace(tracer._next_pid, f"wallet {self.address}")
+        tracer._set_metadata(trace.pid, 0, "process_name", trace.name)
+        self._token = _current_trace.set(trace)
+        self._span = tracer.span("analyze_wallet", "wallet", address=self.address).__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._span.__exit__(*exc_info)
+        finally:
+            _current_trace.reset(self._token)
+        return False
+
+# 当前钱包分析的轨道，asyncio任务创建时复制上下文，因此gather/wait_for中的子任务也归入同一轨道
+_current_trace: contextvars.ContextVar[Optional[_WalletTrace]] = contextvars.ContextVar("trace_wallet", default=None)
+
+class Tracer:
+    """区间记录器(在事件循环线程内使用)"""
+
+    def __init__(self, enabled: bool = TRACE_ENABLED, max_events: int = TRACE_MAX_EVENTS):
+        self.enabled = enabled
+        self.max_events = max_events
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        # (pid, tid, 名称) -> 元数据事件，数量同样受max_events限制
+        self._metadata: "OrderedDict[Tuple[int, int, str], Dict[str, Any]]" = OrderedDict()
+        self._background = _WalletTrace(0, "scanner")
+        self._metadata_written = False
+        self._next_pid = 0
+        self._origin = time.perf_counter_ns()
+
+    @property
+    def event_count(self) -> int:
+        return len(self._events)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._events.clear()
+        self._metadata.clear()
+        self._metadata_written = False
+
+    def span(self, name: str, cat: str, **args):
+        """记录一个区间: with tracer.span("getTransaction", CAT_RPC): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args or None)
+
+    def wallet(self, address: str):
+        """一次钱包分析的作用域，其中的区间记录到该钱包的轨道"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _WalletScope(self, address)
+
+    def _set_metadata(self, pid: int, tid: int, kind: str, value: str):
+        key = (pid, tid, kind)
+        if key in self._metadata:
+            return
+        self._metadata[key] = {"name": kind, "ph": "M", "pid": pid, "tid": tid, "args": {"name": value}}
+        while len(self._metadata) > self.max_events:
+            self._metadata.popitem(last=False)
+
+    def _record(self, name: str, cat: str, start: int, end: int, args: Optional[Dict[str, Any]]):
+        trace = _current_trace.get()
+        if trace is None:
+            trace = self._background
+            if not self._metadata_written:
+                self._metadata_written = True
+                self._set_metadata(0, 0, "process_name", trace.name)
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": trace.pid,
+            "tid": trace.tid(self)
+        }
+        if args:
+            event["args"] = args
+        self._events.append(event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Chrome Trace Event格式(JSON对象形式)
+
+        返回的是当前区间列表的副本(事件本身记录后不再修改)，可以在其他线程中序列化
+        """
+        return {
+            "traceEvents": list(self._metadata.values()) + list(self._events),
+            "displayTimeUnit": "ms"
+        }
+
+    @staticmethod
+    def encode(trace: Dict[str, Any]) -> bytes:
+        return json.dumps(trace, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def to_json(self) -> bytes:
+        return self.encode(self.to_dict())
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """写入追踪文件，返回文件路径"""
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "wb") as f:
+            f.write(self.to_json())
+        return path
+
+class SamplingProfiler:
+    """采样分析器：后台线程按固定间隔采集目标线程的调用栈"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000, thread_id: Optional[int] = None):
+        self.interval = interval
+        # 默认采集调用start()的线程(即事件循环线程)
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def render_collapsed(self) -> str:
+        """折叠栈格式: 每行"外层;...;内层 次数"，按次数降序"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    async def run_for(self, seconds: float) -> str:
+        """在当前事件循环中采样seconds秒并返回折叠栈"""
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self.render_collapsed()
+
+# 同一时间只运行一个采样分析器，后到的请求排队等待
+_profile_lock: Optional[asyncio.Lock] = None
+
+async def profile_route(query: Dict[str, str], headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """metrics.register_stream_route使用的采样路由: /debug/profile?seconds=N，返回折叠栈文本"""
+    global _profile_lock
+    if _profile_lock is None:
+        _profile_lock = asyncio.Lock()
+    try:
+        seconds = float(query.get("seconds", "10"))
+    except ValueError:
+        seconds = 10.0
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    async with _profile_lock:
+        profiler = SamplingProfiler()
+        stacks = await profiler.run_for(seconds)
+    yield stacks.encode("utf-8")
+
+async def trace_route(query: Dict[str, str], headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """metrics.register_stream_route使用的追踪路由
+
+    /debug/trace?enable=1|0 开启/关闭追踪，clear=1 清空已记录的区间；返回当前追踪JSON
+    (在事件循环中复制区间列表，在线程中序列化，避免数十万个区间的序列化阻塞扫描)
+    """
+    tracer = get_tracer()
+    if query.get("clear") == "1":
+        tracer.clear()
+    if query.get("enable") == "1":
+        tracer.enable()
+    elif query.get("enable") == "0":
+        tracer.disable()
+    trace = tracer.to_dict()
+    yield await asyncio.to_thread(Tracer.encode, trace)
+
+# 全局追踪器
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    """获取追踪器单例"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
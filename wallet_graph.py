@@ -0,0 +1,193 @@
+"""
+钱包关系图存储 - 持久化钱包<->钱包共同交易边和钱包<->代币交易边
+
+发现新钱包时优先查询本地图(如"聪明钱包的未分析邻居")，不必重复抓取交易
+"""
+
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import metrics
+from swap_decoder import DEX_PROGRAMS
+
+try:
+    from solders.pubkey import Pubkey
+except ImportError:  # 未安装solders时不检查地址是否为PDA
+    Pubkey = None
+
+# 默认存储文件
+DEFAULT_GRAPH_DB = os.path.join("app/data", "wallet_graph.db")
+
+# 常见的程序/系统账户，不作为钱包节点
+NON_WALLET_ACCOUNTS = frozenset({
+    "11111111111111111111111111111111",              # System Program
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",   # Token Program
+    "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",   # Token-2022
+    "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL",  # Associated Token Account
+    "ComputeBudget111111111111111111111111111111",   # Compute Budget
+    "SysvarRent111111111111111111111111111111111",
+    "SysvarC1ock11111111111111111111111111111111",
+    "So11111111111111111111111111111111111111112",   # Wrapped SOL
+}) | frozenset(DEX_PROGRAMS)
+
+def is_wallet_address(address: str) -> bool:
+    """判断地址是否可能是用户钱包: 排除已知程序/系统账户，以及不在ed25519曲线上的PDA(池子、程序权限账户等)"""
+    if not address or address in NON_WALLET_ACCOUNTS:
+        return False
+    if Pubkey is not None:
+        try:
+            return Pubkey.from_string(address).is_on_curve()
+        except ValueError:
+            return False
+    return True
+
+def transaction_wallets(tx: Dict[str, Any]) -> List[str]:
+    """提取交易中可能是用户钱包的地址: 签名者(含手续费支付者)和代币账户的所有者
+
+    不使用其余账户(池子、代币账户、PDA等)，避免把非钱包地址加入关系图
+    """
+    message = tx["transaction"]["message"]
+    keys = message.get("accountKeys") or []
+    if keys and isinstance(keys[0], dict):
+        # jsonParsed编码直接标注了签名者
+        signers = [key["pubkey"] for key in keys if key.get("signer")]
+    else:
+        header = message.get("header") or {}
+        signers = keys[:header.get("numRequiredSignatures", 1)]
+
+    meta = tx.get("meta") or {}
+    owners = [
+        balance.get("owner")
+        for balances in (meta.get("preTokenBalances") or (), meta.get("postTokenBalances") or ())
+        for balance in balances
+    ]
+    wallets: List[str] = []
+    for address in list(signers) + owners:
+        if address not in wallets and is_wallet_address(address):
+            wallets.append(address)
+    return wallets
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_nodes (
+    address TEXT PRIMARY KEY,
+    is_smart INTEGER NOT NULL DEFAULT 0,
+    analyzed_at INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_wallet_nodes_smart ON wallet_nodes (is_smart);
+
+CREATE TABLE IF NOT EXISTS wallet_edges (
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    weight INTEGER NOT NULL DEFAULT 0,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    PRIMARY KEY (src, dst)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS token_edges (
+    wallet TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    buy_count INTEGER NOT NULL DEFAULT 0,
+    sell_count INTEGER NOT NULL DEFAULT 0,
+    first_seen INTEGER,
+    last_buy INTEGER,
+    last_seen INTEGER,
+    PRIMARY KEY (wallet, mint)
+) WITHOUT ROWID;
+-- 旧版本按last_buy查询热门代币的索引，已无查询使用
+DROP INDEX IF EXISTS idx_token_edges_last_buy;
+"""
+
+class WalletGraph:
+    """钱包关系图，边表存储于SQLite并建立索引"""
+
+    def __init__(self, path: str = DEFAULT_GRAPH_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _commit(self):
+        with metrics.DB_COMMIT_LATENCY.labels("wallet_graph").time():
+            self._conn.commit()
+
+    def add_co_trades(self, wallet: str, counterparties: Iterable[str], timestamp: Optional[int]):
+        """记录钱包与交易对手的共同交易边(双向，权重累加)"""
+        rows = []
+        for other in counterparties:
+            if other == wallet or not is_wallet_address(other):
+                continue
+            rows.append((wallet, other, timestamp, timestamp))
+            rows.append((other, wallet, timestamp, timestamp))
+        if not rows:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO wallet_edges (src, dst, weight, first_seen, last_seen) VALUES (?, ?, 1, ?, ?) "
+            "ON CONFLICT (src, dst) DO UPDATE SET weight = weight + 1, "
+            "first_seen = MIN(COALESCE(first_seen, excluded.first_seen), COALESCE(excluded.first_seen, first_seen)), "
+            "last_seen = MAX(COALESCE(last_seen, 0), COALESCE(excluded.last_seen, 0))",
+            rows
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO wallet_nodes (address) VALUES (?)",
+            [(row[1],) for row in rows[::2]] + [(wallet,)]
+        )
+        self._commit()
+
+    def add_token_trades(self, wallet: str, swaps: Iterable[Any]):
+        """记录钱包与代币的交易边(swap_decoder.DecodedSwap)
+
+        代币换代币(side为swap)时token_mint可能是卖出的一腿，只记录交易时间，不计入买卖次数
+        """
+        rows = []
+        for swap in swaps:
+            is_buy = 1 if swap.side == "buy" else 0
+            is_sell = 1 if swap.side == "sell" else 0
+            rows.append((wallet, swap.token_mint, is_buy, is_sell, swap.block_time,
+                         swap.block_time if is_buy else None, swap.block_time))
+        if not rows:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO token_edges (wallet, mint, buy_count, sell_count, first_seen, last_buy, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (wallet, mint) DO UPDATE SET "
+            "buy_count = buy_count + excluded.buy_count, "
+            "sell_count = sell_count + excluded.sell_count, "
+            "first_seen = MIN(COALESCE(first_seen, excluded.first_seen), COALESCE(excluded.first_seen, first_seen)), "
+            "last_buy = CASE WHEN excluded.last_buy IS NULL THEN last_buy "
+            "ELSE MAX(COALESCE(last_buy, 0), excluded.last_buy) END, "
+            "last_seen = MAX(COALESCE(last_seen, 0), COALESCE(excluded.last_seen, 0))",
+            rows
+        )
+        self._commit()
+
+    def mark_analyzed(self, address: str, is_smart: bool, timestamp: int):
+        """记录钱包的分析结果"""
+        self._conn.execute(
+            "INSERT INTO wallet_nodes (address, is_smart, analyzed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (address) DO UPDATE SET is_smart = excluded.is_smart, analyzed_at = excluded.analyzed_at",
+            (address, int(is_smart), timestamp)
+        )
+        self._commit()
+
+    def unanalyzed_neighbors_of_smart(self, limit: int = 100, exclude: Iterable[str] = ()) -> List[str]:
+        """获取聪明钱包的未分析邻居，按与聪明钱包的总边权重降序"""
+        exclude = set(exclude)
+        rows = self._conn.execute(
+            "SELECT e.dst, SUM(e.weight) AS score FROM wallet_edges e "
+            "JOIN wallet_nodes s ON s.address = e.src AND s.is_smart = 1 "
+            "JOIN wallet_nodes n ON n.address = e.dst AND n.analyzed_at IS NULL "
+            "GROUP BY e.dst ORDER BY score DESC LIMIT ?",
+            (limit + len(exclude),)
+        ).fetchall()
+        return [address for address, _ in rows if address not in exclude][:limit]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,134 @@
+"""
+只读API模式的Web应用
+
+复用app.api.routes中的仪表盘和交易路由；钱包路由在此提供只读版本，不导入
+app.api.routes.wallets(其手动分析接口依赖transaction_analyzer和solana SDK)，
+钱包分析只在扫描进程(scanner.py)中进行
+"""
+
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+from app.api.routes import dashboard, transactions
+from app.core.config import get_settings
+from app.core.database import get_db, init_db
+from app.models.wallet import SmartWallet
+from app.utils.logger import get_logger
+from cobuy_signals import SignalStore
+
+settings = get_settings()
+logger = get_logger()
+
+wallet_router = APIRouter()
+
+@wallet_router.get("/", response_model=List[dict])
+async def get_wallets(
+    smart_only: bool = Query(False, description="仅返回聪明钱包"),
+    min_win_rate: Optional[float] = Query(None, description="最小胜率"),
+    min_profit_ratio: Optional[float] = Query(None, description="最小盈亏比"),
+    min_daily_trades: Optional[float] = Query(None, description="最小日均交易次数"),
+    max_holding_hours: Optional[float] = Query(None, description="最大持仓时间(小时)"),
+    limit: int = Query(100, description="返回条数限制"),
+    offset: int = Query(0, description="分页偏移量"),
+    db: Session = Depends(get_db)
+):
+    """获取钱包列表，支持筛选(按盈亏比降序)"""
+    query = db.query(SmartWallet)
+    if smart_only:
+        query = query.filter(SmartWallet.is_smart_wallet == True)
+    if min_win_rate is not None:
+        query = query.filter(SmartWallet.win_rate >= min_win_rate)
+    if min_profit_ratio is not None:
+        query = query.filter(SmartWallet.profit_loss_ratio >= min_profit_ratio)
+    if min_daily_trades is not None:
+        query = query.filter(SmartWallet.daily_trades >= min_daily_trades)
+    if max_holding_hours is not None:
+        query = query.filter(SmartWallet.avg_holding_time <= max_holding_hours)
+
+    wallets = query.order_by(desc(SmartWallet.profit_loss_ratio)).offset(offset).limit(limit).all()
+    return [wallet.to_dict() for wallet in wallets]
+
+# 固定路径需在/{address}之前注册，否则会被当作钱包地址匹配
+@wallet_router.get("/stats/overview", response_model=dict)
+async def get_wallet_stats(db: Session = Depends(get_db)):
+    """获取钱包统计概览"""
+    total_wallets = db.query(SmartWallet).count()
+    smart_wallets = db.query(SmartWallet).filter(SmartWallet.is_smart_wallet == True).count()
+    avg_win_rate = db.query(func.avg(SmartWallet.win_rate)).filter(SmartWallet.total_trades > 0).scalar()
+    avg_profit_loss_ratio = db.query(func.avg(SmartWallet.profit_loss_ratio)).filter(SmartWallet.total_loss > 0).scalar()
+
+    return {
+        "total_wallets": total_wallets,
+        "smart_wallets": smart_wallets,
+        "smart_wallet_percentage": (smart_wallets / total_wallets * 100) if total_wallets > 0 else 0,
+        "avg_win_rate": avg_win_rate or 0,
+        "avg_profit_loss_ratio": avg_profit_loss_ratio or 0
+    }
+
+@wallet_router.get("/{address}", response_model=dict)
+async def get_wallet_detail(address: str, db: Session = Depends(get_db)):
+    """获取钱包详情"""
+    wallet = db.query(SmartWallet).filter(SmartWallet.address == address).first()
+    if not wallet:
+        raise HTTPException(status_code=404, detail="钱包未找到")
+    return wallet.to_dict()
+
+# 共同买入信号(由扫描器写入app/data/signals.db)，首次查询时打开
+_signal_store: Optional[SignalStore] = None
+
+signal_router = APIRouter()
+
+@signal_router.get("/api/signals", response_model=List[dict])
+async def get_signals(
+    limit: int = Query(100, description="返回条数限制(最多1000)"),
+    since: Optional[int] = Query(None, description="只返回该时间戳之后的信号"),
+    mint: Optional[str] = Query(None, description="代币地址筛选")
+):
+    """查询聪明钱包共同买入信号，按时间倒序"""
+    global _signal_store
+    if _signal_store is None:
+        _signal_store = SignalStore()
+    return _signal_store.recent(limit=min(limit, 1000), since=since, mint=mint)
+
+def create_app() -> FastAPI:
+    """创建只读API模式的Web应用(不在Web进程内运行扫描器，避免与API争用CPU，多worker时也不会重复扫描)"""
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description="Solana链聪明钱包筛选工具(只读API)",
+        version="1.0.0"
+    )
+
+    if os.path.exists(settings.STATIC_DIR):
+        app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
+    templates = Jinja2Templates(directory=settings.TEMPLATES_DIR)
+
+    app.include_router(dashboard.router)
+    app.include_router(wallet_router, prefix="/api/wallets", tags=["wallets"])
+    app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
+    app.include_router(signal_router, tags=["signals"])
+
+    @app.get("/", response_class=HTMLResponse)
+    async def root(request: Request):
+        """主页"""
+        return templates.TemplateResponse("index.html", {"request": request})
+
+    @app.on_event("startup")
+    async def startup():
+        """应用启动时创建缺少的数据表"""
+        os.makedirs(settings.DATA_DIR, exist_ok=True)
+        init_db()
+        logger.info("Web服务已启动(只读API模式)，钱包扫描请运行: python scanner.py")
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        """应用关闭时的清理操作"""
+        logger.info("应用关闭，执行清理操作")
+
+    return app